@@ -1,21 +1,43 @@
 from django.contrib import admin
+from django.contrib.contenttypes.prefetch import GenericPrefetch
 from .models import Batch, Bag, Form, FormField, Submission
 from .forms import SubmissionAdminForm, BatchAdminForm, BagAdminForm, FormFieldAdminForm
+from .pagination import EstimatedCountPaginator
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Changelist settings for tables with millions of rows: estimated
+    totals instead of COUNT(*) (twice, with the unfiltered total),
+    autocomplete widgets instead of a <select> of every related row, and
+    an ordering that matches an index so a page is a short index scan.
+    Filters should only use choices, booleans, dates or small related
+    tables; free-text columns belong in search_fields.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+
 
 @admin.register(Batch)
-class BatchAdmin(admin.ModelAdmin):
+class BatchAdmin(LargeTableAdmin):
     form = BatchAdminForm
     list_display = (
         'batch_id', 'batch', 'user', 'country', 'production_type',
         'production_date', 'form_gate_sourced', 'cluster_group',
-        'quantity', 'uoms', 'created_at'
+        'quantity', 'uoms', 'status', 'created_at'
     )
-    list_filter = (
-        'user', 'batch', 'country', 'production_type',
-        'form_gate_sourced', 'cluster_group', 'uoms'
-    )
-    search_fields = ('batch', 'user__username', 'country', 'production_type', 'cluster_group')
-    ordering = ('-created_at', 'batch')
+    list_select_related = ('user',)
+    # Choices, booleans and dates only: a filter on a free-text column runs
+    # SELECT DISTINCT over the table; country and the like are searchable
+    list_filter = ('status', 'form_gate_sourced', 'production_date', 'created_at')
+    # Substring matches served by the pg_trgm indexes of migration 0016, the
+    # same columns as the API's ?search=; a joined column (user) in the OR
+    # would defeat them, so find a user's batches with ?user__id__exact=
+    search_fields = ('batch', 'country', 'production_type', 'cluster_group')
+    autocomplete_fields = ('user', 'form')
+    # batch_created_idx
+    ordering = ('-created_at', '-batch_id')
     readonly_fields = ('batch',)
 
     def save_model(self, request, obj, form, change):
@@ -25,18 +47,23 @@ class BatchAdmin(admin.ModelAdmin):
 
 
 @admin.register(Bag)
-class BagAdmin(admin.ModelAdmin):
+class BagAdmin(LargeTableAdmin):
     form = BagAdminForm
     list_display = (
-        'bag_id', 'batch', 'internal_lot_number', 'state',
+        'bag_id', 'batch', 'internal_lot_number', 'state', 'status',
         'qr_code', 'external_lot_number', 'external_update_date', 'created_at'
     )
-    list_filter = ('batch', 'state')
+    # Bag.__str__ shows the batch, whose __str__ shows its user
+    list_select_related = ('batch__user',)
+    list_filter = ('status', 'created_at')
+    # Exact matches on the id, unique and indexed lot columns
     search_fields = (
-        'bag_id', 'batch__batch_id', 'internal_lot_number',
-        'state', 'qr_code', 'external_lot_number'
+        '=bag_id', '=batch__batch_id', '=internal_lot_number',
+        '=qr_code', '=external_lot_number', 'state'
     )
-    ordering = ('-created_at', 'bag_id')
+    autocomplete_fields = ('batch', 'form')
+    # bag_created_idx
+    ordering = ('-created_at', '-bag_id')
 
 
 class FormFieldInline(admin.TabularInline):
@@ -57,12 +84,24 @@ class FormAdmin(admin.ModelAdmin):
 
 
 @admin.register(Submission)
-class SubmissionAdmin(admin.ModelAdmin):
+class SubmissionAdmin(LargeTableAdmin):
     form = SubmissionAdminForm
     list_display = ('submission_id', 'form', 'content_object', 'created_at', 'created_by')
+    list_select_related = ('form', 'created_by')
     search_fields = ('form__name', 'created_by__username')
-    list_filter = ('form', 'content_type')
-    ordering = ('-created_at', 'form__name')
+    # Lists the (few) forms and content types, not the submissions
+    list_filter = ('form', 'content_type', 'created_at')
+    autocomplete_fields = ('form', 'created_by')
+    # Primary key order follows creation order
+    ordering = ('-submission_id',)
+
+    def get_queryset(self, request):
+        # One query per content type for the page's content_object column
+        return super().get_queryset(request).prefetch_related(
+            GenericPrefetch('content_object', [
+                Batch.objects.select_related('user'), Bag.objects.select_related('batch__user'),
+            ])
+        )
 
     def save_model(self, request, obj, form, change):
         if not obj.pk:
@@ -0,0 +1,198 @@
+"""
+Async versions of the hot read endpoints, mounted under /api/async/.
+
+They answer exactly like their DRF counterparts (same payloads, ETags,
+errors, filters and cursors) but use the async ORM and cache API, so
+under ASGI a request waiting on the database or cache does not hold a
+worker thread. Authentication and permissions come from the same
+classes as the sync views: authenticators with an aauthenticate()
+method (CachedJWTAuthentication) are awaited, others are run in a
+thread.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .conditional import list_etag, make_etag, not_modified, set_validators
+from .lookups import abag_by_qr
+from .models import Batch, Bag
+from .renderers import FastJSONRenderer
+from .serializers import BatchSerializer, BagSerializer
+from .views import BatchViewSet, BagViewSet, bags_in_lot, user_info
+
+
+async def authenticate(request):
+    """
+    Runs the configured authenticators; returns (user, auth) or None.
+    As with DRF's Request, rest_framework.test.force_authenticate() wins.
+    """
+    force_user = getattr(request, '_force_auth_user', None)
+    force_token = getattr(request, '_force_auth_token', None)
+    if force_user is not None or force_token is not None:
+        return force_user, force_token
+    for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        authenticator = authenticator()
+        if hasattr(authenticator, 'aauthenticate'):
+            result = await authenticator.aauthenticate(request)
+        else:
+            result = await sync_to_async(authenticator.authenticate)(Request(request))
+        if result is not None:
+            return result
+    return None
+
+
+class AsyncReadView(View):
+    """
+    Base for the async GET endpoints: authenticates, checks
+    permission_classes (object permissions via check_object_permissions)
+    and renders with FastJSONRenderer. APIExceptions become the same
+    responses DRF's exception handler produces.
+    """
+    http_method_names = ['get', 'head']
+    permission_classes = list(BatchViewSet.permission_classes)
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            result = await authenticate(request)
+            request.user, request.auth = result if result is not None else (AnonymousUser(), None)
+            for permission in self.get_permissions():
+                if not permission.has_permission(request, self):
+                    self.permission_denied(request, permission)
+            return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return self.handle_exception(exc)
+
+    def get_permissions(self):
+        return [permission() for permission in self.permission_classes]
+
+    def check_object_permissions(self, request, obj):
+        for permission in self.get_permissions():
+            if not permission.has_object_permission(request, self, obj):
+                self.permission_denied(request, permission)
+
+    def permission_denied(self, request, permission):
+        if request.auth is None and not request.user.is_authenticated:
+            raise exceptions.NotAuthenticated()
+        raise exceptions.PermissionDenied(getattr(permission, 'message', None))
+
+    def handle_exception(self, exc):
+        data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+        response = self.render(data, status=exc.status_code)
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            # As DRF: 401 with the first authenticator's challenge, else 403
+            authenticator = api_settings.DEFAULT_AUTHENTICATION_CLASSES[0]()
+            challenge = authenticator.authenticate_header(Request(self.request))
+            if challenge:
+                response['WWW-Authenticate'] = challenge
+            else:
+                response.status_code = 403
+        return response
+
+    def render(self, data, status=200):
+        return HttpResponse(FastJSONRenderer().render(data), status=status, content_type='application/json')
+
+
+# ---------------------------------------------------------------------
+# DETAIL
+# ---------------------------------------------------------------------
+class AsyncDetailView(AsyncReadView):
+    model = None
+    serializer_class = None
+
+    async def get(self, request, pk):
+        try:
+            instance = await self.model.objects.aget(pk=pk)
+        except self.model.DoesNotExist:
+            raise exceptions.NotFound('No %s matches the given query.' % self.model._meta.object_name)
+        self.check_object_permissions(request, instance)
+
+        etag = make_etag(instance._meta.label, instance.pk, instance.updated_at.timestamp())
+        response = not_modified(request, etag, instance.updated_at)
+        if response is None:
+            response = self.render(self.serializer_class(instance, context={'request': request}).data)
+        return set_validators(response, etag, instance.updated_at)
+
+
+class BatchDetailView(AsyncDetailView):
+    model = Batch
+    serializer_class = BatchSerializer
+
+
+class BagDetailView(AsyncDetailView):
+    model = Bag
+    serializer_class = BagSerializer
+
+
+# ---------------------------------------------------------------------
+# LISTS
+# ---------------------------------------------------------------------
+class AsyncListView(AsyncReadView):
+    """
+    The viewset's list(): its filter backends, keyset pagination and
+    list ETag. Filtering runs in a thread because the form data filter
+    may load the form definition.
+    """
+    viewset_class = None
+
+    def get_viewset(self, request):
+        drf_request = Request(request)
+        drf_request.user, drf_request.auth = request.user, request.auth
+        return self.viewset_class(
+            request=drf_request, args=(), kwargs={}, format_kwarg=None, action='list',
+        )
+
+    def get_queryset(self, viewset):
+        return sync_to_async(viewset.filter_queryset)(viewset.get_queryset())
+
+    async def get(self, request, **kwargs):
+        viewset = self.get_viewset(request)
+        queryset = await self.get_queryset(viewset, **kwargs)
+        paginator = viewset.paginator
+        page = await paginator.apaginate_queryset(queryset, viewset.request, viewset)
+        etag = list_etag(request, queryset.model, page, count=paginator.count)
+        response = not_modified(request, etag, None)
+        if response is None:
+            data = viewset.get_serializer(page, many=True).data
+            response = self.render(paginator.get_paginated_response(data).data)
+        return set_validators(response, etag, None)
+
+
+class BatchListView(AsyncListView):
+    viewset_class = BatchViewSet
+
+
+class BagListView(AsyncListView):
+    viewset_class = BagViewSet
+
+
+class BagsByLotView(AsyncListView):
+    """Like GET /api/bags/by-lot/{lot}/, with the list's ETag."""
+    viewset_class = BagViewSet
+
+    async def get_queryset(self, viewset, lot):
+        return bags_in_lot(lot)
+
+
+# ---------------------------------------------------------------------
+# LOOKUPS
+# ---------------------------------------------------------------------
+class BagByQRView(AsyncReadView):
+    permission_classes = list(BagViewSet.permission_classes)
+
+    async def get(self, request, code):
+        data = await abag_by_qr(code, lambda bag: BagSerializer(bag, context={'request': request}).data)
+        if data is None:
+            return self.render({'detail': 'No bag with this QR code.'}, status=404)
+        return self.render(data)
+
+
+class UserInfoView(AsyncReadView):
+    permission_classes = [IsAuthenticated]
+
+    async def get(self, request):
+        return self.render(user_info(request.user))
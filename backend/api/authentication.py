@@ -0,0 +1,105 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from config.metrics import record_cache
+
+
+def _user_key(user_id):
+    return f'jwt-user:{user_id}'
+
+
+def user_cache():
+    """
+    The shared "users" cache, or None when users are not cached. Local
+    memory is never used: another worker's copy could not be invalidated
+    and would keep serving a deactivated user or revoked is_staff.
+    """
+    if 'users' not in settings.CACHES:
+        return None
+    cache = caches['users']
+    if isinstance(cache, (DummyCache, LocMemCache)):
+        return None
+    return cache
+
+
+def _user_timeout():
+    return getattr(settings, 'USER_CACHE_TIMEOUT', 60)
+
+
+def invalidate_user(user_id):
+    """Drops a cached user so the next request re-reads it, now and again on commit."""
+    cache = user_cache()
+    if cache is None:
+        return
+
+    def drop():
+        cache.delete(_user_key(user_id))
+    drop()
+    transaction.on_commit(drop)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that keeps the resolved User (including is_staff)
+    in the shared "users" cache for USER_CACHE_TIMEOUT, so authenticated
+    requests do not each read the user row. Saving or deleting the user,
+    or changing its groups or permissions, drops the entry (see
+    signals.py). Without a shared cache it reads the row every time.
+    aauthenticate() does the same for async views.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        cache = user_cache()
+        if user_id is None or cache is None:
+            return super().get_user(validated_token)
+
+        user = cache.get(_user_key(user_id))
+        record_cache('jwt-user', user is not None)
+        if user is None:
+            # Runs the active and revoked-token checks on the fresh row
+            user = super().get_user(validated_token)
+            cache.set(_user_key(user_id), user, _user_timeout())
+            return user
+        return self.check_cached_user(user, validated_token)
+
+    def check_cached_user(self, user, validated_token):
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed("The user's password has been changed.", code='password_changed')
+        return user
+
+    async def aget_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        cache = user_cache()
+        if user_id is None or cache is None:
+            return await sync_to_async(super().get_user)(validated_token)
+
+        user = await cache.aget(_user_key(user_id))
+        record_cache('jwt-user', user is not None)
+        if user is None:
+            user = await sync_to_async(super().get_user)(validated_token)
+            await cache.aset(_user_key(user_id), user, _user_timeout())
+            return user
+        return self.check_cached_user(user, validated_token)
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
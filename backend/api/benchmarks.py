@@ -0,0 +1,327 @@
+"""
+Query budgets and timings for every API action.
+
+ENDPOINTS lists each viewset action with the number of SQL queries it
+may run against a cold cache and, for some, the milliseconds its best
+run may take. The test suite asserts the query budgets on a small
+seeded dataset (so a new N+1 fails the run), and the benchmark_api
+command times the same requests against a seeded database (see
+seed_data) and also checks the time budgets there. LOAD_PAIRS drives the benchmark_asgi command,
+which compares the sync read endpoints with their async versions under
+concurrent load.
+"""
+import asyncio
+import math
+import time
+from collections import Counter, namedtuple
+
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import Batch, Bag, Form, FormField, Submission
+
+# url, body and (when they are not numbers) budget and ms take the BenchmarkSample;
+# paginated lists must cost the same number of queries whatever the page size.
+Endpoint = namedtuple(
+    'Endpoint', 'name method url body status budget paginated ms', defaults=(None, 200, 0, False, None)
+)
+Measurement = namedtuple('Measurement', 'name status queries ms')
+BenchmarkSample = namedtuple('BenchmarkSample', 'batch bag form field submission')
+
+
+def sample_objects():
+    """
+    Picks the objects the endpoints act on: an unfinished batch with bags,
+    one of its bags, the form with the most fields and a linked submission.
+    """
+    batch = (
+        Batch.objects.exclude(status='completed').filter(bag_count__gt=0).order_by('pk').first()
+        or Batch.objects.order_by('pk').first()
+    )
+    bag = Bag.objects.filter(batch=batch).order_by('pk').first() if batch else None
+    form = Form.objects.annotate(field_count=Count('fields')).order_by('-field_count', 'pk').first()
+    submission = (
+        Submission.objects.filter(object_id__isnull=False).order_by('pk').first()
+        or Submission.objects.order_by('pk').first()
+    )
+    if None in (batch, bag, form, submission):
+        return None
+    return BenchmarkSample(batch, bag, form, FormField.objects.filter(form=form).order_by('pk').first(), submission)
+
+
+def batch_body(sample):
+    return {
+        'country': 'Nepal', 'production_type': 'Organic', 'production_date': '2024-01-01T00:00:00Z',
+        'form_gate_sourced': False, 'cluster_group': 'Cluster A', 'quantity': 10, 'uoms': 'kg',
+    }
+
+
+def bag_body(sample, n=0):
+    return {
+        'batch': sample.batch.pk, 'internal_lot_number': f'ILN-BENCH-{n}', 'state': 'new',
+        'qr_code': f'QR-BENCH-{n}', 'external_lot_number': f'ELN-BENCH-{n}',
+        'external_update_date': '2024-01-01T00:00:00Z',
+    }
+
+
+def completion_days(sample):
+    return Bag.objects.filter(batch=sample.batch, status='completed').dates('completed_at', 'day').count()
+
+
+def transition_body(sample):
+    return {'ids': list(Bag.objects.filter(batch=sample.batch).values_list('pk', flat=True)), 'status': 'working'}
+
+
+def form_update_body(sample):
+    """The form as the frontend sends it back: every field renamed but the first, dropped, plus a new one."""
+    fields = FormField.objects.filter(form=sample.form).order_by('pk')
+    return {
+        'name': 'Benchmark form', 'association_type': sample.form.association_type,
+        'fields': [
+            *({'id': f.pk, 'name': f'{f.name}-x', 'field_type': f.field_type, 'required': f.required,
+               'validation_rules': f.validation_rules} for f in fields[1:]),
+            {'name': 'benchmark_field', 'field_type': 'text'},
+        ],
+    }
+
+
+def formfield_body(sample):
+    return {'form': sample.form.pk, 'name': 'benchmark_field', 'field_type': 'text'}
+
+
+def form_body(sample):
+    return {
+        'name': 'Benchmark form', 'association_type': 'standalone',
+        'fields': [{'name': f'field_{i}', 'field_type': 'text'} for i in range(20)],
+    }
+
+
+def submission_body(sample):
+    s = sample.submission
+    return {'form': s.form_id, 'content_type': s.content_type_id, 'object_id': s.object_id, 'data': s.data}
+
+
+def form_cascade_chunks(sample):
+    """DELETE (and at most as many change log INSERT) statements for the form's fields and submissions."""
+    rows = [FormField.objects.filter(form=sample.form).count(), Submission.objects.filter(form=sample.form).count()]
+    return sum(math.ceil(n / 100) for n in rows)
+
+
+def _export(resource):
+    return lambda s: reverse('export', args=[resource, 'csv'])
+
+
+def _detail(name, attr):
+    return lambda s: reverse(name, args=[getattr(s, attr).pk])
+
+
+def _report(name):
+    return lambda s: reverse(f'report-{name}')
+
+
+# Requests are force-authenticated, so authentication costs no queries.
+# Write budgets include the SAVEPOINT/RELEASE pairs around atomic saves and the
+# change log INSERTs (one per changed model, see changes.py).
+ENDPOINTS = [
+    # Batches
+    Endpoint('batch-list', 'get', lambda s: reverse('batch-list'), budget=1, paginated=True),
+    Endpoint('batch-detail', 'get', _detail('batch-detail', 'batch'), budget=1),
+    Endpoint('batch-create', 'post', lambda s: reverse('batch-list'), batch_body, status=201, budget=8),
+    Endpoint('batch-update', 'put', _detail('batch-detail', 'batch'), batch_body, budget=10),
+    Endpoint('batch-partial-update', 'patch', _detail('batch-detail', 'batch'),
+             lambda s: {'quantity': 11}, budget=6),
+    # Constant in the bag count; rollup rows may need creating for the new status and today
+    Endpoint('batch-complete', 'post', _detail('batch-complete', 'batch'), budget=22),
+    Endpoint('batch-submissions', 'get', _detail('batch-submissions', 'batch'), budget=5, paginated=True),
+    # Bags
+    Endpoint('bag-list', 'get', lambda s: reverse('bag-list'), budget=1, paginated=True),
+    Endpoint('bag-detail', 'get', _detail('bag-detail', 'bag'), budget=1),
+    Endpoint('bag-create', 'post', lambda s: reverse('bag-list'), bag_body, status=201, budget=8),
+    Endpoint('bag-update', 'put', _detail('bag-detail', 'bag'), bag_body, budget=7, ms=100),
+    Endpoint('bag-partial-update', 'patch', _detail('bag-detail', 'bag'),
+             lambda s: {'state': 'stored'}, budget=5),
+    Endpoint('bag-by-qr', 'get', lambda s: reverse('bag-by-qr', args=[s.bag.qr_code]), budget=2),
+    Endpoint('bag-by-lot', 'get', lambda s: reverse('bag-by-lot', args=[s.bag.internal_lot_number]),
+             budget=1, paginated=True),
+    Endpoint('bag-bulk', 'post', lambda s: reverse('bag-bulk'),
+             lambda s: [bag_body(s, n) for n in range(50)], status=201, budget=8),
+    # One rollup UPDATE per day the bags had been completed on
+    Endpoint('bag-transition', 'post', lambda s: reverse('bag-transition'), transition_body,
+             budget=lambda s: 10 + completion_days(s)),
+    Endpoint('bag-submissions', 'get', _detail('bag-submissions', 'bag'), budget=5, paginated=True),
+    Endpoint('bag-delete', 'delete', _detail('bag-detail', 'bag'), status=204, budget=6),
+    # Forms
+    Endpoint('form-list', 'get', lambda s: reverse('form-list'), budget=3, paginated=True),
+    # The form's version, then (cold) the form and its fields
+    Endpoint('form-detail', 'get', _detail('form-detail', 'form'), budget=3),
+    Endpoint('form-create', 'post', lambda s: reverse('form-list'), form_body, status=201, budget=7),
+    # Constant in the field count: one DELETE, UPDATE and INSERT for the fields
+    Endpoint('form-update', 'put', _detail('form-detail', 'form'), form_update_body, budget=11, ms=300),
+    Endpoint('form-partial-update', 'patch', _detail('form-detail', 'form'),
+             lambda s: {'name': 'Renamed form'}, budget=6),
+    Endpoint('formfield-list', 'get', lambda s: reverse('formfield-list'), budget=1, paginated=True),
+    Endpoint('formfield-detail', 'get', _detail('formfield-detail', 'field'), budget=1),
+    Endpoint('formfield-create', 'post', lambda s: reverse('formfield-list'), formfield_body,
+             status=201, budget=5, ms=100),
+    Endpoint('formfield-partial-update', 'patch', _detail('formfield-detail', 'field'),
+             lambda s: {'description': 'Benchmark'}, budget=5),
+    Endpoint('formfield-delete', 'delete', _detail('formfield-detail', 'field'), status=204, budget=5, ms=100),
+    # Batches and bags losing the form are logged in bulk; its fields and submissions are
+    # deleted 100 at a time by the collector and logged in bulk (see signals.py)
+    Endpoint('form-delete', 'delete', _detail('form-detail', 'form'), status=204,
+             budget=lambda s: 13 + 2 * form_cascade_chunks(s), ms=500),
+    # Submissions
+    # The page plus one query per linked content type, and the two content
+    # type lookups when the process's ContentType cache is still cold
+    Endpoint('submission-list', 'get', lambda s: reverse('submission-list'), budget=5, paginated=True),
+    Endpoint('submission-detail', 'get', _detail('submission-detail', 'submission'), budget=3),
+    Endpoint('submission-create', 'post', lambda s: reverse('submission-list'), submission_body,
+             status=201, budget=8),
+    Endpoint('submission-update', 'put', _detail('submission-detail', 'submission'), submission_body,
+             budget=10, ms=100),
+    Endpoint('submission-partial-update', 'patch', _detail('submission-detail', 'submission'),
+             submission_body, budget=10),
+    Endpoint('submission-delete', 'delete', _detail('submission-detail', 'submission'), status=204, budget=3),
+    # Reports, exports and the current user
+    Endpoint('report-list', 'get', _report('list'), budget=7),
+    Endpoint('report-batches-by-country', 'get', _report('batches-by-country'), budget=1),
+    Endpoint('report-batches-daily', 'get', _report('batches-daily'), budget=1),
+    Endpoint('report-bags-completed-daily', 'get', _report('bags-completed-daily'), budget=1),
+    Endpoint('report-bags-per-batch', 'get', _report('bags-per-batch'), budget=1),
+    Endpoint('export-batches', 'get', _export('batches'), budget=3),
+    # Streamed exports: the rows, then the field names of the forms they use; time grows with the table
+    Endpoint('export-bags', 'get', _export('bags'), budget=2, ms=lambda s: 100 + Bag.objects.count() / 4),
+    Endpoint('export-submissions', 'get', _export('submissions'), budget=2,
+             ms=lambda s: 100 + Submission.objects.count() / 4),
+    Endpoint('user-info', 'get', lambda s: reverse('user_info'), budget=0),
+    # The async twins (async_views.py)
+    Endpoint('async-batch-list', 'get', lambda s: reverse('async-batch-list'), budget=1, paginated=True, ms=200),
+    Endpoint('async-batch-detail', 'get', _detail('async-batch-detail', 'batch'), budget=1, ms=100),
+    Endpoint('async-bag-list', 'get', lambda s: reverse('async-bag-list'), budget=1, paginated=True, ms=200),
+    Endpoint('async-bag-detail', 'get', _detail('async-bag-detail', 'bag'), budget=1, ms=100),
+    Endpoint('async-bag-by-qr', 'get', lambda s: reverse('async-bag-by-qr', args=[s.bag.qr_code]), budget=2, ms=100),
+    Endpoint('async-bag-by-lot', 'get', lambda s: reverse('async-bag-by-lot', args=[s.bag.internal_lot_number]),
+             budget=1, paginated=True, ms=100),
+    Endpoint('async-user-info', 'get', lambda s: reverse('async-user-info'), budget=0, ms=50),
+    # The log page, then one query per model in it (submissions add their GenericPrefetch,
+    # forms the read of their versions)
+    Endpoint('sync', 'get', lambda s: reverse('sync'), budget=10),
+    # The cascade loads the bags for their receivers, then does their upkeep in bulk:
+    # one rollup UPDATE per completion day and one change log INSERT
+    Endpoint('batch-delete', 'delete', _detail('batch-detail', 'batch'), status=204,
+             budget=lambda s: 7 + s.batch.completed_bag_count),
+]
+
+
+def budget_for(endpoint, sample):
+    return endpoint.budget(sample) if callable(endpoint.budget) else endpoint.budget
+
+
+def ms_budget_for(endpoint, sample):
+    """The endpoint's time budget in milliseconds, or None when it has none."""
+    return endpoint.ms(sample) if callable(endpoint.ms) else endpoint.ms
+
+
+def clear_caches():
+    for cache in caches.all():
+        cache.clear()
+
+
+def measure(client, endpoint, sample, page_size=None, cold=True):
+    """
+    Runs one request and rolls back whatever it wrote, returning its
+    status, query count and wall time in milliseconds.
+    """
+    if cold:
+        clear_caches()
+    url = endpoint.url(sample)
+    if endpoint.paginated and page_size:
+        url = f'{url}?page_size={page_size}'
+    body = endpoint.body(sample) if endpoint.body else None
+    with transaction.atomic():
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            response = getattr(client, endpoint.method)(url, body, format='json')
+            if response.streaming:
+                b''.join(response.streaming_content)
+            elapsed = time.perf_counter() - start
+        transaction.set_rollback(True)
+    return Measurement(endpoint.name, response.status_code, len(ctx.captured_queries), elapsed * 1000)
+
+
+# ---------------------------------------------------------------------
+# ASGI load comparison (see the benchmark_asgi command)
+# ---------------------------------------------------------------------
+# The sync endpoint and its async twin (async_views.py) per read action
+LoadPair = namedtuple('LoadPair', 'name sync async_')
+LoadResult = namedtuple('LoadResult', 'name statuses rps p50_ms p95_ms')
+
+LOAD_PAIRS = [
+    LoadPair('batch-list', lambda s: reverse('batch-list'), lambda s: reverse('async-batch-list')),
+    LoadPair('batch-detail', _detail('batch-detail', 'batch'), _detail('async-batch-detail', 'batch')),
+    LoadPair('bag-list', lambda s: reverse('bag-list'), lambda s: reverse('async-bag-list')),
+    LoadPair('bag-detail', _detail('bag-detail', 'bag'), _detail('async-bag-detail', 'bag')),
+    LoadPair('bag-by-qr', lambda s: reverse('bag-by-qr', args=[s.bag.qr_code]),
+             lambda s: reverse('async-bag-by-qr', args=[s.bag.qr_code])),
+    LoadPair('bag-by-lot', lambda s: reverse('bag-by-lot', args=[s.bag.internal_lot_number]),
+             lambda s: reverse('async-bag-by-lot', args=[s.bag.internal_lot_number])),
+    LoadPair('user-info', lambda s: reverse('user_info'), lambda s: reverse('async-user-info')),
+]
+
+
+async def asgi_get(app, url, headers):
+    """Sends one GET through the ASGI application and returns the status code."""
+    path, _, query = url.partition('?')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': query.encode(),
+        'root_path': '', 'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+        'headers': [(b'host', b'testserver'), *((k.lower().encode(), v.encode()) for k, v in headers.items())],
+    }
+    done = asyncio.Event()
+    status = None
+    received = False
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await done.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+        elif message['type'] == 'http.response.body' and not message.get('more_body'):
+            done.set()
+
+    await app(scope, receive, send)
+    done.set()
+    return status
+
+
+async def load(app, name, url, headers, requests, concurrency):
+    """Runs `requests` GETs of url, `concurrency` at a time."""
+    latencies = []
+    statuses = Counter()
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            statuses[await asgi_get(app, url, headers)] += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return LoadResult(
+        name, dict(statuses), requests / elapsed,
+        latencies[len(latencies) // 2], latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+    )
@@ -0,0 +1,103 @@
+from collections import Counter
+
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import Batch, Bag, ChangeLogEntry
+from .rollups import bag_completion_day, record_bag_completions
+from .serializers import BagBulkSerializer
+
+PREFETCHED_FIELDS = ('batch', 'form')
+
+
+def _prefetch(serializer, rows):
+    """Loads every batch and form referenced by the rows with one query each."""
+    prefetched = {}
+    for name in PREFETCHED_FIELDS:
+        ids = set()
+        for row in rows:
+            value = row.get(name) if isinstance(row, dict) else None
+            if isinstance(value, (int, str)) and not isinstance(value, bool) and str(value).isdigit():
+                ids.add(int(value))
+        prefetched[name] = serializer.fields[name].get_queryset().in_bulk(ids)
+    return prefetched
+
+
+def _reject_duplicate_qr_codes(valid, results):
+    """Rejects rows whose qr_code already exists or repeats within the payload."""
+    codes = [bag.qr_code for _, bag in valid]
+    taken = set(Bag.objects.filter(qr_code__in=codes).values_list('qr_code', flat=True))
+    kept = []
+    for index, bag in valid:
+        if bag.qr_code in taken:
+            results[index] = {'index': index, 'errors': {'qr_code': ['bag with this qr code already exists.']}}
+            continue
+        taken.add(bag.qr_code)
+        kept.append((index, bag))
+    return kept
+
+
+def _insert(bags):
+    """Inserts validated bags and applies the batch counter deltas."""
+    now = timezone.now()
+    for bag in bags:
+        if bag.status == 'completed':
+            bag.completed_at = now
+    Bag.objects.bulk_create(bags)
+    ChangeLogEntry.record(Bag, [bag.pk for bag in bags])
+    for (batch_id, status), count in Counter((b.batch_id, b.status) for b in bags).items():
+        Batch.adjust_bag_counters(batch_id, status, count)
+    # bulk_create sends no signals, so maintain the completion rollup here
+    record_bag_completions(Counter(
+        bag_completion_day({'status': b.status, 'completed_at': b.completed_at}) for b in bags
+    ))
+
+
+def ingest_bags(rows, context, partial=False, chunk_size=500):
+    """
+    Validates and inserts bag rows in one pass.
+
+    In the default mode every row must be valid and all rows are
+    inserted in a single transaction. With partial=True, valid rows are
+    inserted in chunked transactions and invalid rows are skipped.
+    Returns (created_count, results) where results holds one entry per
+    input row with either its bag_id or its errors.
+    """
+    serializer = BagBulkSerializer(context=context)
+    context['prefetched'] = _prefetch(serializer, rows)
+
+    results = [None] * len(rows)
+    valid = []
+    for index, row in enumerate(rows):
+        try:
+            if not isinstance(row, dict):
+                raise serializers.ValidationError({'non_field_errors': ['Expected an object.']})
+            valid.append((index, Bag(**serializer.run_validation(row))))
+        except serializers.ValidationError as exc:
+            results[index] = {'index': index, 'errors': exc.detail}
+
+    valid = _reject_duplicate_qr_codes(valid, results)
+
+    if not partial:
+        if len(valid) != len(rows):
+            return 0, [r for r in results if r is not None]
+        with transaction.atomic():
+            for start in range(0, len(valid), chunk_size):
+                _insert([bag for _, bag in valid[start:start + chunk_size]])
+    else:
+        for start in range(0, len(valid), chunk_size):
+            chunk = valid[start:start + chunk_size]
+            try:
+                with transaction.atomic():
+                    _insert([bag for _, bag in chunk])
+            except DatabaseError as exc:
+                for index, _ in chunk:
+                    results[index] = {'index': index, 'errors': {'non_field_errors': [str(exc)]}}
+
+    created = 0
+    for index, bag in valid:
+        if results[index] is None:
+            results[index] = {'index': index, 'bag_id': bag.pk}
+            created += 1
+    return created, results
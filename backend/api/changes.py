@@ -0,0 +1,184 @@
+"""
+The /api/sync/ change feed for offline clients.
+
+Every write to a synced model appends a ChangeLogEntry in the same
+transaction (signals.py, plus the bulk paths that bypass signals). A
+page of the feed reads the next entries after the cursor by primary
+key, so a call costs O(changes) whatever the table sizes. Each object
+appears once per page, with its current representation (as served by
+its viewset) or as a deletion tombstone.
+
+change_id and changed_at are assigned when an entry is written, not
+when its transaction commits, so an entry with a lower change_id can
+become visible after one with a higher id. The cursor therefore never
+moves past entries younger than SYNC_SETTLE_SECONDS, which must exceed
+the longest write transaction (e.g. a bulk bag upload). Entries in that
+window may be sent again on the next call; applying a change twice is
+harmless.
+
+prune_changes() (the prune_change_log command) drops superseded entries
+and tombstones older than SYNC_RETENTION_DAYS, keeping the latest upsert
+of every live object so a sync without a cursor still sees every row.
+A cursor older than the retention may have missed a pruned tombstone and
+gets 410 Gone: the client drops its copy and syncs again without one.
+"""
+import json
+from base64 import b64decode, b64encode
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound
+
+from .form_cache import get_serialized_forms
+from .models import Batch, Bag, ChangeLogEntry, FormField
+from .serializers import BatchSerializer, BagSerializer, FormFieldSerializer, SubmissionSerializer
+
+INVALID_CURSOR = 'Invalid cursor'
+
+
+class CursorExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = 'Cursor too old; sync again without a cursor.'
+    default_code = 'cursor_expired'
+
+
+def _submissions():
+    from .views import submission_queryset
+    return submission_queryset()
+
+
+# model_name -> (queryset factory, serializer class); forms come from the form cache
+SYNCED = {
+    'batch': (Batch.objects.all, BatchSerializer),
+    'bag': (Bag.objects.all, BagSerializer),
+    'formfield': (FormField.objects.all, FormFieldSerializer),
+    'submission': (_submissions, SubmissionSerializer),
+}
+
+
+def encode_cursor(change_id, changed_at=None):
+    """A cursor after change_id; changed_at (the entry's) lets an expired cursor be detected."""
+    payload = {'c': change_id}
+    if changed_at is not None:
+        payload['t'] = changed_at.timestamp()
+    return b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(encoded):
+    """
+    (change_id, changed_at) of the entry a cursor points after;
+    (0, None), the whole log, without one.
+    """
+    if not encoded:
+        return 0, None
+    try:
+        payload = json.loads(b64decode(encoded.encode('ascii')).decode('utf-8'))
+        change_id, stamp = payload['c'], payload.get('t')
+        changed_at = datetime.fromtimestamp(stamp, dt_timezone.utc) if stamp is not None else None
+    except (TypeError, ValueError, KeyError, AttributeError, OverflowError, UnicodeError):
+        raise NotFound(INVALID_CURSOR)
+    if not isinstance(change_id, int) or change_id < 0:
+        raise NotFound(INVALID_CURSOR)
+    return change_id, changed_at
+
+
+def _retention_cutoff():
+    return timezone.now() - timedelta(days=getattr(settings, 'SYNC_RETENTION_DAYS', 30))
+
+
+def _settle_seconds():
+    return getattr(settings, 'SYNC_SETTLE_SECONDS', 30)
+
+
+def _serialize(model, ids, context):
+    """The current representation of each object that still exists, by pk."""
+    if model == 'form':
+        return get_serialized_forms(ids)
+    queryset, serializer_class = SYNCED[model]
+    objects = queryset().in_bulk(ids)
+    return {pk: serializer_class(obj, context=context).data for pk, obj in objects.items()}
+
+
+def changes_since(cursor, page_size, context):
+    """
+    One page of the feed after the encoded cursor:
+    {'changes': [...], 'cursor': <next cursor>, 'has_more': bool}.
+    has_more is false once the rest of the log has not settled yet.
+    """
+    after, covered_at = decode_cursor(cursor)
+    # Entries after the cursor were written no earlier than about covered_at
+    # (up to one write transaction before it), so none of them can have been pruned
+    if after and (covered_at is None or covered_at < _retention_cutoff() + timedelta(seconds=_settle_seconds())):
+        raise CursorExpired()
+
+    entries = list(ChangeLogEntry.objects.filter(pk__gt=after).order_by('pk')[:page_size + 1])
+    has_more = len(entries) > page_size
+    entries = entries[:page_size]
+
+    # The last entry per object decides where it appears in the page
+    latest = {}
+    for entry in entries:
+        key = (entry.model, entry.object_id)
+        latest.pop(key, None)
+        latest[key] = entry
+
+    wanted = {}
+    for (model, object_id), entry in latest.items():
+        if entry.action == 'upsert':
+            wanted.setdefault(model, []).append(object_id)
+    current = {model: _serialize(model, ids, context) for model, ids in wanted.items()}
+
+    changes = []
+    for (model, object_id), entry in latest.items():
+        data = current.get(model, {}).get(object_id)
+        changes.append({
+            'change_id': entry.pk,
+            'model': model,
+            'id': object_id,
+            # An upsert of a since-deleted object: its tombstone is further on
+            'action': 'upsert' if data is not None else 'delete',
+            'changed_at': entry.changed_at,
+            'data': data,
+        })
+
+    next_id, next_at = after, covered_at
+    settled = timezone.now() - timedelta(seconds=_settle_seconds())
+    for entry in entries:
+        if entry.changed_at > settled:
+            # Full page or not, an earlier id may still commit: wait for it
+            has_more = False
+            break
+        next_id, next_at = entry.pk, entry.changed_at
+    return {'changes': changes, 'cursor': encode_cursor(next_id, next_at), 'has_more': has_more}
+
+
+def prune_changes(chunk_size=10000):
+    """
+    Deletes log entries older than SYNC_RETENTION_DAYS that a later entry
+    for the same object supersedes, then old tombstones, in pk chunks.
+    Returns the number of entries deleted.
+    """
+    cutoff = _retention_cutoff()
+    superseded = ChangeLogEntry.objects.filter(
+        model=OuterRef('model'), object_id=OuterRef('object_id'), pk__gt=OuterRef('pk'),
+    )
+    deleted = 0
+    start = ChangeLogEntry.objects.order_by('pk').values_list('pk', flat=True).first()
+    while start is not None:
+        chunk = ChangeLogEntry.objects.filter(pk__gte=start, pk__lt=start + chunk_size)
+        old = chunk.filter(changed_at__lt=cutoff)
+        with transaction.atomic():
+            # Superseded entries first, so no upsert outlives its object's tombstone
+            deleted += old.filter(Exists(superseded)).delete()[0]
+            deleted += old.filter(action='delete').delete()[0]
+        if chunk.filter(changed_at__gte=cutoff).exists():
+            # Entries are written in time order: the rest are all recent
+            break
+        start = ChangeLogEntry.objects.filter(pk__gte=start + chunk_size).order_by('pk').values_list(
+            'pk', flat=True
+        ).first()
+    return deleted
@@ -0,0 +1,100 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+
+def make_etag(*parts):
+    return '"%s"' % hashlib.md5('|'.join(str(p) for p in parts).encode()).hexdigest()
+
+
+def not_modified(request, etag, last_modified):
+    """A 304 response when the request's If-None-Match / If-Modified-Since match, else None."""
+    return get_conditional_response(
+        request, etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+
+def conditional_response(request, etag, last_modified, build):
+    """
+    Returns 304 Not Modified when the request's If-None-Match /
+    If-Modified-Since match, otherwise build(); both carry the validators.
+    """
+    response = not_modified(request, etag, last_modified)
+    if response is None:
+        response = build()
+    return set_validators(response, etag, last_modified)
+
+
+def _stamps(*values):
+    return [value.timestamp() if value else '' for value in values]
+
+
+def _latest(*values):
+    return max((value for value in values if value is not None), default=None)
+
+
+def list_etag(request, model, objects, linked=lambda obj: (), count=None):
+    """
+    The ETag of a list page: the full query string (filters and cursor),
+    the pk and updated_at of every row on the page plus the updated_at of
+    the objects each row embeds (linked(obj)), and the total when the
+    client asked for one. Only the page is read, so it costs O(page).
+    """
+    return make_etag(
+        model._meta.label, request.get_full_path(), count if count is not None else '',
+        *('%s:%s' % (obj.pk, ':'.join(map(str, _stamps(obj.updated_at, *linked(obj))))) for obj in objects),
+    )
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified support for retrieve() and list(), derived from
+    the model's updated_at column. An unchanged resource is answered with
+    304 Not Modified before anything is serialized.
+
+    A list only carries an ETag, built from the rows of the requested
+    page (see list_etag), so a 304 still reads the page but skips
+    serializing it. Last-Modified is left off lists because a row
+    deleted from the page would not move it.
+
+    Views whose representation embeds other objects fold those objects'
+    updated_at in through linked_modified().
+    """
+
+    def linked_modified(self, instance):
+        """updated_at of the other objects instance's representation embeds."""
+        return ()
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        linked = self.linked_modified(instance)
+        return conditional_response(
+            request, make_etag(instance._meta.label, instance.pk, *_stamps(instance.updated_at, *linked)),
+            _latest(instance.updated_at, *linked), lambda: Response(self.get_serializer(instance).data)
+        )
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        objects = list(queryset) if page is None else page
+        count = getattr(self.paginator, 'count', None) if page is not None else None
+        etag = list_etag(request, queryset.model, objects, self.linked_modified, count)
+
+        def build():
+            if page is None:
+                return Response(self.serialize_list(objects))
+            return self.get_paginated_response(self.serialize_list(page))
+        return conditional_response(request, etag, None, build)
+
+    def serialize_list(self, objects):
+        return self.get_serializer(objects, many=True).data
@@ -0,0 +1,114 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework import serializers
+
+from .models import Batch, Bag, FormField, Submission
+from .reports import report_filters
+
+# resource -> (model, JSON column flattened by the linked form's fields)
+EXPORTS = {
+    'batches': (Batch, 'form_data'),
+    'bags': (Bag, 'form_data'),
+    'submissions': (Submission, 'data'),
+}
+EXPORT_FORMATS = ('csv', 'ndjson')
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    """A file-like object whose write() returns the value, for streaming csv.writer output."""
+
+    def write(self, value):
+        return value
+
+
+def export_queryset(resource, params):
+    """
+    Builds the queryset for an export. Batches and bags accept the report
+    filters (applied to the batch); submissions accept form.
+    """
+    model, _ = EXPORTS[resource]
+    queryset = model.objects.all()
+    if resource == 'submissions':
+        form_id = params.get('form')
+        if form_id:
+            if not str(form_id).isdigit():
+                raise serializers.ValidationError({'form': 'Expected a form id.'})
+            queryset = queryset.filter(form_id=int(form_id))
+        return queryset
+
+    lookups = report_filters(params)
+    if resource == 'bags':
+        lookups = {f'batch__{key}': value for key, value in lookups.items()}
+    return queryset.filter(**lookups)
+
+
+def export_columns(resource, queryset):
+    """
+    Returns (model_columns, form_columns): the concrete model columns and
+    the field names of every Form referenced by the queryset.
+    """
+    model, json_column = EXPORTS[resource]
+    model_columns = [
+        f.attname for f in model._meta.concrete_fields if f.attname != json_column
+    ]
+    form_ids = queryset.order_by().values_list('form_id', flat=True).distinct()
+    form_columns = list(dict.fromkeys(
+        FormField.objects.using(queryset.db).filter(form_id__in=form_ids)
+        .order_by('form_id', 'pk')
+        .values_list('name', flat=True)
+    ))
+    return model_columns, form_columns
+
+
+def iter_rows(resource, queryset):
+    """
+    Yields (header, rows) where rows is a generator of flat dicts. Rows are
+    read through a server-side cursor in chunks, so memory stays constant.
+    """
+    model, json_column = EXPORTS[resource]
+    model_columns, form_columns = export_columns(resource, queryset)
+    header = model_columns + [f'{json_column}.{name}' for name in form_columns]
+
+    def rows():
+        values = queryset.order_by('pk').values_list(*model_columns, json_column)
+        for record in values.iterator(chunk_size=CHUNK_SIZE):
+            row = dict(zip(model_columns, record))
+            payload = record[-1] if isinstance(record[-1], dict) else {}
+            for name in form_columns:
+                row[f'{json_column}.{name}'] = payload.get(name)
+            yield row
+
+    return header, rows()
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, cls=DjangoJSONEncoder)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def stream_csv(header, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([_csv_value(row[column]) for column in header])
+
+
+def stream_ndjson(header, rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+def stream_export(resource, queryset, fmt):
+    """Returns an iterator of text chunks for the export in the given format."""
+    header, rows = iter_rows(resource, queryset)
+    if fmt == 'csv':
+        return stream_csv(header, rows)
+    return stream_ndjson(header, rows)
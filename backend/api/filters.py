@@ -0,0 +1,72 @@
+from datetime import datetime, time
+
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+
+def parse_date_bound(value, upper=False):
+    """
+    Parses an ISO date or datetime query value into an aware datetime.
+    A bare date used as an upper bound covers the whole day.
+    """
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        parsed = datetime.combine(day, time.max if upper else time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def date_range_lookups(params, fields):
+    """
+    Translates `<field>_after` / `<field>_before` query params into
+    inclusive __gte / __lte lookups.
+    """
+    lookups = {}
+    for field in fields:
+        for suffix, lookup in (('after', 'gte'), ('before', 'lte')):
+            param = f'{field}_{suffix}'
+            value = params.get(param)
+            if not value:
+                continue
+            try:
+                lookups[f'{field}__{lookup}'] = parse_date_bound(value, upper=(suffix == 'before'))
+            except ValueError:
+                raise serializers.ValidationError({param: 'Expected an ISO date or datetime.'})
+    return lookups
+
+
+class FieldFilterBackend(BaseFilterBackend):
+    """
+    Exact-match filters on the view's `filter_fields` (comma-separated
+    values match any of them) and date ranges on `date_filter_fields`.
+    """
+
+    def get_lookups(self, request, queryset, view):
+        opts = queryset.model._meta
+        lookups = {}
+        for name in getattr(view, 'filter_fields', ()):
+            raw = request.query_params.get(name)
+            if not raw:
+                continue
+            field = opts.get_field(name)
+            try:
+                values = [field.to_python(v) for v in raw.split(',') if v]
+            except ValidationError:
+                raise serializers.ValidationError({name: f"Invalid value '{raw}'."})
+            if len(values) == 1:
+                lookups[name] = values[0]
+            elif values:
+                lookups[f'{name}__in'] = values
+        lookups.update(date_range_lookups(request.query_params, getattr(view, 'date_filter_fields', ())))
+        return lookups
+
+    def filter_queryset(self, request, queryset, view):
+        lookups = self.get_lookups(request, queryset, view)
+        return queryset.filter(**lookups) if lookups else queryset
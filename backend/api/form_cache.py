@@ -0,0 +1,83 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Prefetch
+
+from config.metrics import record_cache_many
+
+from .models import Form, FormField
+
+
+def form_cache():
+    """The cache holding serialized forms."""
+    return caches['forms' if 'forms' in settings.CACHES else 'default']
+
+
+# ---------------------------------------------------------------------
+# VERSIONS
+# ---------------------------------------------------------------------
+# Every cached artefact of a form (its serialized payload here, its
+# compiled validator in validation.py) is keyed by the form's updated_at,
+# which moves whenever the form or one of its fields is written (see
+# signals.py). The version is read from the database, so a write in any
+# process is seen by every other one, whatever the cache backend.
+def form_version(form):
+    """The version of a Form instance (as loaded) or id; None if it does not exist."""
+    if isinstance(form, Form):
+        return form.updated_at.isoformat()
+    return form_versions([form]).get(form)
+
+
+def form_versions(form_ids):
+    """Current versions of the forms that exist, with one query."""
+    return {
+        pk: updated_at.isoformat()
+        for pk, updated_at in Form.objects.filter(pk__in=form_ids).values_list('pk', 'updated_at')
+    }
+
+
+# ---------------------------------------------------------------------
+# SERIALIZED FORMS
+# ---------------------------------------------------------------------
+def _payload_key(form_id, version):
+    return f'form:{form_id}:{version}'
+
+
+def _serialize(form_ids):
+    from .serializers import FormSerializer
+
+    forms = Form.objects.filter(pk__in=form_ids).prefetch_related(
+        Prefetch('fields', queryset=FormField.objects.order_by('pk'))
+    )
+    return {form.pk: FormSerializer(form).data for form in forms}
+
+
+def get_serialized_forms(form_ids, versions=None):
+    """
+    Returns {form_id: FormSerializer data} for the given ids, serving
+    unchanged forms from the cache and loading the rest with one query
+    for the forms and one for their fields. Missing forms are omitted.
+    Callers that already hold the forms pass their versions to skip
+    reading them.
+    """
+    cache = form_cache()
+    if versions is None:
+        versions = form_versions(form_ids)
+    keys = {pk: _payload_key(pk, version) for pk, version in versions.items()}
+    found = cache.get_many(keys.values())
+    result = {pk: found[key] for pk, key in keys.items() if key in found}
+
+    missing = [pk for pk in keys if pk not in result]
+    record_cache_many('forms', len(result), len(missing))
+    if missing:
+        loaded = {pk: dict(data) for pk, data in _serialize(missing).items()}
+        cache.set_many(
+            {keys[pk]: data for pk, data in loaded.items()},
+            getattr(settings, 'FORM_CACHE_TIMEOUT', 3600)
+        )
+        result.update(loaded)
+    return result
+
+
+def get_serialized_form(form_id, version=None):
+    """The cached FormSerializer data for one form, or None if it does not exist."""
+    return get_serialized_forms([form_id], None if version is None else {form_id: version}).get(form_id)
@@ -1,9 +1,8 @@
 from django import forms
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
-import re
-from datetime import datetime
 from .models import Submission, Form, FormField, Batch, Bag
+from .validation import validate_form_data
 
 
 def _clean_form_data(form_instance, submitted_data):
@@ -13,76 +12,14 @@ def _clean_form_data(form_instance, submitted_data):
     if not form_instance:
         return submitted_data
 
-    form_field_names = {field.name for field in form_instance.fields.all()}
-    submitted_data_keys = set(submitted_data.keys())
-    extra_fields = submitted_data_keys - form_field_names
-
-    if extra_fields:
-        raise ValidationError(f"Unexpected fields in form data: {', '.join(extra_fields)}.")
-
-    for field in form_instance.fields.all():
-        field_name = field.name
-        field_value = submitted_data.get(field_name)
-
-        if field.required and field_value is None:
-            raise ValidationError(f"Field '{field_name}' is required.")
-
-        if field_value is not None:
-            if field.field_type == 'number':
-                try:
-                    float(field_value)
-                except ValueError:
-                    raise ValidationError(f"Field '{field_name}' must be a number.")
-            elif field.field_type == 'date':
-                try:
-                    datetime.strptime(field_value, '%Y-%m-%d')
-                except ValueError:
-                    raise ValidationError(f"Field '{field_name}' must be a valid date (YYYY-MM-DD).")
-            elif field.field_type == 'boolean':
-                if not isinstance(field_value, bool):
-                    raise ValidationError(f"Field '{field_name}' must be a boolean.")
-            elif field.field_type == 'email':
-                from django.core.validators import validate_email
-                try:
-                    validate_email(field_value)
-                except ValidationError:
-                    raise ValidationError(f"Field '{field.name}' must be a valid email address.")
-            elif field.field_type == 'url':
-                from django.core.validators import URLValidator
-                validate = URLValidator()
-                try:
-                    validate(field_value)
-                except ValidationError:
-                    raise ValidationError(f"Field '{field.name}' must be a valid URL.")
-
-            if field.validation_rules:
-                rules = field.validation_rules
-                if field.field_type == 'text':
-                    if 'min_length' in rules and len(field_value) < rules['min_length']:
-                        raise ValidationError(f"Field '{field_name}' must be at least {rules['min_length']} characters long.")
-                    if 'max_length' in rules and len(field_value) > rules['max_length']:
-                        raise ValidationError(f"Field '{field_name}' exceeds maximum length of {rules['max_length']}.")
-                    if 'regex' in rules and not re.match(rules['regex'], field_value):
-                        raise ValidationError(f"Field '{field_name}' does not match the required pattern.")
-                elif field.field_type == 'number':
-                    if 'min_value' in rules and field_value < rules['min_value']:
-                        raise ValidationError(f"Field '{field_name}' must be at least {rules['min_value']}.")
-                    if 'max_value' in rules and field_value > rules['max_value']:
-                        raise ValidationError(f"Field '{field_name}' cannot exceed {rules['max_value']}.")
-
-            if field.field_type in ('select', 'radio'):
-                choices = (field.validation_rules or {}).get('choices', [])
-                if choices and field_value not in choices:
-                    raise ValidationError(f"Field '{field_name}' must be one of: {', '.join(choices)}.")
-            elif field.field_type == 'checkbox':
-                choices = (field.validation_rules or {}).get('choices', [])
-                if choices:
-                    selected = field_value if isinstance(field_value, list) else str(field_value).split(',')
-                    selected = [str(v).strip() for v in selected if str(v).strip()]
-                    invalid = [v for v in selected if v not in choices]
-                    if invalid:
-                        raise ValidationError(f"Field '{field_name}' has invalid choices: {', '.join(invalid)}.")
-    return submitted_data
+    try:
+        return validate_form_data(form_instance, submitted_data)
+    except ValidationError as e:
+        raise ValidationError([
+            f"Field '{name}': {message}"
+            for name, messages in e.message_dict.items()
+            for message in messages
+        ])
 
 
 class SubmissionAdminForm(forms.ModelForm):
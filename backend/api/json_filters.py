@@ -0,0 +1,112 @@
+from functools import reduce
+from operator import or_
+
+from django.db import connections
+from django.db.models import Q
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+from .validation import get_validator, json_number
+
+RANGE_OPERATORS = ('lt', 'lte', 'gt', 'gte')
+
+# field_type -> operators accepted in ?<column>__<field>__<operator>=
+OPERATORS = {
+    'number': ('exact', 'in', 'isnull') + RANGE_OPERATORS,
+    'date': ('exact', 'in', 'isnull') + RANGE_OPERATORS,
+    'text': ('exact', 'in', 'icontains', 'isnull'),
+    'email': ('exact', 'in', 'icontains', 'isnull'),
+    'url': ('exact', 'in', 'icontains', 'isnull'),
+    'select': ('exact', 'in', 'isnull'),
+    'radio': ('exact', 'in', 'isnull'),
+    'boolean': ('exact', 'isnull'),
+    'checkbox': ('contains', 'isnull'),
+}
+
+
+def _coerce(rule, raw):
+    """Converts a query string value to the JSON type stored for the field."""
+    if rule.field_type == 'number':
+        # The form stored on write (see FieldRule.clean)
+        return json_number(raw)
+    if rule.field_type == 'boolean':
+        if raw.lower() not in ('true', 'false'):
+            raise ValueError(raw)
+        return raw.lower() == 'true'
+    if rule.field_type == 'date':
+        rule.coerce(raw)
+    return raw
+
+
+def json_filter_q(params, form, column, using='default'):
+    """
+    Translates `?<column>__<field>[__<op>]=value` params into a Q object,
+    validating field names, operators and values against the form.
+    Exact matches use JSON containment where the database supports it,
+    so a GIN index on the column can serve them.
+    """
+    prefix = f'{column}__'
+    keys = [key for key in params if key.startswith(prefix)]
+    if not keys:
+        return None
+    if form is None:
+        raise serializers.ValidationError({'form': f'A form is required to filter on {column}.'})
+
+    rules = get_validator(form).rules
+    supports_contains = connections[using].features.supports_json_field_contains
+    q = Q()
+    for key in keys:
+        name, _, op = key[len(prefix):].partition('__')
+        op = op or 'exact'
+        rule = rules.get(name)
+        if rule is None:
+            raise serializers.ValidationError({key: f"Unknown field '{name}' for this form."})
+        if op not in OPERATORS.get(rule.field_type, ()):
+            raise serializers.ValidationError({key: f"Operator '{op}' is not supported for {rule.field_type} fields."})
+
+        raw = params.get(key)
+        try:
+            if op == 'isnull':
+                if raw.lower() not in ('true', 'false'):
+                    raise ValueError(raw)
+                q &= Q(**{f'{column}__{name}__isnull': raw.lower() == 'true'})
+            elif op == 'in':
+                values = [_coerce(rule, v) for v in raw.split(',') if v]
+                if supports_contains:
+                    q &= reduce(or_, (Q(**{f'{column}__contains': {name: v}}) for v in values), Q(pk__in=[]))
+                else:
+                    q &= Q(**{f'{column}__{name}__in': values})
+            elif op == 'contains':
+                if not supports_contains:
+                    raise serializers.ValidationError({key: 'This database cannot filter on checkbox values.'})
+                q &= Q(**{f'{column}__contains': {name: [raw]}})
+            elif op == 'exact':
+                value = _coerce(rule, raw)
+                if supports_contains:
+                    q &= Q(**{f'{column}__contains': {name: value}})
+                else:
+                    q &= Q(**{f'{column}__{name}': value})
+            else:
+                q &= Q(**{f'{column}__{name}__{op}': _coerce(rule, raw)})
+        except (TypeError, ValueError):
+            raise serializers.ValidationError({key: f"Invalid value '{raw}' for {rule.field_type} field '{name}'."})
+    return q
+
+
+class FormDataFilterBackend(BaseFilterBackend):
+    """
+    Filters on the view's `json_filter_field` (form_data or data) using
+    the linked form's field definitions; requires ?form=<id>.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        column = getattr(view, 'json_filter_field', None)
+        if not column:
+            return queryset
+        form = request.query_params.get('form')
+        if form is not None and not form.isdigit():
+            form = None
+        q = json_filter_q(request.query_params, int(form) if form else None, column, queryset.db)
+        if q is None:
+            return queryset
+        return queryset.filter(q, form_id=int(form))
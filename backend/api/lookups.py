@@ -0,0 +1,104 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from config.metrics import record_cache
+
+from .models import Batch, Bag
+
+LOOKUP_CACHE_ALIAS = 'lookups'
+BATCH_SUMMARY_FIELDS = ('batch_id', 'batch', 'status', 'country', 'production_type', 'cluster_group', 'completed_at')
+
+
+def lookup_cache():
+    """
+    The short-TTL cache used for scan lookups, or the default cache. Writes
+    drop their entries from it; unless it is a shared backend other workers
+    see them once their copies expire (LOOKUP_CACHE_TIMEOUT).
+    """
+    alias = LOOKUP_CACHE_ALIAS if LOOKUP_CACHE_ALIAS in settings.CACHES else 'default'
+    return caches[alias]
+
+
+def _qr_key(code):
+    return 'qr:' + hashlib.md5(code.encode('utf-8')).hexdigest()
+
+
+def _batch_key(batch_id):
+    return f'batch-summary:{batch_id}'
+
+
+def batch_summary(batch_id):
+    cache = lookup_cache()
+    summary = cache.get(_batch_key(batch_id))
+    record_cache('batch-summary', summary is not None)
+    if summary is None:
+        summary = Batch.objects.filter(pk=batch_id).values(*BATCH_SUMMARY_FIELDS).first()
+        if summary is not None:
+            cache.set(_batch_key(batch_id), summary)
+    return summary
+
+
+def bag_by_qr(code, serialize):
+    """
+    Returns the serialized bag for a QR code with its batch summary, or
+    None. Bag and batch entries are cached separately so each is dropped
+    by its own writes (see lookup_cache() for other workers); misses are
+    not cached.
+    """
+    cache = lookup_cache()
+    data = cache.get(_qr_key(code))
+    record_cache('qr', data is not None)
+    if data is None:
+        bag = Bag.objects.filter(qr_code=code).first()
+        if bag is None:
+            return None
+        data = serialize(bag)
+        cache.set(_qr_key(code), data)
+    return {**data, 'batch_summary': batch_summary(data['batch'])}
+
+
+async def abatch_summary(batch_id):
+    cache = lookup_cache()
+    summary = await cache.aget(_batch_key(batch_id))
+    record_cache('batch-summary', summary is not None)
+    if summary is None:
+        summary = await Batch.objects.filter(pk=batch_id).values(*BATCH_SUMMARY_FIELDS).afirst()
+        if summary is not None:
+            await cache.aset(_batch_key(batch_id), summary)
+    return summary
+
+
+async def abag_by_qr(code, serialize):
+    """bag_by_qr for async views; serialize must not touch the database."""
+    cache = lookup_cache()
+    data = await cache.aget(_qr_key(code))
+    record_cache('qr', data is not None)
+    if data is None:
+        bag = await Bag.objects.filter(qr_code=code).afirst()
+        if bag is None:
+            return None
+        data = serialize(bag)
+        await cache.aset(_qr_key(code), data)
+    return {**data, 'batch_summary': await abatch_summary(data['batch'])}
+
+
+def _invalidate(keys):
+    """
+    Drops keys now and again on commit: a read between the write and its
+    commit can re-cache the old row, and a rollback keeps the old row.
+    """
+    def drop():
+        lookup_cache().delete_many(keys)
+    drop()
+    transaction.on_commit(drop)
+
+
+def invalidate_bag(*codes):
+    _invalidate([_qr_key(code) for code in codes if code])
+
+
+def invalidate_batch(batch_id):
+    _invalidate([_batch_key(batch_id)])
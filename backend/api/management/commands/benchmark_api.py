@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from api.benchmarks import ENDPOINTS, budget_for, measure, ms_budget_for, sample_objects
+
+
+class Command(BaseCommand):
+    help = (
+        'Times every API action against the current database and checks its query and time budgets. '
+        'Writes are rolled back. Seed a database first with seed_data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per action; the best time is reported.')
+        parser.add_argument('--page-size', type=int, default=50, help='page_size for list actions (default 50).')
+        parser.add_argument('--warm', action='store_true', help='Keep caches between runs instead of clearing them.')
+        parser.add_argument('--only', help='Comma-separated endpoint names to run.')
+        parser.add_argument('--user', help='Username to authenticate as; defaults to the first superuser.')
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(username=options['user']) if options['user'] else \
+            User.objects.filter(is_superuser=True).order_by('pk')
+        user = users.first()
+        if user is None:
+            raise CommandError('No user to authenticate as; pass --user or create a superuser.')
+        sample = sample_objects()
+        if sample is None:
+            raise CommandError('The database needs batches, bags, forms and submissions; run seed_data first.')
+
+        endpoints = ENDPOINTS
+        if options['only']:
+            names = set(options['only'].split(','))
+            endpoints = [e for e in ENDPOINTS if e.name in names]
+
+        client = APIClient()
+        client.force_authenticate(user)
+        # The test client sends Host: testserver
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            failures = self.run_endpoints(client, endpoints, sample, options)
+        if failures:
+            raise CommandError(f"Over budget or unexpected status: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS(f'{len(endpoints)} action(s) within their query and time budgets.'))
+
+    def run_endpoints(self, client, endpoints, sample, options):
+        self.stdout.write(
+            f"{'action':<28} {'status':>6} {'queries':>8} {'budget':>7} {'best ms':>9} {'mean ms':>9} {'max ms':>9}"
+        )
+        failures = []
+        for endpoint in endpoints:
+            runs = [
+                measure(client, endpoint, sample, options['page_size'], cold=not options['warm'])
+                for _ in range(options['repeat'])
+            ]
+            first = runs[0]
+            timings = [run.ms for run in runs]
+            budget = budget_for(endpoint, sample)
+            ms_budget = ms_budget_for(endpoint, sample)
+            line = (
+                f'{endpoint.name:<28} {first.status:>6} {first.queries:>8} {budget:>7} '
+                f'{min(timings):>9.2f} {sum(timings) / len(timings):>9.2f} '
+                f"{'-' if ms_budget is None else f'{ms_budget:.0f}':>9}"
+            )
+            too_slow = ms_budget is not None and min(timings) > ms_budget
+            if first.status != endpoint.status or first.queries > budget or too_slow:
+                failures.append(endpoint.name)
+                line = self.style.ERROR(line)
+            self.stdout.write(line)
+        return failures
@@ -0,0 +1,56 @@
+import asyncio
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.benchmarks import LOAD_PAIRS, load, sample_objects
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the sync read endpoints with their async (/api/async/) versions under concurrent '
+        'load, sending requests through the ASGI application in this process. Seed a database first '
+        'with seed_data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint (default 200).')
+        parser.add_argument('--concurrency', type=int, default=20, help='Requests in flight (default 20).')
+        parser.add_argument('--only', help='Comma-separated endpoint names to run.')
+        parser.add_argument('--user', help='Username to authenticate as; defaults to the first superuser.')
+
+    def handle(self, *args, **options):
+        from config.asgi import application
+
+        users = User.objects.filter(username=options['user']) if options['user'] else \
+            User.objects.filter(is_superuser=True).order_by('pk')
+        user = users.first()
+        if user is None:
+            raise CommandError('No user to authenticate as; pass --user or create a superuser.')
+        sample = sample_objects()
+        if sample is None:
+            raise CommandError('The database needs batches, bags, forms and submissions; run seed_data first.')
+
+        pairs = LOAD_PAIRS
+        if options['only']:
+            names = set(options['only'].split(','))
+            pairs = [pair for pair in LOAD_PAIRS if pair.name in names]
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+
+        self.stdout.write(
+            f"{'endpoint':<14} {'mode':<6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8}  statuses"
+        )
+        # Slow-request logging would swamp the report
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'], SLOW_REQUEST_MS=None):
+            for pair in pairs:
+                for mode, url in (('sync', pair.sync(sample)), ('async', pair.async_(sample))):
+                    result = asyncio.run(
+                        load(application, pair.name, url, headers, options['requests'], options['concurrency'])
+                    )
+                    self.stdout.write(
+                        f'{pair.name:<14} {mode:<6} {result.rps:>8.1f} {result.p50_ms:>8.2f} '
+                        f'{result.p95_ms:>8.2f}  {result.statuses}'
+                    )
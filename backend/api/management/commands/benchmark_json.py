@@ -0,0 +1,67 @@
+import io
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.models import Batch, Submission
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer, orjson
+from api.serializers import BatchSerializer, SubmissionSerializer
+
+
+def sample_pages(rows):
+    """Serialized batch and submission list pages built from unsaved instances."""
+    now = timezone.now()
+    form_data = {'grade': 'A', 'moisture': 11.5, 'notes': 'Sun dried, sorted twice', 'tags': ['organic', 'export']}
+    batches = [
+        Batch(
+            batch_id=i, batch=f'BTCH-{i:04d}', created_at=now, updated_at=now, country='Nepal',
+            production_type='Organic', production_date=now, cluster_group='Cluster A',
+            quantity=100 + i, uoms='kg', status='working', form_data=form_data, bag_count=i % 40,
+        )
+        for i in range(1, rows + 1)
+    ]
+    submissions = [
+        Submission(submission_id=i, form_id=1, data=form_data, created_at=now, updated_at=now)
+        for i in range(1, rows + 1)
+    ]
+    return {
+        'batches': {'next': None, 'previous': None, 'results': BatchSerializer(batches, many=True).data},
+        'submissions': {'next': None, 'previous': None, 'results': SubmissionSerializer(submissions, many=True).data},
+    }
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+class Command(BaseCommand):
+    help = 'Compares the standard and orjson-backed JSON renderer/parser on batch and submission list pages.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=500, help='Rows per list page (default 500).')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per measurement; the best is reported.')
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed; FastJSON* use the standard library.'))
+
+        columns = ('render std', 'render fast', 'parse std', 'parse fast')
+        self.stdout.write(f"{'list':<12} {'bytes':>9} " + ' '.join(f'{c:>12}' for c in columns) + '  (best ms)')
+        for name, page in sample_pages(options['rows']).items():
+            body = JSONRenderer().render(page)
+            results = [
+                best_of(options['repeat'], lambda: JSONRenderer().render(page)),
+                best_of(options['repeat'], lambda: FastJSONRenderer().render(page)),
+                best_of(options['repeat'], lambda: JSONParser().parse(io.BytesIO(body))),
+                best_of(options['repeat'], lambda: FastJSONParser().parse(io.BytesIO(body))),
+            ]
+            self.stdout.write(f'{name:<12} {len(body):>9} ' + ' '.join(f'{ms:>12.2f}' for ms in results))
@@ -0,0 +1,73 @@
+import hashlib
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api.models import Bag, Batch, FormField, Submission
+
+# Range lookups (?data__moisture__lt=) cannot use the GIN index, so the
+# fields they apply to get a btree expression index per form.
+RANGE_TYPES = ('number', 'date')
+COLUMNS = {
+    'batch': (Batch, 'form_data'),
+    'bag': (Bag, 'form_data'),
+}
+
+
+def index_statements(fields):
+    """Yields (name, create_sql, drop_sql) for each (form_id, association_type, field_name)."""
+    quote = connection.ops.quote_name
+    for form_id, association_type, name in fields:
+        targets = [(Submission, 'data')]
+        if association_type in COLUMNS:
+            targets.append(COLUMNS[association_type])
+        for model, column in targets:
+            table = model._meta.db_table
+            digest = hashlib.md5(name.encode()).hexdigest()[:8]
+            index = f'{model._meta.model_name}_f{form_id}_{digest}_idx'
+            key = name.replace("'", "''")
+            create = (
+                f'CREATE INDEX IF NOT EXISTS {quote(index)} ON {quote(table)} '
+                f"(({quote(column)} -> '{key}')) WHERE {quote('form_id')} = {int(form_id)}"
+            )
+            yield index, create, f'DROP INDEX IF EXISTS {quote(index)}'
+
+
+class Command(BaseCommand):
+    help = (
+        'Creates partial expression indexes on form data for number and date '
+        'fields, so range filters such as ?data__moisture__lt=12 can use an index.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--form', type=int, action='append', help='Only index fields of this form id (repeatable).')
+        parser.add_argument('--field', action='append', help='Only index this field name (repeatable); any field type.')
+        parser.add_argument('--drop', action='store_true', help='Drop the indexes instead of creating them.')
+        parser.add_argument('--dry-run', action='store_true', help='Print the SQL without executing it.')
+
+    def handle(self, *args, **options):
+        fields = FormField.objects.all()
+        if options['form']:
+            fields = fields.filter(form_id__in=options['form'])
+        if options['field']:
+            fields = fields.filter(name__in=options['field'])
+        else:
+            fields = fields.filter(field_type__in=RANGE_TYPES)
+        rows = fields.order_by('form_id', 'pk').values_list('form_id', 'form__association_type', 'name')
+
+        if not options['dry_run'] and connection.vendor != 'postgresql':
+            raise CommandError('JSON expression indexes are only supported on PostgreSQL; use --dry-run to see the SQL.')
+
+        count = 0
+        for index, create, drop in index_statements(rows):
+            sql = drop if options['drop'] else create
+            if options['dry_run']:
+                self.stdout.write(sql + ';')
+            else:
+                with connection.cursor() as cursor:
+                    cursor.execute(sql)
+            count += 1
+
+        action = 'Dropped' if options['drop'] else 'Created'
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'{action} {count} JSON index(es).'))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework import serializers
+
+from api.exports import EXPORTS, EXPORT_FORMATS, export_queryset, stream_export
+from api.reports import REPORT_DATE_FILTERS, REPORT_FILTERS
+
+
+class Command(BaseCommand):
+    help = 'Streams batches, bags or submissions to a CSV or NDJSON file with constant memory.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('resource', choices=sorted(EXPORTS))
+        parser.add_argument('--format', dest='fmt', choices=EXPORT_FORMATS, default='csv')
+        parser.add_argument('--output', '-o', help='File to write to; defaults to stdout.')
+        parser.add_argument('--form', help='Only export submissions for this form id.')
+        for name in REPORT_FILTERS:
+            parser.add_argument(f'--{name.replace("_", "-")}', dest=name)
+        for field in REPORT_DATE_FILTERS:
+            for suffix in ('after', 'before'):
+                parser.add_argument(f'--{field.replace("_", "-")}-{suffix}', dest=f'{field}_{suffix}')
+
+    def handle(self, *args, **options):
+        params = {key: value for key, value in options.items() if isinstance(value, str)}
+        try:
+            queryset = export_queryset(options['resource'], params)
+        except serializers.ValidationError as exc:
+            raise CommandError(exc.detail)
+
+        chunks = stream_export(options['resource'], queryset, options['fmt'])
+        if not options['output']:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+        with open(options['output'], 'w', newline='', encoding='utf-8') as out:
+            for chunk in chunks:
+                out.write(chunk)
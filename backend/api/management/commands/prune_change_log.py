@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.changes import prune_changes
+
+
+class Command(BaseCommand):
+    help = (
+        'Deletes /api/sync/ change log entries older than SYNC_RETENTION_DAYS that are superseded '
+        'or are tombstones, keeping the latest entry of every live object.'
+    )
+
+    def handle(self, *args, **options):
+        deleted = prune_changes()
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} change log entr{"y" if deleted == 1 else "ies"} older than '
+            f'{settings.SYNC_RETENTION_DAYS} day(s).'
+        ))
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from api.models import Batch
+
+COUNTERS = {
+    'bag_count': Q(),
+    'draft_bag_count': Q(bag__status='draft'),
+    'working_bag_count': Q(bag__status='working'),
+    'completed_bag_count': Q(bag__status='completed'),
+}
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the denormalized per-batch bag counters from the Bag table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='Only report batches whose counters are out of sync; exit non-zero if any are found.',
+        )
+
+    def handle(self, *args, **options):
+        actual = {f'actual_{name}': Count('bag', filter=condition) for name, condition in COUNTERS.items()}
+        drifted = Q()
+        for name in COUNTERS:
+            drifted |= ~Q(**{name: F(f'actual_{name}')})
+        mismatched = (
+            Batch.objects.annotate(**actual)
+            .filter(drifted)
+            .values('pk', *COUNTERS, *actual)
+            .order_by('pk')
+        )
+
+        fixed = 0
+        with transaction.atomic():
+            for row in list(mismatched):
+                stored = ', '.join(f'{name}={row[name]}' for name in COUNTERS)
+                expected = {name: row[f'actual_{name}'] for name in COUNTERS}
+                self.stdout.write(
+                    f"Batch {row['pk']}: stored {stored}; actual "
+                    + ', '.join(f'{name}={value}' for name, value in expected.items())
+                )
+                if not options['verify']:
+                    Batch.objects.filter(pk=row['pk']).update(**expected)
+                fixed += 1
+
+        if options['verify']:
+            if fixed:
+                raise CommandError(f'{fixed} batch(es) have out-of-sync bag counters.')
+            self.stdout.write(self.style.SUCCESS('All batch bag counters are in sync.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt bag counters for {fixed} batch(es).'))
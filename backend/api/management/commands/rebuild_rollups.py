@@ -0,0 +1,83 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+from api.models import Bag, BagDailyRollup, Batch, BatchDailyRollup
+from api.rollups import BATCH_DIMENSIONS
+
+
+def actual_rollups():
+    """The rollup rows computed from the Batch and Bag tables, keyed like the stored ones."""
+    batches = (
+        Batch.objects.values(*BATCH_DIMENSIONS, day=TruncDate('production_date'))
+        .annotate(batch_count=Count('batch_id'), quantity=Sum('quantity'))
+        .order_by()
+    )
+    bags = (
+        Bag.objects.filter(status='completed', completed_at__isnull=False)
+        .values(day=TruncDate('completed_at'))
+        .annotate(completed_count=Count('bag_id'))
+        .order_by()
+    )
+    return (
+        {(row['day'], *(row[name] for name in BATCH_DIMENSIONS)): (row['batch_count'], row['quantity'])
+         for row in batches},
+        {row['day']: row['completed_count'] for row in bags},
+    )
+
+
+def stored_rollups():
+    batches = BatchDailyRollup.objects.exclude(batch_count=0, quantity=0).values_list(
+        'day', *BATCH_DIMENSIONS, 'batch_count', 'quantity'
+    )
+    bags = BagDailyRollup.objects.exclude(completed_count=0).values_list('day', 'completed_count')
+    return {row[:-2]: row[-2:] for row in batches}, dict(bags)
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the daily batch and bag completion rollups from the Batch and Bag tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='Only report rollup rows that are out of sync; exit non-zero if any are found.',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            batches, bags = actual_rollups()
+            stored_batches, stored_bags = stored_rollups()
+
+            drifted = 0
+            for key in sorted(batches.keys() | stored_batches.keys(), key=str):
+                if batches.get(key) != stored_batches.get(key):
+                    self.stdout.write(
+                        f'Batch rollup {key}: stored {stored_batches.get(key)}; actual {batches.get(key)}'
+                    )
+                    drifted += 1
+            for day in sorted(bags.keys() | stored_bags.keys()):
+                if bags.get(day) != stored_bags.get(day):
+                    self.stdout.write(f'Bag rollup {day}: stored {stored_bags.get(day)}; actual {bags.get(day)}')
+                    drifted += 1
+
+            if options['verify']:
+                if drifted:
+                    raise CommandError(f'{drifted} rollup row(s) are out of sync.')
+                self.stdout.write(self.style.SUCCESS('All rollups are in sync.'))
+                return
+
+            BatchDailyRollup.objects.all().delete()
+            BagDailyRollup.objects.all().delete()
+            BatchDailyRollup.objects.bulk_create(
+                BatchDailyRollup(
+                    day=key[0], **dict(zip(BATCH_DIMENSIONS, key[1:])), batch_count=count, quantity=quantity
+                )
+                for key, (count, quantity) in batches.items()
+            )
+            BagDailyRollup.objects.bulk_create(
+                BagDailyRollup(day=day, completed_count=count) for day, count in bags.items()
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {len(batches)} batch and {len(bags)} bag rollup row(s); {drifted} had drifted.'
+        ))
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.seed import Seeder
+
+
+class Command(BaseCommand):
+    help = 'Fills the database with generated forms, batches, bags and submissions for benchmarking.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batches', type=int, default=1000, help='Batches to create (default 1000).')
+        parser.add_argument('--bags', type=int, default=20, help='Mean bags per batch (default 20).')
+        parser.add_argument('--forms', type=int, default=10, help='Forms to create (default 10).')
+        parser.add_argument('--fields', type=int, default=25, help='Mean fields per form (default 25).')
+        parser.add_argument('--submissions', type=int, default=50000, help='Submissions to create (default 50000).')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed gives the same data.')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows per INSERT (default 2000).')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        counts = Seeder(seed=options['seed'], chunk_size=options['chunk_size']).seed(
+            batches=options['batches'], bags_per_batch=options['bags'], forms=options['forms'],
+            fields_per_form=options['fields'], submissions=options['submissions'],
+        )
+        summary = ', '.join(f'{count} {name}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Created {summary} in {time.perf_counter() - start:.1f}s.'))
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.6 on 2026-10-17 06:53
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_bag_counters(apps, schema_editor):
+    Batch = apps.get_model('api', 'Batch')
+    Bag = apps.get_model('api', 'Bag')
+    counters = {
+        'bag_count': Q(),
+        'draft_bag_count': Q(status='draft'),
+        'working_bag_count': Q(status='working'),
+        'completed_bag_count': Q(status='completed'),
+    }
+    for column, condition in counters.items():
+        counted = (
+            Bag.objects.filter(condition, batch=OuterRef('pk'))
+            .order_by().values('batch').annotate(n=Count('pk')).values('n')
+        )
+        Batch.objects.update(**{column: Coalesce(Subquery(counted), Value(0), output_field=IntegerField())})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_rename_cluser_group_batch_cluster_group'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='batch',
+            name='bag_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='batch',
+            name='completed_bag_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='batch',
+            name='draft_bag_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='batch',
+            name='working_bag_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_bag_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-17 06:59
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_batch_bag_counters'),
+    ]
+
+    # Converting a stored column to a generated one is not supported by
+    # AlterField, so the column is dropped and re-added. Existing rows get
+    # the generated BTCH-0001 style code.
+    operations = [
+        migrations.RemoveField(
+            model_name='batch',
+            name='batch',
+        ),
+        migrations.AddField(
+            model_name='batch',
+            name='batch',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(batch_id__lt=10, then=django.db.models.functions.text.Concat(models.Value('BTCH-000'), models.F('batch_id'))), models.When(batch_id__lt=100, then=django.db.models.functions.text.Concat(models.Value('BTCH-00'), models.F('batch_id'))), models.When(batch_id__lt=1000, then=django.db.models.functions.text.Concat(models.Value('BTCH-0'), models.F('batch_id'))), default=django.db.models.functions.text.Concat(models.Value('BTCH-'), models.F('batch_id')), output_field=models.CharField(max_length=100)), output_field=models.CharField(max_length=100), unique=True),
+        ),
+    ]
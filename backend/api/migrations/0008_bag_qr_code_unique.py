@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-17 07:00
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicate_qr_codes(apps, schema_editor):
+    Bag = apps.get_model('api', 'Bag')
+    duplicates = list(
+        Bag.objects.values('qr_code').annotate(n=Count('pk')).filter(n__gt=1)
+        .values_list('qr_code', flat=True)[:20]
+    )
+    if duplicates:
+        raise RuntimeError(
+            'Cannot make Bag.qr_code unique; duplicate codes exist: %s' % ', '.join(duplicates)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_batch_code_generated'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_qr_codes, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='bag',
+            name='qr_code',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.6 on 2026-10-17 07:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_bag_qr_code_unique'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bag',
+            index=models.Index(fields=['created_at', 'bag_id'], name='bag_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bag',
+            index=models.Index(fields=['external_update_date', 'bag_id'], name='bag_external_update_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bag',
+            index=models.Index(fields=['completed_at'], name='bag_completed_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bag',
+            index=models.Index(fields=['batch', 'created_at', 'bag_id'], name='bag_batch_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bag',
+            index=models.Index(fields=['status', 'created_at', 'bag_id'], name='bag_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bag',
+            index=models.Index(fields=['state', 'created_at', 'bag_id'], name='bag_state_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bag',
+            index=models.Index(fields=['internal_lot_number'], name='bag_internal_lot_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bag',
+            index=models.Index(fields=['external_lot_number'], name='bag_external_lot_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='batch',
+            index=models.Index(fields=['created_at', 'batch_id'], name='batch_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='batch',
+            index=models.Index(fields=['production_date', 'batch_id'], name='batch_production_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='batch',
+            index=models.Index(fields=['quantity', 'batch_id'], name='batch_quantity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='batch',
+            index=models.Index(fields=['completed_at'], name='batch_completed_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='batch',
+            index=models.Index(fields=['country', 'created_at', 'batch_id'], name='batch_country_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='batch',
+            index=models.Index(fields=['production_type', 'created_at', 'batch_id'], name='batch_type_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='batch',
+            index=models.Index(fields=['cluster_group', 'created_at', 'batch_id'], name='batch_cluster_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='batch',
+            index=models.Index(fields=['status', 'created_at', 'batch_id'], name='batch_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='batch',
+            index=models.Index(fields=['user', 'created_at', 'batch_id'], name='batch_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations
+
+# (index name, table, JSON column). jsonb_path_ops GIN indexes serve the
+# containment (@>) lookups used for exact matches on form data.
+GIN_INDEXES = (
+    ('batch_form_data_gin', 'api_batch', 'form_data'),
+    ('bag_form_data_gin', 'api_bag', 'form_data'),
+    ('submission_data_gin', 'api_submission', 'data'),
+)
+
+
+def create_gin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    quote = schema_editor.quote_name
+    for name, table, column in GIN_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {quote(name)} ON {quote(table)} '
+            f'USING gin ({quote(column)} jsonb_path_ops)'
+        )
+
+
+def drop_gin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in GIN_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(name)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_batch_bag_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_gin_indexes, drop_gin_indexes),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-17 07:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_json_gin_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['content_type', 'object_id', 'created_at', 'submission_id'], name='submission_object_idx'),
+        ),
+    ]
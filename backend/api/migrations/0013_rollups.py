@@ -0,0 +1,35 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BagDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('completed_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BatchDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('country', models.CharField(max_length=100)),
+                ('production_type', models.CharField(max_length=100)),
+                ('cluster_group', models.CharField(max_length=100)),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('working', 'Working'), ('completed', 'Completed')], max_length=10)),
+                ('batch_count', models.IntegerField(default=0)),
+                ('quantity', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'country', 'production_type', 'cluster_group', 'status'), name='batch_rollup_key')],
+            },
+        ),
+    ]
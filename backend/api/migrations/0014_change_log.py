@@ -0,0 +1,43 @@
+# Generated by Django 5.2.6 on 2026-10-17 07:38
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.utils import timezone
+
+SYNCED_MODELS = ('form', 'formfield', 'batch', 'bag', 'submission')
+
+
+def backfill_change_log(apps, schema_editor):
+    """Logs every existing row once, so a first sync from an empty cursor gets them all."""
+    ChangeLogEntry = apps.get_model('api', 'ChangeLogEntry')
+    now = timezone.now()
+    for name in SYNCED_MODELS:
+        ids = apps.get_model('api', name).objects.order_by('pk').values_list('pk', flat=True)
+        entries = []
+        for pk in ids.iterator(chunk_size=2000):
+            entries.append(ChangeLogEntry(model=name, object_id=pk, action='upsert', changed_at=now))
+            if len(entries) == 2000:
+                ChangeLogEntry.objects.bulk_create(entries)
+                entries = []
+        ChangeLogEntry.objects.bulk_create(entries)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('change_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('model', models.CharField(max_length=20)),
+                ('object_id', models.PositiveIntegerField()),
+                ('action', models.CharField(choices=[('upsert', 'Created or updated'), ('delete', 'Deleted')], default='upsert', max_length=6)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(backfill_change_log, migrations.RunPython.noop),
+    ]
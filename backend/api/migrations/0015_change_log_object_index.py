@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-17 08:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_change_log'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='changelogentry',
+            index=models.Index(fields=['model', 'object_id', 'change_id'], name='changelog_object_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+from django.db import migrations
+
+# (index name, column) on api_batch. The batch list's ?search= and the
+# admin search run UPPER(column::text) LIKE UPPER('%term%') on each of
+# these columns; pg_trgm GIN indexes on that expression serve the
+# substring match, and their bitmaps are ORed across the columns.
+TRGM_INDEXES = (
+    ('batch_batch_trgm', 'batch'),
+    ('batch_country_trgm', 'country'),
+    ('batch_production_type_trgm', 'production_type'),
+    ('batch_cluster_group_trgm', 'cluster_group'),
+)
+
+
+def create_trgm_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    quote = schema_editor.quote_name
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, column in TRGM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {quote(name)} ON {quote("api_batch")} '
+            f'USING gin ((UPPER({quote(column)}::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trgm_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in TRGM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(name)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_change_log_object_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trgm_indexes, drop_trgm_indexes),
+    ]
@@ -1,5 +1,7 @@
 from traceback import format_stack
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, CharField, F, Value, When
+from django.db.models.functions import Concat
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.contrib.contenttypes.fields import GenericForeignKey
@@ -13,10 +15,71 @@ STATUS_CHOICES = [
 ]
 
 
-class Batch(models.Model):
+class TrackedStateMixin:
+    """
+    Remembers the values of `tracked_fields` as loaded from the database,
+    so save() can detect transitions without re-reading the row.
+    """
+    tracked_fields = ('status',)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_state()
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._snapshot_state()
+
+    def _snapshot_state(self):
+        deferred = self.get_deferred_fields()
+        if any(name in deferred for name in self.tracked_fields):
+            self._loaded_state = None
+        else:
+            self._loaded_state = {name: getattr(self, name) for name in self.tracked_fields}
+
+    def get_loaded_state(self):
+        """The tracked values as last loaded or saved, or None if unknown."""
+        return getattr(self, '_loaded_state', None)
+
+    def _stamp_completion(self, kwargs):
+        """Sets completed_at when the status moves to completed."""
+        loaded = self.get_loaded_state()
+        was_completed = bool(loaded) and loaded['status'] == 'completed'
+        if self.status == 'completed' and not was_completed and (loaded or self._state.adding):
+            self.completed_at = timezone.now()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'completed_at' not in update_fields:
+                kwargs['update_fields'] = [*update_fields, 'completed_at']
+
+
+def batch_code_expression():
+    """BTCH- followed by the primary key, zero-padded to four digits."""
+    pk = F('batch_id')
+    return Case(
+        When(batch_id__lt=10, then=Concat(Value('BTCH-000'), pk)),
+        When(batch_id__lt=100, then=Concat(Value('BTCH-00'), pk)),
+        When(batch_id__lt=1000, then=Concat(Value('BTCH-0'), pk)),
+        default=Concat(Value('BTCH-'), pk),
+        output_field=CharField(max_length=100),
+    )
+
+
+class Batch(TrackedStateMixin, models.Model):
+    # status drives completion; the rest key the daily rollups (see rollups.py)
+    tracked_fields = ('status', 'production_date', 'country', 'production_type', 'cluster_group', 'quantity')
+
     batch_id = models.AutoField(primary_key=True)
-    batch = models.CharField(max_length=100, unique=True, null=True, blank=True)
+    # Computed by the database in the same INSERT that assigns batch_id
+    batch = models.GeneratedField(
+        expression=batch_code_expression(),
+        output_field=models.CharField(max_length=100),
+        db_persist=True,
+        unique=True,
+    )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
     country = models.CharField(max_length=100)
     production_type = models.CharField(max_length=100)
@@ -35,23 +98,41 @@ class Batch(models.Model):
         limit_choices_to={'association_type': 'batch'}
     )
     form_data = models.JSONField(default=dict, blank=True, null=True)
+    # Denormalized bag counters, maintained by Bag.save() and the Bag post_delete signal
+    bag_count = models.PositiveIntegerField(default=0, editable=False)
+    draft_bag_count = models.PositiveIntegerField(default=0, editable=False)
+    working_bag_count = models.PositiveIntegerField(default=0, editable=False)
+    completed_bag_count = models.PositiveIntegerField(default=0, editable=False)
+
+    @staticmethod
+    def adjust_bag_counters(batch_id, status, delta):
+        """Atomically adds delta to a batch's total and per-status bag counters."""
+        counters = {'bag_count': F('bag_count') + delta, 'updated_at': timezone.now()}
+        if status in dict(STATUS_CHOICES):
+            counters[f'{status}_bag_count'] = F(f'{status}_bag_count') + delta
+        Batch.objects.filter(pk=batch_id).update(**counters)
+        # The counters are part of the batch's representation
+        ChangeLogEntry.record(Batch, [batch_id])
+
+    @staticmethod
+    def move_bag_counters(batch_id, deltas):
+        """Applies per-status deltas (status -> delta, summing to 0) to a batch's counters."""
+        counters = {
+            f'{status}_bag_count': F(f'{status}_bag_count') + delta
+            for status, delta in deltas.items() if delta and status in dict(STATUS_CHOICES)
+        }
+        if counters:
+            Batch.objects.filter(pk=batch_id).update(**counters, updated_at=timezone.now())
+            ChangeLogEntry.record(Batch, [batch_id])
 
     def save(self, *args, **kwargs):
-        is_new = not self.pk
-        if is_new:
-            super().save(*args, **kwargs)
-            self.batch = f"BATCH{self.batch_id}"
-            if self.status == 'completed':
-                self.completed_at = timezone.now()
-            Batch.objects.filter(pk=self.pk).update(
-                batch=self.batch,
-                completed_at=self.completed_at
-            )
-        else:
-            original_batch = Batch.objects.get(pk=self.pk)
-            if original_batch.status != 'completed' and self.status == 'completed':
-                self.completed_at = timezone.now()
+        with transaction.atomic():
+            if self.get_loaded_state() is None and self.pk and not self._state.adding:
+                # Not loaded through the ORM: read the previous state once
+                self._loaded_state = Batch.objects.filter(pk=self.pk).values(*self.tracked_fields).first()
+            self._stamp_completion(kwargs)
             super().save(*args, **kwargs)
+            self._snapshot_state()
 
     def __str__(self):
         return f"Batch {self.batch_id} - {self.user.username}"
@@ -59,15 +140,30 @@ class Batch(models.Model):
     class Meta:
         verbose_name = "Batch"
         verbose_name_plural = "Batches"
+        # Keyset pagination seeks on (<ordering>, pk); filters lead with the filtered column
+        indexes = [
+            models.Index(fields=['created_at', 'batch_id'], name='batch_created_idx'),
+            models.Index(fields=['production_date', 'batch_id'], name='batch_production_date_idx'),
+            models.Index(fields=['quantity', 'batch_id'], name='batch_quantity_idx'),
+            models.Index(fields=['completed_at'], name='batch_completed_at_idx'),
+            models.Index(fields=['country', 'created_at', 'batch_id'], name='batch_country_created_idx'),
+            models.Index(fields=['production_type', 'created_at', 'batch_id'], name='batch_type_created_idx'),
+            models.Index(fields=['cluster_group', 'created_at', 'batch_id'], name='batch_cluster_created_idx'),
+            models.Index(fields=['status', 'created_at', 'batch_id'], name='batch_status_created_idx'),
+            models.Index(fields=['user', 'created_at', 'batch_id'], name='batch_user_created_idx'),
+        ]
+
 
+class Bag(TrackedStateMixin, models.Model):
+    tracked_fields = ('batch_id', 'status', 'qr_code', 'completed_at')
 
-class Bag(models.Model):
     bag_id = models.AutoField(primary_key=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     batch = models.ForeignKey(Batch, on_delete=models.CASCADE)
     internal_lot_number = models.CharField(max_length=100)
     state = models.CharField(max_length=100)
-    qr_code = models.CharField(max_length=100)
+    qr_code = models.CharField(max_length=100, unique=True)
     external_lot_number = models.CharField(max_length=100)
     external_update_date = models.DateTimeField()
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='draft')
@@ -82,14 +178,26 @@ class Bag(models.Model):
     form_data = models.JSONField(default=dict, blank=True, null=True)
 
     def save(self, *args, **kwargs):
-        if not self.pk:
-            if self.status == 'completed':
-                self.completed_at = timezone.now()
-        else:
-            original_bag = Bag.objects.get(pk=self.pk)
-            if original_bag.status != 'completed' and self.status == 'completed':
-                self.completed_at = timezone.now()
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            original = self.get_loaded_state()
+            if original is None and self.pk:
+                # Not loaded through the ORM: read the previous state once
+                original = Bag.objects.filter(pk=self.pk).values(*self.tracked_fields).first()
+                self._loaded_state = original
+            self._stamp_completion(kwargs)
+            super().save(*args, **kwargs)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None or {'batch', 'status'} & set(update_fields):
+                self._sync_batch_counters(original)
+            self._snapshot_state()
+
+    def _sync_batch_counters(self, original):
+        """Moves this bag between batch counters when its batch or status changed."""
+        if original and (original['batch_id'], original['status']) == (self.batch_id, self.status):
+            return
+        if original:
+            Batch.adjust_bag_counters(original['batch_id'], original['status'], -1)
+        Batch.adjust_bag_counters(self.batch_id, self.status, 1)
 
     def __str__(self):
         return f"Bag {self.bag_id} - {self.batch.batch_id}"
@@ -97,6 +205,44 @@ class Bag(models.Model):
     class Meta:
         verbose_name = "Bag"
         verbose_name_plural = "Bags"
+        indexes = [
+            models.Index(fields=['created_at', 'bag_id'], name='bag_created_idx'),
+            models.Index(fields=['external_update_date', 'bag_id'], name='bag_external_update_idx'),
+            models.Index(fields=['completed_at'], name='bag_completed_at_idx'),
+            models.Index(fields=['batch', 'created_at', 'bag_id'], name='bag_batch_created_idx'),
+            models.Index(fields=['status', 'created_at', 'bag_id'], name='bag_status_created_idx'),
+            models.Index(fields=['state', 'created_at', 'bag_id'], name='bag_state_created_idx'),
+            models.Index(fields=['internal_lot_number'], name='bag_internal_lot_idx'),
+            models.Index(fields=['external_lot_number'], name='bag_external_lot_idx'),
+        ]
+
+
+class BatchDailyRollup(models.Model):
+    """
+    Batches and total quantity per production day and dimension values,
+    maintained incrementally by rollups.py; rebuild with `rebuild_rollups`.
+    """
+    day = models.DateField()
+    country = models.CharField(max_length=100)
+    production_type = models.CharField(max_length=100)
+    cluster_group = models.CharField(max_length=100)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    batch_count = models.IntegerField(default=0)
+    quantity = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'country', 'production_type', 'cluster_group', 'status'],
+                name='batch_rollup_key',
+            ),
+        ]
+
+
+class BagDailyRollup(models.Model):
+    """Bags completed per day (by completed_at), maintained by rollups.py."""
+    day = models.DateField(unique=True)
+    completed_count = models.IntegerField(default=0)
 
 
 class Form(models.Model):
@@ -114,6 +260,8 @@ class Form(models.Model):
         choices=ASSOCIATION_CHOICES,
         default='standalone'
     )
+    # Also bumped when one of the form's fields changes
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Form {self.form_id} - {self.name}"
@@ -166,6 +314,7 @@ class Submission(models.Model):
     form = models.ForeignKey(Form, on_delete=models.CASCADE)
     data = models.JSONField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
 
     def __str__(self):
@@ -181,10 +330,66 @@ class Submission(models.Model):
                     f'Form association type "{self.form.association_type}" does not match '
                     f'the associated object type "{expected_association_type}".'
                 )
-        for field in self.form.fields.all():
-            if field.required and field.name not in self.data:
-                raise ValidationError(f'Required field "{field.name}" is missing from submission data.')
+        from .validation import get_validator
+        missing = [
+            rule.name for rule in get_validator(self.form).rules.values()
+            if rule.required and rule.name not in (self.data or {})
+        ]
+        if missing:
+            raise ValidationError(f'Required field "{missing[0]}" is missing from submission data.')
 
     class Meta:
         verbose_name = "Submission"
         verbose_name_plural = "Submissions"
+        indexes = [
+            # Generic key lookups, ordered like the keyset pagination
+            models.Index(fields=['content_type', 'object_id', 'created_at', 'submission_id'],
+                         name='submission_object_idx'),
+        ]
+
+
+class ChangeLogEntry(models.Model):
+    """
+    Append-only log of created, updated and deleted Batch, Bag, Form,
+    FormField and Submission rows, read by /api/sync/ (see changes.py).
+    Written in the same transaction as the change; change_id orders it.
+    Pruned by the prune_change_log command.
+    """
+    ACTION_CHOICES = [
+        ('upsert', 'Created or updated'),
+        ('delete', 'Deleted'),
+    ]
+
+    change_id = models.BigAutoField(primary_key=True)
+    # The model's model_name, e.g. "formfield"
+    model = models.CharField(max_length=20)
+    object_id = models.PositiveIntegerField()
+    action = models.CharField(max_length=6, choices=ACTION_CHOICES, default='upsert')
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    @classmethod
+    def entries(cls, model, ids, action='upsert'):
+        """Unsaved entries for a change of each of the model's objects in ids."""
+        now = timezone.now()
+        return [
+            cls(model=model._meta.model_name, object_id=pk, action=action, changed_at=now)
+            for pk in ids if pk is not None
+        ]
+
+    @classmethod
+    def record(cls, model, ids, action='upsert'):
+        """Logs a change of each of the model's objects in ids."""
+        entries = cls.entries(model, ids, action)
+        if len(entries) == 1:
+            entries[0].save(force_insert=True)
+        elif entries:
+            cls.objects.bulk_create(entries, batch_size=1000)
+
+    def __str__(self):
+        return f"{self.action} {self.model} {self.object_id}"
+
+    class Meta:
+        indexes = [
+            # Finds an object's later entries when pruning (see changes.prune_changes)
+            models.Index(fields=['model', 'object_id', 'change_id'], name='changelog_object_idx'),
+        ]
@@ -0,0 +1,223 @@
+import json
+from base64 import b64decode, b64encode
+from functools import reduce
+from operator import or_
+
+from asgiref.sync import sync_to_async
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def estimate_count(queryset):
+    """
+    Returns the planner's row estimate for a queryset on PostgreSQL,
+    and an exact COUNT(*) on other backends.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    sql, params = queryset.values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for admin changelists over large tables: the total comes
+    from estimate_count(), and is only counted exactly when the estimate
+    is below `exact_below` rows (where counting is cheap and estimates of
+    rarely analyzed tables are least reliable).
+    """
+    exact_below = 10000
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        return self.object_list.count() if estimate < self.exact_below else estimate
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset ("seek") pagination over a unique ordering, by default
+    (created_at, pk). Each page is a single indexed range scan, so
+    deep pages cost the same as the first one.
+
+    Views may set `keyset_ordering` to change the default ordering; the
+    last entry must be unique. A total is only computed on request with
+    `?count=exact` or `?count=estimate`.
+    """
+    page_size = api_settings.PAGE_SIZE or 50
+    max_page_size = 500
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    ordering_query_param = 'ordering'
+    ordering = ('created_at', 'pk')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_ordering(self, request, queryset, view):
+        """
+        The view's keyset ordering, or `?ordering=[-]field` for one of the
+        view's non-nullable `ordering_fields`, with pk as the tie-breaker.
+        """
+        requested = request.query_params.get(self.ordering_query_param)
+        if not requested:
+            return tuple(getattr(view, 'keyset_ordering', self.ordering))
+        name = requested.lstrip('-')
+        if name not in getattr(view, 'ordering_fields', ()):
+            raise ValidationError({self.ordering_query_param: f"Cannot order by '{name}'."})
+        prefix = '-' if requested.startswith('-') else ''
+        if name in ('pk', queryset.model._meta.pk.name):
+            return (f'{prefix}pk',)
+        return (f'{prefix}{name}', f'{prefix}pk')
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    # -------------------------------------------------------------
+    # CURSOR ENCODING
+    # -------------------------------------------------------------
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            data = json.loads(b64decode(encoded.encode('ascii')).decode('utf-8'))
+            values, reverse = data['v'], bool(data.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering_fields):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def encode_cursor(self, instance, reverse):
+        values = []
+        for field in self.ordering_fields:
+            value = getattr(instance, field.lstrip('-'))
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        encoded = b64encode(json.dumps({'v': values, 'r': int(reverse)}).encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    # -------------------------------------------------------------
+    # PAGINATION
+    # -------------------------------------------------------------
+    def seek(self, values, reverse):
+        """
+        The rows after the cursor, `a > x OR (a = x AND b > y)` per
+        field direction, ANDed with the leading bound `a >= x`. The OR
+        alone is not an index range, so without the bound a deep page
+        would scan every row before the cursor.
+        """
+        clauses = []
+        for i, field in enumerate(self.ordering_fields):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            clause = Q(**{f'{name}__{"lt" if descending else "gt"}': values[i]})
+            for prev, value in zip(self.ordering_fields[:i], values[:i]):
+                clause &= Q(**{prev.lstrip('-'): value})
+            clauses.append(clause)
+        if len(clauses) == 1:
+            return clauses[0]
+        first = self.ordering_fields[0]
+        descending = first.startswith('-') != reverse
+        bound = Q(**{f'{first.lstrip("-")}__{"lte" if descending else "gte"}': values[0]})
+        return bound & reduce(or_, clauses)
+
+    def prepare(self, queryset, request, view=None):
+        """
+        Reads the page parameters from the request and returns the
+        queryset of the requested page plus one row (to detect more).
+        """
+        self.request = request
+        self.base_url = remove_query_param(request.build_absolute_uri(), self.cursor_query_param)
+        self.ordering_fields = self.get_ordering(request, queryset, view)
+        self.page_size_value = self.get_page_size(request)
+        self.cursor = self.decode_cursor(request)
+        self.reverse = bool(self.cursor and self.cursor[1])
+        self.count = None
+        self.count_mode = request.query_params.get(self.count_query_param)
+
+        order_by = [
+            (name.lstrip('-') if name.startswith('-') else f'-{name}') if self.reverse else name
+            for name in self.ordering_fields
+        ]
+        queryset = queryset.order_by(*order_by)
+        if self.cursor:
+            queryset = queryset.filter(self.seek(self.cursor[0], self.reverse))
+        return queryset[:self.page_size_value + 1]
+
+    def set_page(self, rows):
+        has_more = len(rows) > self.page_size_value
+        page = rows[:self.page_size_value]
+        if self.reverse:
+            page.reverse()
+            self.has_next, self.has_previous = bool(page), has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+        self.page = page
+        return page
+
+    def paginate_queryset(self, queryset, request, view=None):
+        window = self.prepare(queryset, request, view)
+        if self.count_mode == 'exact':
+            self.count = queryset.count()
+        elif self.count_mode == 'estimate':
+            self.count = estimate_count(queryset)
+        return self.set_page(list(window))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset for async views, reading the page with the async ORM."""
+        window = self.prepare(queryset, request, view)
+        if self.count_mode == 'exact':
+            self.count = await queryset.acount()
+        elif self.count_mode == 'estimate':
+            self.count = await sync_to_async(estimate_count)(queryset)
+        return self.set_page([obj async for obj in window])
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return self.base_url
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        payload = {'next': self.get_next_link(), 'previous': self.get_previous_link()}
+        if self.count is not None:
+            payload['count'] = self.count
+            payload['count_is_estimate'] = self.count_mode == 'estimate'
+        payload['results'] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'count': {'type': 'integer'},
+                'count_is_estimate': {'type': 'boolean'},
+                'results': schema,
+            },
+        }
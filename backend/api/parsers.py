@@ -0,0 +1,56 @@
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.utils import json
+
+from .renderers import FastJSONRenderer, orjson
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSONParser backed by orjson when it is installed; falls back to the
+    standard library for non UTF-8 bodies or when orjson is missing.
+    Like DRF's strict parser, NaN, Infinity and -Infinity are rejected;
+    with orjson so are numbers that overflow a double (1e400), which the
+    standard library reads as inf and DRF's renderer then refuses.
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+class NDJSONParser(BaseParser):
+    """
+    Parses newline-delimited JSON into a list, one object per line, as
+    strictly as FastJSONParser: NaN and Infinity are rejected. An empty
+    body parses to an empty list.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if stream is None:
+            return []
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        fast = orjson is not None and encoding.lower().replace('_', '-') in ('utf-8', 'utf8')
+        rows = []
+        for number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                if fast:
+                    rows.append(orjson.loads(line))
+                else:
+                    rows.append(json.loads(line.decode(encoding), parse_constant=json.strict_constant))
+            except ValueError as exc:
+                raise ParseError(f'NDJSON parse error on line {number} - {exc}')
+        return rows
@@ -0,0 +1,44 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+if orjson is not None:
+    # Non-str keys are stringified as json.dumps does; UTC datetimes end in
+    # "Z" like DRF's encoder output.
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer backed by orjson when it is installed.
+
+    The output matches DRF's JSONRenderer: datetimes are ISO 8601 with "Z"
+    for UTC, Decimals become floats, lazy strings and everything else
+    orjson cannot encode natively go through DRF's JSONEncoder.default,
+    and U+2028/U+2029 are escaped. Indented or non-compact output, and
+    installs without orjson, use the standard library renderer.
+
+    One difference: a NaN or infinite float renders as null, where DRF's
+    strict renderer raises ValueError (a 500). The parsers never accept
+    such values, so they can only come from computed fields.
+    """
+    _default = JSONRenderer.encoder_class().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or not self.compact or self.ensure_ascii or \
+                self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self._default, option=ORJSON_OPTIONS)
+        except TypeError:
+            # e.g. integers beyond 64 bits, which the standard library accepts
+            return super().render(data, accepted_media_type, renderer_context)
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
@@ -0,0 +1,167 @@
+import hashlib
+from datetime import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from rest_framework import serializers
+
+from config.metrics import record_cache
+
+from .filters import date_range_lookups
+from .models import Batch, Bag, BagDailyRollup, BatchDailyRollup, STATUS_CHOICES
+
+REPORT_FILTERS = ('status', 'cluster_group', 'country', 'production_type')
+REPORT_DATE_FILTERS = ('created_at', 'production_date')
+
+
+def report_filters(params):
+    """
+    Extracts the supported report filters from the query params.
+    Returns a dict of ORM lookups on Batch.
+    """
+    lookups = {}
+    for name in REPORT_FILTERS:
+        value = params.get(name)
+        if value:
+            lookups[name] = value
+
+    if 'status' in lookups and lookups['status'] not in dict(STATUS_CHOICES):
+        raise serializers.ValidationError({'status': f"Unknown status '{lookups['status']}'."})
+
+    lookups.update(date_range_lookups(params, REPORT_DATE_FILTERS))
+    return lookups
+
+
+def rollup_lookups(lookups):
+    """
+    Translates report lookups into lookups on BatchDailyRollup, or returns
+    None when the rollup cannot answer them exactly: created_at filters,
+    and production_date bounds that do not fall on day boundaries.
+    """
+    rollup = {}
+    for key, value in lookups.items():
+        if key in REPORT_FILTERS:
+            rollup[key] = value
+            continue
+        if not key.startswith('production_date__'):
+            return None
+        local = timezone.localtime(value)
+        lookup = key.rsplit('__', 1)[1]
+        if local.time() != (time.max if lookup == 'lte' else time.min):
+            return None
+        rollup[f'day__{lookup}'] = local.date()
+    return rollup
+
+
+# ---------------------------------------------------------------------
+# AGGREGATES
+# ---------------------------------------------------------------------
+def batches_by(dimension, lookups):
+    """
+    Batch count and total quantity grouped by one Batch column, read
+    from the daily rollup whenever the filters allow it.
+    """
+    rollup = rollup_lookups(lookups)
+    if rollup is not None:
+        rows = (
+            BatchDailyRollup.objects.filter(**rollup)
+            .values(dimension)
+            .annotate(count=Sum('batch_count'), quantity=Sum('quantity'))
+            .filter(count__gt=0)
+            .order_by(dimension)
+        )
+    else:
+        rows = (
+            Batch.objects.filter(**lookups)
+            .values(dimension)
+            .annotate(count=Count('batch_id'), quantity=Sum('quantity'))
+            .order_by(dimension)
+        )
+    return [
+        {dimension: row[dimension], 'count': row['count'], 'quantity': row['quantity'] or 0}
+        for row in rows
+    ]
+
+
+def bags_per_batch(lookups):
+    """Bag count per batch, only for batches that have bags."""
+    bag_lookups = {f'batch__{key}': value for key, value in lookups.items()}
+    rows = (
+        Bag.objects.filter(**bag_lookups)
+        .values('batch', 'batch__batch')
+        .annotate(count=Count('bag_id'))
+        .order_by('batch')
+    )
+    return [
+        {'batch': row['batch'], 'batch_code': row['batch__batch'], 'count': row['count']}
+        for row in rows
+    ]
+
+
+def batches_daily(lookups):
+    """Batch count and total quantity per production day and dimension values."""
+    rollup = rollup_lookups(lookups)
+    if rollup is not None:
+        rows = (
+            BatchDailyRollup.objects.filter(**rollup, batch_count__gt=0)
+            .values('day', *REPORT_FILTERS)
+            .annotate(count=Sum('batch_count'), total=Sum('quantity'))
+        )
+    else:
+        rows = (
+            Batch.objects.filter(**lookups)
+            .values(*REPORT_FILTERS, day=TruncDate('production_date'))
+            .annotate(count=Count('batch_id'), total=Sum('quantity'))
+        )
+    rows = rows.order_by('day', *REPORT_FILTERS)
+    return [
+        {'day': row['day'], **{name: row[name] for name in REPORT_FILTERS},
+         'count': row['count'], 'quantity': row['total'] or 0}
+        for row in rows
+    ]
+
+
+def bags_completed_daily(lookups):
+    """
+    Bags completed per day. Unfiltered requests read the daily rollup;
+    batch filters need the Bag table joined to its batch.
+    """
+    if not lookups:
+        rows = BagDailyRollup.objects.filter(completed_count__gt=0).values('day', count=F('completed_count'))
+    else:
+        bag_lookups = {f'batch__{key}': value for key, value in lookups.items()}
+        rows = (
+            Bag.objects.filter(**bag_lookups, status='completed', completed_at__isnull=False)
+            .values(day=TruncDate('completed_at'))
+            .annotate(count=Count('bag_id'))
+        )
+    return [{'day': row['day'], 'count': row['count']} for row in rows.order_by('day')]
+
+
+REPORTS = {
+    'batches-by-country': lambda lookups: batches_by('country', lookups),
+    'batches-by-production-type': lambda lookups: batches_by('production_type', lookups),
+    'batches-by-cluster-group': lambda lookups: batches_by('cluster_group', lookups),
+    'batches-by-status': lambda lookups: batches_by('status', lookups),
+    'bags-per-batch': bags_per_batch,
+    'batches-daily': batches_daily,
+    'bags-completed-daily': bags_completed_daily,
+}
+
+
+def get_report(name, lookups):
+    """
+    Returns the rows for a named report, served from the cache for
+    REPORTS_CACHE_TIMEOUT seconds per distinct filter combination.
+    """
+    fingerprint = '&'.join(f'{k}={v}' for k, v in sorted(lookups.items()))
+    key = 'report:%s:%s' % (name, hashlib.md5(fingerprint.encode()).hexdigest())
+    rows = cache.get(key)
+    record_cache('reports', rows is not None)
+    if rows is None:
+        rows = REPORTS[name](lookups)
+        cache.set(key, rows, getattr(settings, 'REPORTS_CACHE_TIMEOUT', 60))
+    return rows
@@ -0,0 +1,80 @@
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import BagDailyRollup, BatchDailyRollup
+
+BATCH_DIMENSIONS = ('country', 'production_type', 'cluster_group', 'status')
+BATCH_STATE_FIELDS = ('production_date', 'quantity', *BATCH_DIMENSIONS)
+
+
+def _day(value):
+    return timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+
+
+def _increment(model, key, **deltas):
+    """Adds deltas to the rollup row for key, creating the row if needed."""
+    updates = {name: F(name) + delta for name, delta in deltas.items()}
+    if model.objects.filter(**key).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**key, **deltas)
+    except IntegrityError:
+        # Created concurrently since the UPDATE above
+        model.objects.filter(**key).update(**updates)
+
+
+# ---------------------------------------------------------------------
+# BATCHES
+# ---------------------------------------------------------------------
+def batch_state(batch):
+    """The rollup-relevant values of a batch instance."""
+    return {name: getattr(batch, name) for name in BATCH_STATE_FIELDS}
+
+
+def _batch_key(state):
+    return {'day': _day(state['production_date']), **{name: state[name] for name in BATCH_DIMENSIONS}}
+
+
+def record_batch_change(old, new):
+    """
+    Moves a batch between rollup rows. old/new are batch states (see
+    batch_state), or None for a created or deleted batch.
+    """
+    old_key = _batch_key(old) if old else None
+    new_key = _batch_key(new) if new else None
+    if old_key and old_key == new_key:
+        if old['quantity'] != new['quantity']:
+            _increment(BatchDailyRollup, new_key, quantity=new['quantity'] - old['quantity'])
+        return
+    if old_key:
+        _increment(BatchDailyRollup, old_key, batch_count=-1, quantity=-old['quantity'])
+    if new_key:
+        _increment(BatchDailyRollup, new_key, batch_count=1, quantity=new['quantity'])
+
+
+# ---------------------------------------------------------------------
+# BAGS
+# ---------------------------------------------------------------------
+def bag_completion_day(state):
+    """The day a bag counts as completed on, or None while it is not completed."""
+    if state and state['status'] == 'completed' and state['completed_at']:
+        return _day(state['completed_at'])
+    return None
+
+
+def record_bag_completions(days):
+    """Applies a Counter (or dict) of day -> completed bag delta."""
+    for day, delta in days.items():
+        if day is not None and delta:
+            _increment(BagDailyRollup, {'day': day}, completed_count=delta)
+
+
+def record_bag_change(old, new):
+    """Moves a bag's completion between days; old/new hold status and completed_at."""
+    before, after = bag_completion_day(old), bag_completion_day(new)
+    if before != after:
+        record_bag_completions(Counter({before: -1, after: 1}))
@@ -0,0 +1,194 @@
+import random
+from datetime import timedelta
+from io import StringIO
+from itertools import accumulate, islice
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Batch, Bag, ChangeLogEntry, Form, FormField, Submission
+
+# Weighted like a real catalogue: a few large producers and a long tail
+COUNTRIES = {'Nepal': 40, 'India': 25, 'Bhutan': 12, 'Sri Lanka': 10, 'Kenya': 8, 'Peru': 5}
+PRODUCTION_TYPES = {'Organic': 55, 'Conventional': 35, 'Fair Trade': 10}
+CLUSTER_GROUPS = {f'Cluster {letter}': weight for letter, weight in zip('ABCDEFGH', (30, 20, 15, 10, 10, 7, 5, 3))}
+# Older work is mostly done, so most rows are completed
+STATUSES = {'draft': 10, 'working': 25, 'completed': 65}
+BAG_STATES = {'new': 30, 'stored': 40, 'shipped': 30}
+FIELD_TYPES = {
+    'text': 30, 'number': 25, 'date': 10, 'boolean': 10, 'select': 10,
+    'radio': 5, 'checkbox': 5, 'email': 3, 'url': 2,
+}
+CHOICES = ['A', 'B', 'C', 'D', 'E']
+
+
+class Seeder:
+    """
+    Generates a dataset with realistic distributions: weighted dimension
+    values, production dates over the past year, bags per batch and
+    submission volumes spread around their means with a long tail.
+    The same seed always produces the same rows.
+    """
+
+    def __init__(self, seed=0, chunk_size=2000, now=None):
+        self.rng = random.Random(seed)
+        self.chunk_size = chunk_size
+        self.now = now or timezone.now()
+
+    def pick(self, weights):
+        return self.rng.choices(list(weights), weights=list(weights.values()))[0]
+
+    def around(self, mean):
+        """A non-negative count around mean, occasionally several times larger."""
+        if mean <= 0:
+            return 0
+        if self.rng.random() < 0.05:
+            return int(mean * self.rng.uniform(2, 5))
+        return max(0, round(self.rng.gauss(mean, mean / 3)))
+
+    def past(self, days=365):
+        return self.now - timedelta(seconds=self.rng.randrange(days * 86400))
+
+    def create(self, model, objects):
+        """bulk_create in chunks, returning the saved objects (and logging them for /api/sync/)."""
+        created = []
+        objects = iter(objects)
+        while chunk := list(islice(objects, self.chunk_size)):
+            chunk = model.objects.bulk_create(chunk)
+            ChangeLogEntry.record(model, [obj.pk for obj in chunk])
+            created.extend(chunk)
+        return created
+
+    # -----------------------------------------------------------------
+    # FORMS
+    # -----------------------------------------------------------------
+    def field(self, form, index):
+        field_type = self.pick(FIELD_TYPES)
+        rules = {}
+        if field_type == 'text':
+            rules = {'max_length': 200}
+        elif field_type == 'number':
+            rules = {'min_value': 0, 'max_value': 1000}
+        elif field_type in ('select', 'radio', 'checkbox'):
+            rules = {'choices': CHOICES}
+        return FormField(
+            form=form, name=f'{field_type}_{index}', field_type=field_type,
+            required=self.rng.random() < 0.3, validation_rules=rules or None,
+        )
+
+    def forms(self, count, fields_per_form):
+        # Most forms describe batches and bags; a few are standalone
+        associations = ['batch', 'bag'] + ['batch', 'bag', 'standalone'] * count
+        forms = self.create(Form, (
+            Form(name=f'Seed form {i}', association_type=associations[i])
+            for i in range(count)
+        ))
+        fields = self.create(FormField, (
+            self.field(form, i) for form in forms for i in range(self.around(fields_per_form) or 1)
+        ))
+        by_form = {form.pk: [] for form in forms}
+        for f in fields:
+            by_form[f.form_id].append(f)
+        return forms, by_form
+
+    def value(self, field):
+        if field.field_type == 'text':
+            return f'{field.name} value {self.rng.randrange(10000)}'
+        if field.field_type == 'number':
+            return round(self.rng.uniform(0, 1000), 2)
+        if field.field_type == 'date':
+            return self.past().date().isoformat()
+        if field.field_type == 'boolean':
+            return self.rng.random() < 0.5
+        if field.field_type == 'checkbox':
+            return self.rng.sample(CHOICES, self.rng.randint(1, 3))
+        if field.field_type in ('select', 'radio'):
+            return self.rng.choice(CHOICES)
+        if field.field_type == 'email':
+            return f'user{self.rng.randrange(1000)}@example.com'
+        return f'https://example.com/{self.rng.randrange(1000)}'
+
+    def data(self, fields):
+        """Form data with every required field and about two thirds of the optional ones."""
+        return {f.name: self.value(f) for f in fields if f.required or self.rng.random() < 0.66}
+
+    # -----------------------------------------------------------------
+    # BATCHES, BAGS AND SUBMISSIONS
+    # -----------------------------------------------------------------
+    def batches(self, count, users, forms, fields):
+        for _ in range(count):
+            form = self.rng.choice(forms) if forms and self.rng.random() < 0.7 else None
+            status = self.pick(STATUSES)
+            produced = self.past()
+            yield Batch(
+                user=self.rng.choice(users), country=self.pick(COUNTRIES),
+                production_type=self.pick(PRODUCTION_TYPES), production_date=produced,
+                form_gate_sourced=self.rng.random() < 0.2, cluster_group=self.pick(CLUSTER_GROUPS),
+                quantity=int(self.rng.lognormvariate(6, 0.8)), uoms='kg', status=status,
+                completed_at=produced + timedelta(days=self.rng.randint(1, 30)) if status == 'completed' else None,
+                form=form, form_data=self.data(fields[form.pk]) if form else {},
+            )
+
+    def bags(self, batches, per_batch, forms, fields):
+        for batch in batches:
+            for i in range(self.around(per_batch)):
+                form = self.rng.choice(forms) if forms and self.rng.random() < 0.5 else None
+                # Bags of a completed batch are completed too
+                status = 'completed' if batch.status == 'completed' else self.pick(STATUSES)
+                yield Bag(
+                    batch=batch, internal_lot_number=f'ILN-{batch.pk}-{i}', state=self.pick(BAG_STATES),
+                    qr_code=f'QR-{batch.pk}-{i}', external_lot_number=f'ELN-{self.rng.randrange(10 ** 6)}',
+                    external_update_date=self.past(), status=status,
+                    completed_at=self.past(30) if status == 'completed' else None,
+                    form=form, form_data=self.data(fields[form.pk]) if form else {},
+                )
+
+    def submissions(self, count, objects, forms, fields, users):
+        """
+        count submissions spread over the objects matching each form's
+        association, Pareto-weighted so a few objects get most of them.
+        """
+        content_types = {
+            name: ContentType.objects.get_for_model(model) for name, model in (('batch', Batch), ('bag', Bag))
+        }
+        # Cumulative weights keep each pick a bisect instead of a scan
+        weights = {
+            name: list(accumulate(self.rng.paretovariate(1.2) for _ in rows)) for name, rows in objects.items()
+        }
+        for _ in range(count):
+            form = self.rng.choice(forms)
+            kind = form.association_type
+            target = None
+            if kind in objects and objects[kind]:
+                target = self.rng.choices(objects[kind], cum_weights=weights[kind])[0]
+            elif kind != 'standalone':
+                continue
+            yield Submission(
+                form=form, data=self.data(fields[form.pk]), created_by=self.rng.choice(users),
+                content_type=content_types[kind] if target else None, object_id=target.pk if target else None,
+            )
+
+    def seed(self, batches, bags_per_batch, forms, fields_per_form, submissions, users=None):
+        """Creates the dataset and returns the number of rows per model."""
+        with transaction.atomic():
+            if not users:
+                users = [
+                    User.objects.get_or_create(username=f'seed-user-{i}')[0] for i in range(5)
+                ]
+            forms, fields = self.forms(forms, fields_per_form)
+            by_type = {kind: [f for f in forms if f.association_type == kind] for kind in ('batch', 'bag')}
+            batch_rows = self.create(Batch, self.batches(batches, users, by_type['batch'], fields))
+            bag_rows = self.create(Bag, self.bags(batch_rows, bags_per_batch, by_type['bag'], fields))
+            submission_rows = self.create(Submission, self.submissions(
+                submissions, {'batch': batch_rows, 'bag': bag_rows}, forms, fields, users
+            ))
+            # bulk_create sends no signals: derive the counters and rollups in one pass each
+            call_command('rebuild_bag_counters', verbosity=0, stdout=StringIO())
+            call_command('rebuild_rollups', verbosity=0, stdout=StringIO())
+        return {
+            'forms': len(forms), 'form fields': sum(len(f) for f in fields.values()),
+            'batches': len(batch_rows), 'bags': len(bag_rows), 'submissions': len(submission_rows),
+        }
@@ -1,24 +1,52 @@
 from rest_framework import serializers
-from .models import Batch, Bag, Form, FormField, Submission
+from rest_framework.reverse import reverse
+from .models import STATUS_CHOICES, Batch, Bag, ChangeLogEntry, Form, FormField, Submission
+from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
-from django.core.validators import validate_email, URLValidator
-import re
+from django.db import transaction
+from config.middleware import timed
+from .validation import validate_form_data
+
+
+def validate_linked_form_data(data, form, field_name):
+    """
+    Runs the shared form validation engine on data[field_name], reports
+    every field error under that serializer field and stores the data
+    normalized (numbers as JSON numbers, which the form_data filters match).
+    """
+    form_data = data.get(field_name)
+    if form and form_data is not None:
+        try:
+            data[field_name] = validate_form_data(form, form_data)
+        except ValidationError as e:
+            raise serializers.ValidationError({field_name: e.message_dict})
+
+
+class TimedModelSerializer(serializers.ModelSerializer):
+    """Reports validation and output time as the request's "serializer" timing."""
+
+    def run_validation(self, data=serializers.empty):
+        with timed('serializer'):
+            return super().run_validation(data)
+
+    def to_representation(self, instance):
+        with timed('serializer'):
+            return super().to_representation(instance)
 
 # ---------------------------------------------------------------------
 # BATCH SERIALIZER
 # ---------------------------------------------------------------------
-class BatchSerializer(serializers.ModelSerializer):
-    # Extra computed field — counts how many bags belong to this batch
-    bag_counts = serializers.SerializerMethodField()
+class BatchSerializer(TimedModelSerializer):
+    # Number of bags in this batch, read from the denormalized counter
+    bag_counts = serializers.IntegerField(source='bag_count', read_only=True)
 
     class Meta:
         model = Batch
         fields = '__all__'
-        read_only_fields = ('batch_id', 'batch', 'created_at', 'completed_at')
-
-    def get_bag_counts(self, obj):
-        """Returns the number of bags linked to this batch."""
-        return obj.bag_set.count()
+        read_only_fields = (
+            'batch_id', 'batch', 'created_at', 'completed_at',
+            'bag_count', 'draft_bag_count', 'working_bag_count', 'completed_bag_count',
+        )
 
     # -------------------------------------------------------------
     # VALIDATION LOGIC
@@ -28,49 +56,7 @@ class BatchSerializer(serializers.ModelSerializer):
         Ensures that the provided form_data matches the structure
         and rules defined by the linked Form.
         """
-        form = data.get('form')
-        form_data = data.get('form_data')
-
-        if form and form_data is not None:
-            expected_fields = {field.name for field in form.fields.all()}
-            submitted_fields = set(form_data.keys())
-
-            # 1️ Check for unexpected fields
-            extra = submitted_fields - expected_fields
-            if extra:
-                raise serializers.ValidationError(
-                    f"Unexpected fields in form_data: {', '.join(extra)}."
-                )
-
-            # 2️ Check for missing required fields
-            for field in form.fields.all():
-                if field.required and field.name not in submitted_fields:
-                    raise serializers.ValidationError(
-                        f"Required field '{field.name}' is missing from form_data."
-                    )
-
-            # 3️ Validate choice-based fields
-            for field in form.fields.all():
-                val = form_data.get(field.name)
-                rules = field.validation_rules or {}
-                if val is None:
-                    continue
-
-                if field.field_type in ('select', 'radio'):
-                    choices = rules.get('choices', [])
-                    if choices and val not in choices:
-                        raise serializers.ValidationError(
-                            f"Field '{field.name}' must be one of: {', '.join(choices)}."
-                        )
-                elif field.field_type == 'checkbox':
-                    choices = rules.get('choices', [])
-                    if choices:
-                        selected = val if isinstance(val, list) else [v.strip() for v in str(val).split(',')]
-                        invalid = [v for v in selected if v not in choices]
-                        if invalid:
-                            raise serializers.ValidationError(
-                                f"Field '{field.name}' has invalid choices: {', '.join(invalid)}."
-                            )
+        validate_linked_form_data(data, data.get('form'), 'form_data')
         return data
 
     # -------------------------------------------------------------
@@ -98,7 +84,7 @@ class BatchSerializer(serializers.ModelSerializer):
 # ---------------------------------------------------------------------
 # BAG SERIALIZER
 # ---------------------------------------------------------------------
-class BagSerializer(serializers.ModelSerializer):
+class BagSerializer(TimedModelSerializer):
     class Meta:
         model = Bag
         fields = '__all__'
@@ -106,39 +92,7 @@ class BagSerializer(serializers.ModelSerializer):
 
     def validate(self, data):
         """Same validation logic as Batch — ensures form_data correctness."""
-        form = data.get('form')
-        form_data = data.get('form_data')
-
-        if form and form_data is not None:
-            expected_fields = {f.name for f in form.fields.all()}
-            submitted_fields = set(form_data.keys())
-
-            extra = submitted_fields - expected_fields
-            if extra:
-                raise serializers.ValidationError(f"Unexpected fields: {', '.join(extra)}.")
-
-            for f in form.fields.all():
-                if f.required and f.name not in submitted_fields:
-                    raise serializers.ValidationError(f"Required field '{f.name}' missing.")
-
-                val = form_data.get(f.name)
-                if val is not None:
-                    rules = f.validation_rules or {}
-                    if f.field_type in ('select', 'radio'):
-                        choices = rules.get('choices', [])
-                        if choices and val not in choices:
-                            raise serializers.ValidationError(
-                                f"Field '{f.name}' must be one of: {', '.join(choices)}."
-                            )
-                    elif f.field_type == 'checkbox':
-                        choices = rules.get('choices', [])
-                        if choices:
-                            selected = val if isinstance(val, list) else [v.strip() for v in str(val).split(',')]
-                            invalid = [v for v in selected if v not in choices]
-                            if invalid:
-                                raise serializers.ValidationError(
-                                    f"Field '{f.name}' invalid choices: {', '.join(invalid)}."
-                                )
+        validate_linked_form_data(data, data.get('form'), 'form_data')
         return data
 
     def to_representation(self, instance):
@@ -151,16 +105,61 @@ class BagSerializer(serializers.ModelSerializer):
         return rep
 
 
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Resolves primary keys from objects preloaded into
+    context['prefetched'][field_name] instead of one query per value.
+    """
+
+    def to_internal_value(self, data):
+        objects = self.context.get('prefetched', {}).get(self.field_name)
+        if objects is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            obj = objects.get(int(data))
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if obj is None:
+            self.fail('does_not_exist', pk_value=data)
+        return obj
+
+
+class BagBulkSerializer(BagSerializer):
+    """BagSerializer for bulk ingestion, resolving batch and form from prefetched maps."""
+    batch = PrefetchedPrimaryKeyRelatedField(queryset=Batch.objects.all())
+    form = PrefetchedPrimaryKeyRelatedField(
+        queryset=Form.objects.filter(association_type='bag'), required=False, allow_null=True
+    )
+
+    class Meta(BagSerializer.Meta):
+        # qr_code uniqueness is checked for the whole payload in one query
+        extra_kwargs = {'qr_code': {'validators': []}}
+
+
+class BagTransitionSerializer(serializers.Serializer):
+    """Body of POST /api/bags/transition/: the bags to move and their new status."""
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False)
+    status = serializers.ChoiceField(choices=STATUS_CHOICES)
+
+    def validate_ids(self, ids):
+        max_rows = self.context.get('max_rows')
+        if max_rows is not None and len(ids) > max_rows:
+            raise serializers.ValidationError(f'At most {max_rows} bags can be changed per request.')
+        return list(dict.fromkeys(ids))
+
+
 # ---------------------------------------------------------------------
 # FORM FIELD SERIALIZER
 # ---------------------------------------------------------------------
-class FormFieldSerializer(serializers.ModelSerializer):
+class FormFieldSerializer(TimedModelSerializer):
     validation_rules = serializers.JSONField(required=False, allow_null=True)
 
     class Meta:
         model = FormField
         fields = ('form_field_id', 'form', 'name', 'description', 'field_type', 'required', 'validation_rules')
-        read_only_fields = ('form_field_id', 'form')
+        read_only_fields = ('form_field_id',)
 
     def validate(self, attrs):
         """
@@ -184,72 +183,188 @@ class FormFieldSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class NestedFormFieldSerializer(FormFieldSerializer):
+    """
+    A field written through FormSerializer; id (as the frontend sends
+    it) or form_field_id marks an existing field.
+    """
+    id = serializers.IntegerField(required=False, write_only=True)
+    form_field_id = serializers.IntegerField(required=False)
+
+    class Meta(FormFieldSerializer.Meta):
+        fields = FormFieldSerializer.Meta.fields + ('id',)
+        # Set by the form being written
+        read_only_fields = ('form_field_id', 'form')
+
+    def validate(self, attrs):
+        field_id = attrs.pop('id', None)
+        if field_id is not None:
+            if attrs.get('form_field_id', field_id) != field_id:
+                raise serializers.ValidationError({'id': 'Does not match form_field_id.'})
+            attrs['form_field_id'] = field_id
+        return super().validate(attrs)
+
+
 # ---------------------------------------------------------------------
 # FORM SERIALIZER (With Nested Form Fields)
 # ---------------------------------------------------------------------
-class FormSerializer(serializers.ModelSerializer):
-    fields = FormFieldSerializer(many=True)
+class FormSerializer(TimedModelSerializer):
+    fields = NestedFormFieldSerializer(many=True)
+
+    # FormField attributes written by a nested update
+    FIELD_ATTRS = ('name', 'description', 'field_type', 'required', 'validation_rules')
 
     class Meta:
         model = Form
         fields = '__all__'
         read_only_fields = ('form_id',)
 
+    # -------------------------------------------------------------
+    # VALIDATION LOGIC
+    # -------------------------------------------------------------
+    def validate(self, attrs):
+        """
+        Diffs the submitted fields against the form's existing fields
+        (read once) and model-validates each one. Errors are reported
+        per field index and nothing is written unless all fields pass.
+        Items with an id (or form_field_id) update that field, items
+        without one are created, and existing fields left out are deleted.
+        """
+        fields_data = attrs.get('fields')
+        if fields_data is None:
+            return attrs
+
+        existing = {f.pk: f for f in self.instance.fields.all()} if self.instance else {}
+        errors = [{} for _ in fields_data]
+        names = {}
+        created, changed, kept = [], [], set()
+        for index, data in enumerate(fields_data):
+            field_id = data.pop('form_field_id', None)
+            if field_id is not None and (field_id not in existing or field_id in kept):
+                errors[index]['form_field_id'] = ['Not a field of this form, or listed twice.']
+                continue
+            if field_id is None:
+                # A partial update only relaxes the required attributes of existing fields
+                missing = [attr for attr in ('name', 'field_type') if attr not in data]
+                if missing:
+                    errors[index].update({attr: ['This field is required.'] for attr in missing})
+                    continue
+            name = data.get('name', existing[field_id].name if field_id is not None else None)
+            if name in names:
+                errors[index]['name'] = [f'Duplicate field name (also at index {names[name]}).']
+            names.setdefault(name, index)
+
+            if field_id is None:
+                field = FormField(form=self.instance, **data)
+                created.append(field)
+            else:
+                kept.add(field_id)
+                field = existing[field_id]
+                before = [getattr(field, attr) for attr in self.FIELD_ATTRS]
+                for attr, value in data.items():
+                    setattr(field, attr, value)
+                if before != [getattr(field, attr) for attr in self.FIELD_ATTRS]:
+                    changed.append(field)
+            try:
+                field.full_clean(exclude=['form'], validate_unique=False, validate_constraints=False)
+            except ValidationError as e:
+                for key, messages in e.message_dict.items():
+                    errors[index].setdefault('non_field_errors' if key == '__all__' else key, []).extend(messages)
+
+        if any(errors):
+            raise serializers.ValidationError({'fields': errors})
+        attrs['fields'] = {
+            'created': created,
+            'changed': changed,
+            'deleted': [pk for pk in existing if pk not in kept],
+        }
+        return attrs
+
+    # -------------------------------------------------------------
+    # SAVE HANDLING
+    # -------------------------------------------------------------
+    def _write_fields(self, form, plan):
+        """
+        Applies a field diff with one DELETE, one UPDATE and one INSERT.
+        None of them send signals, so the change log upkeep of the FormField
+        receivers is done once here; the form itself was saved by the
+        caller, which moves its updated_at (so its cached payload and
+        validator are rebuilt) and logs it.
+        """
+        if plan['deleted']:
+            # Nothing references a FormField, so skip the collector and its per-row post_delete
+            FormField.objects.filter(pk__in=plan['deleted'])._raw_delete(FormField.objects.db)
+        if plan['changed']:
+            FormField.objects.bulk_update(plan['changed'], self.FIELD_ATTRS)
+        if plan['created']:
+            for field in plan['created']:
+                field.form = form
+            FormField.objects.bulk_create(plan['created'])
+        ChangeLogEntry.objects.bulk_create(
+            ChangeLogEntry.entries(FormField, [field.pk for field in plan['changed'] + plan['created']])
+            + ChangeLogEntry.entries(FormField, plan['deleted'], action='delete'),
+            batch_size=1000,
+        )
+
     def create(self, validated_data):
-        """Handles nested field creation for a new form."""
-        fields_data = validated_data.pop('fields')
-        form = Form.objects.create(**validated_data)
-        for f_data in fields_data:
-            serializer = FormFieldSerializer(data=f_data)
-            serializer.is_valid(raise_exception=True)
-            FormField.objects.create(form=form, **serializer.validated_data)
+        """Creates the form and all of its fields in one transaction."""
+        plan = validated_data.pop('fields')
+        with transaction.atomic():
+            form = Form.objects.create(**validated_data)
+            self._write_fields(form, plan)
         return form
 
     def update(self, instance, validated_data):
-        """Updates form and replaces/updates its fields."""
-        fields_data = validated_data.pop('fields', [])
-        instance.name = validated_data.get('name', instance.name)
-        instance.description = validated_data.get('description', instance.description)
-        instance.association_type = validated_data.get('association_type', instance.association_type)
-        instance.save()
-
-        # Replace field set
-        kept_ids = {f.get('id') for f in fields_data if f.get('id')}
-        instance.fields.exclude(form_field_id__in=kept_ids).delete()
-
-        for f_data in fields_data:
-            field_id = f_data.pop('id', None)
-            if field_id:
-                field_obj = instance.fields.get(form_field_id=field_id)
-                serializer = FormFieldSerializer(instance=field_obj, data=f_data)
-                serializer.is_valid(raise_exception=True)
-                for k, v in serializer.validated_data.items():
-                    setattr(field_obj, k, v)
-                field_obj.full_clean()
-                field_obj.save()
-            else:
-                serializer = FormFieldSerializer(data=f_data)
-                serializer.is_valid(raise_exception=True)
-                FormField.objects.create(form=instance, **serializer.validated_data)
+        """Updates the form and applies the field diff built by validate()."""
+        plan = validated_data.pop('fields', None)
+        with transaction.atomic():
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
+            if plan is not None:
+                self._write_fields(instance, plan)
         return instance
 
 
 # ---------------------------------------------------------------------
 # SUBMISSION SERIALIZER
 # ---------------------------------------------------------------------
-class SubmissionSerializer(serializers.ModelSerializer):
+class SubmissionSerializer(TimedModelSerializer):
     created_by = serializers.StringRelatedField(read_only=True)
-    content_object_url = serializers.HyperlinkedRelatedField(
-        view_name='api:submission-detail', read_only=True
-    )
+    content_object = serializers.SerializerMethodField()
+    content_object_url = serializers.SerializerMethodField()
+
+    # model_name -> attribute shown as the linked object's label
+    CONTENT_OBJECT_LABELS = {'batch': 'batch', 'bag': 'qr_code'}
 
     class Meta:
         model = Submission
         fields = (
             'submission_id', 'form', 'content_type', 'object_id',
-            'data', 'created_at', 'created_by', 'content_object_url'
+            'data', 'created_at', 'updated_at', 'created_by', 'content_object', 'content_object_url'
         )
-        read_only_fields = ('submission_id', 'created_at', 'created_by', 'content_object_url')
+        read_only_fields = (
+            'submission_id', 'created_at', 'updated_at', 'created_by', 'content_object', 'content_object_url'
+        )
+
+    def get_content_object(self, obj):
+        """A short summary of the linked batch or bag (prefetched on lists)."""
+        target = obj.content_object
+        if target is None:
+            return None
+        model_name = target._meta.model_name
+        return {
+            'type': model_name,
+            'id': target.pk,
+            'label': getattr(target, self.CONTENT_OBJECT_LABELS.get(model_name, 'pk')),
+            'status': getattr(target, 'status', None),
+        }
+
+    def get_content_object_url(self, obj):
+        if obj.content_type_id is None or obj.object_id is None:
+            return None
+        model_name = ContentType.objects.get_for_id(obj.content_type_id).model
+        return reverse(f'{model_name}-detail', args=[obj.object_id], request=self.context.get('request'))
 
     # -------------------------------------------------------------
     # VALIDATION LOGIC
@@ -280,76 +395,7 @@ class SubmissionSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError("Standalone forms cannot have content objects.")
 
         # Validate submitted data
-        form_fields = {f.name: f for f in form.fields.all()}
-        submitted_keys = set(data['data'].keys())
-
-        # Extra field detection
-        extra = submitted_keys - set(form_fields.keys())
-        if extra:
-            raise serializers.ValidationError(f"Unexpected fields: {', '.join(extra)}.")
-
-        # Per-field validation
-        for field in form_fields.values():
-            name, value = field.name, data['data'].get(field.name)
-            rules = field.validation_rules or {}
-
-            # Required
-            if field.required and value is None:
-                raise serializers.ValidationError(f"Field '{name}' is required.")
-
-            # Type checks
-            if value is not None:
-                if field.field_type == 'number':
-                    try:
-                        float(value)
-                    except ValueError:
-                        raise serializers.ValidationError(f"Field '{name}' must be a number.")
-                elif field.field_type == 'date':
-                    from datetime import datetime
-                    try:
-                        datetime.strptime(value, '%Y-%m-%d')
-                    except ValueError:
-                        raise serializers.ValidationError(f"Field '{name}' must be a valid date (YYYY-MM-DD).")
-                elif field.field_type == 'boolean' and not isinstance(value, bool):
-                    raise serializers.ValidationError(f"Field '{name}' must be a boolean.")
-                elif field.field_type == 'email':
-                    try:
-                        validate_email(value)
-                    except ValidationError:
-                        raise serializers.ValidationError(f"Field '{name}' must be a valid email.")
-                elif field.field_type == 'url':
-                    try:
-                        URLValidator()(value)
-                    except ValidationError:
-                        raise serializers.ValidationError(f"Field '{name}' must be a valid URL.")
-
-                # Validation rules
-                if field.field_type == 'text':
-                    if 'min_length' in rules and len(value) < rules['min_length']:
-                        raise serializers.ValidationError(f"'{name}' must be ≥ {rules['min_length']} chars.")
-                    if 'max_length' in rules and len(value) > rules['max_length']:
-                        raise serializers.ValidationError(f"'{name}' exceeds {rules['max_length']} chars.")
-                    if 'regex' in rules and not re.match(rules['regex'], value):
-                        raise serializers.ValidationError(f"'{name}' does not match pattern.")
-                elif field.field_type == 'number':
-                    if 'min_value' in rules and float(value) < rules['min_value']:
-                        raise serializers.ValidationError(f"'{name}' must be ≥ {rules['min_value']}.")
-                    if 'max_value' in rules and float(value) > rules['max_value']:
-                        raise serializers.ValidationError(f"'{name}' ≤ {rules['max_value']}.")
-
-            # Choice validations
-            if field.field_type in ('select', 'radio'):
-                choices = rules.get('choices', [])
-                if choices and value not in choices:
-                    raise serializers.ValidationError(f"'{name}' must be one of: {', '.join(choices)}.")
-            elif field.field_type == 'checkbox':
-                choices = rules.get('choices', [])
-                if choices:
-                    selected = value if isinstance(value, list) else [v.strip() for v in str(value).split(',')]
-                    invalid = [v for v in selected if v not in choices]
-                    if invalid:
-                        raise serializers.ValidationError(f"'{name}' invalid choices: {', '.join(invalid)}.")
-
+        validate_linked_form_data(data, form, 'data')
         return data
 
     def create(self, validated_data):
@@ -0,0 +1,184 @@
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .authentication import invalidate_user
+from .lookups import invalidate_bag, invalidate_batch
+from .models import Batch, Bag, ChangeLogEntry, Form, FormField, Submission
+from .rollups import bag_completion_day, batch_state, record_bag_change, record_bag_completions, record_batch_change
+
+
+def _bag_state(bag):
+    return bag.get_loaded_state() or {'status': bag.status, 'completed_at': bag.completed_at}
+
+
+def _cascade_from_batch(origin):
+    """Whether a delete started from a batch (or batches), whose bags it cascades to."""
+    return isinstance(origin, Batch) or (isinstance(origin, QuerySet) and origin.model is Batch)
+
+
+def _cascade_from_form(origin):
+    """Whether a delete started from a form (or forms), whose fields and submissions it cascades to."""
+    return isinstance(origin, Form) or (isinstance(origin, QuerySet) and origin.model is Form)
+
+
+@receiver(post_delete, sender=Bag)
+def collect_cascaded_bag(sender, instance, origin=None, **kwargs):
+    """
+    Bags deleted with their batch skip the per-bag receivers below: their
+    counters go with the batch, and their rollup, change log and lookup
+    upkeep is done once per delete in flush_cascaded_bags. Bags are
+    deleted before their batches, so the batch post_delete sees them all.
+    """
+    if _cascade_from_batch(origin):
+        origin.__dict__.setdefault('_cascaded_bags', []).append(instance)
+
+
+@receiver(post_delete, sender=Batch)
+def flush_cascaded_bags(sender, instance, origin=None, **kwargs):
+    bags = origin.__dict__.pop('_cascaded_bags', None) if origin is not None else None
+    if not bags:
+        return
+    days = Counter(bag_completion_day(_bag_state(bag)) for bag in bags)
+    record_bag_completions({day: -count for day, count in days.items()})
+    ChangeLogEntry.record(Bag, [bag.pk for bag in bags], action='delete')
+    # The collector loaded the bags for the delete, so qr_code is the stored one
+    invalidate_bag(*(bag.qr_code for bag in bags))
+
+
+@receiver(post_delete, sender=Bag)
+def decrement_batch_bag_counters(sender, instance, origin=None, **kwargs):
+    """Keeps Batch bag counters in sync for single and queryset deletes."""
+    if _cascade_from_batch(origin):
+        return
+    Batch.adjust_bag_counters(instance.batch_id, instance.status, -1)
+
+
+@receiver(post_delete, sender=FormField)
+@receiver(post_delete, sender=Submission)
+def collect_cascaded_form_row(sender, instance, origin=None, **kwargs):
+    """
+    Fields and submissions deleted with their form skip the per-row
+    receivers (touching and logging the form, their own change log
+    entries); flush_cascaded_form_rows logs them in one INSERT. They are
+    deleted before their forms, so the form post_delete sees them all.
+    """
+    if _cascade_from_form(origin):
+        origin.__dict__.setdefault('_cascaded_form_rows', []).append((sender, instance.pk))
+
+
+@receiver(post_delete, sender=Form)
+def flush_cascaded_form_rows(sender, instance, origin=None, **kwargs):
+    rows = origin.__dict__.pop('_cascaded_form_rows', None) if origin is not None else None
+    if not rows:
+        return
+    ChangeLogEntry.objects.bulk_create([
+        entry for model in (FormField, Submission)
+        for entry in ChangeLogEntry.entries(model, [pk for sender, pk in rows if sender is model], action='delete')
+    ], batch_size=1000)
+
+
+@receiver(pre_delete, sender=Form)
+def log_batches_and_bags_losing_form(sender, instance, **kwargs):
+    """
+    Deleting a form sets form to NULL on its batches and bags with one
+    UPDATE and no signals, so bump their updated_at (ETags) and log them.
+    """
+    now = timezone.now()
+    for model in (Batch, Bag):
+        ids = list(model.objects.filter(form=instance).values_list('pk', flat=True))
+        if ids:
+            model.objects.filter(pk__in=ids).update(updated_at=now)
+            ChangeLogEntry.record(model, ids)
+
+
+@receiver([post_save, post_delete], sender=FormField)
+def invalidate_form_on_field_change(sender, instance, origin=None, **kwargs):
+    if _cascade_from_form(origin):
+        return
+    # The form's representation nests its fields, so its updated_at (the
+    # version its cached payload and validator are keyed by, and its ETag) moves too
+    Form.objects.filter(pk=instance.form_id).update(updated_at=timezone.now())
+    ChangeLogEntry.record(Form, [instance.form_id])
+
+
+@receiver([post_save, post_delete], sender=Bag)
+def invalidate_bag_lookup(sender, instance, origin=None, **kwargs):
+    if _cascade_from_batch(origin):
+        return
+    loaded = instance.get_loaded_state() or {}
+    invalidate_bag(instance.qr_code, loaded.get('qr_code'))
+
+
+@receiver([post_save, post_delete], sender=Batch)
+def invalidate_batch_lookup(sender, instance, **kwargs):
+    invalidate_batch(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=get_user_model())
+def invalidate_cached_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+@receiver(m2m_changed, sender=get_user_model().groups.through)
+@receiver(m2m_changed, sender=get_user_model().user_permissions.through)
+def invalidate_cached_user_access(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        invalidate_user(instance.pk)
+        return
+    # From the group/permission side: pk_set holds user ids, except on clear
+    user_ids = pk_set if action != 'pre_clear' else instance.user_set.values_list('pk', flat=True)
+    for user_id in user_ids:
+        invalidate_user(user_id)
+
+
+@receiver(post_save, sender=Batch)
+def update_batch_rollups(sender, instance, created, **kwargs):
+    # save() snapshots the new state after post_save, so this is still the old row
+    record_batch_change(None if created else instance.get_loaded_state(), batch_state(instance))
+
+
+@receiver(post_delete, sender=Batch)
+def remove_batch_from_rollups(sender, instance, **kwargs):
+    record_batch_change(instance.get_loaded_state() or batch_state(instance), None)
+
+
+@receiver(post_save, sender=Bag)
+def update_bag_rollups(sender, instance, created, **kwargs):
+    new = {'status': instance.status, 'completed_at': instance.completed_at}
+    record_bag_change(None if created else instance.get_loaded_state(), new)
+
+
+@receiver(post_delete, sender=Bag)
+def remove_bag_from_rollups(sender, instance, origin=None, **kwargs):
+    if _cascade_from_batch(origin):
+        return
+    record_bag_change(_bag_state(instance), None)
+
+
+@receiver(post_save, sender=Batch)
+@receiver(post_save, sender=Bag)
+@receiver(post_save, sender=Form)
+@receiver(post_save, sender=FormField)
+@receiver(post_save, sender=Submission)
+def log_saved_change(sender, instance, **kwargs):
+    ChangeLogEntry.record(sender, [instance.pk])
+
+
+@receiver(post_delete, sender=Batch)
+@receiver(post_delete, sender=Bag)
+@receiver(post_delete, sender=Form)
+@receiver(post_delete, sender=FormField)
+@receiver(post_delete, sender=Submission)
+def log_deleted_change(sender, instance, origin=None, **kwargs):
+    if sender is Bag and _cascade_from_batch(origin):
+        return
+    if sender in (FormField, Submission) and _cascade_from_form(origin):
+        return
+    ChangeLogEntry.record(sender, [instance.pk], action='delete')
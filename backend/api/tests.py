@@ -1,11 +1,44 @@
-from django.contrib.auth.models import User
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import Group, User
 from django.urls import reverse
 from django.utils import timezone
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.contrib import admin
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
+from importlib import import_module
+import json
+import tempfile
+import uuid
+from django.utils.translation import gettext_lazy
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase, force_authenticate
+from rest_framework_simplejwt.tokens import AccessToken
+from prometheus_client import REGISTRY
 
-from .models import Batch, Bag, Form, FormField, Submission
+from config.db_router import ReplicaRouter, choose_replica, current_route, end_route, is_pinned, start_route
+from config.middleware import RequestTimings
+
+from .benchmarks import ENDPOINTS, budget_for, measure, sample_objects
+from .changes import encode_cursor
+from .models import Batch, Bag, BagDailyRollup, BatchDailyRollup, ChangeLogEntry, Form, FormField, Submission
+from .validation import get_validator
+from .views import BatchViewSet, ExportView
+from .lookups import _qr_key, lookup_cache
+from .parsers import FastJSONParser, NDJSONParser
+from .renderers import FastJSONRenderer
+from .seed import Seeder
 
 
 class BaseSetup(APITestCase):
@@ -15,7 +48,8 @@ class BaseSetup(APITestCase):
         self.admin = User.objects.create_superuser(
             username='admin', password='admin123', email='admin@example.com'
         )
-        self.client.login(username='tester', password='pass123')
+        # The API only takes JWTs; force_authenticate skips the token round trip
+        self.client.force_authenticate(self.user)
 
         # A form for batch association with one required text field
         self.batch_form = Form.objects.create(
@@ -90,6 +124,40 @@ class BatchTests(BaseSetup):
         self.assertEqual(detail.status_code, status.HTTP_200_OK)
         self.assertEqual(detail.data.get('bag_counts'), 0)
 
+    def batch_statements(self, queries):
+        """SQL run against api_batch itself, leaving out the rollup upkeep."""
+        return [q['sql'].split(' ', 1)[0] for q in queries if '"api_batch"' in q['sql'].split(' WHERE ')[0]]
+
+    def test_create_is_a_single_insert(self):
+        with CaptureQueriesContext(connection) as ctx:
+            batch = Batch.objects.create(
+                user=self.user, country='Nepal', production_type='Organic',
+                production_date=timezone.now(), cluster_group='Cluster A',
+                quantity=1, uoms='kg', status='completed',
+            )
+        self.assertEqual(self.batch_statements(ctx.captured_queries), ['INSERT'])
+        self.assertEqual(batch.batch, f'BTCH-{batch.batch_id:04d}')
+        self.assertIsNotNone(batch.completed_at)
+
+    def test_completion_detected_without_pre_read(self):
+        batch = Batch.objects.get(pk=self.batch.pk)
+        batch.status = 'completed'
+        with CaptureQueriesContext(connection) as ctx:
+            batch.save()
+        self.assertEqual(self.batch_statements(ctx.captured_queries), ['UPDATE'])
+        self.assertIsNotNone(Batch.objects.get(pk=batch.pk).completed_at)
+
+        # Saving again does not move the completion time
+        stamped = batch.completed_at
+        batch.country = 'India'
+        batch.save()
+        self.assertEqual(batch.completed_at, stamped)
+
+    def test_update_fields_save_persists_completion(self):
+        self.batch.status = 'completed'
+        self.batch.save(update_fields=['status'])
+        self.assertIsNotNone(Batch.objects.get(pk=self.batch.pk).completed_at)
+
     def test_batch_patch_denied_when_completed_for_non_admin(self):
         # Mark existing batch completed directly
         self.batch.status = 'completed'
@@ -105,8 +173,7 @@ class BatchTests(BaseSetup):
         self.batch.save(update_fields=['status'])
 
         # Switch to admin user
-        self.client.logout()
-        self.client.login(username='admin', password='admin123')
+        self.client.force_authenticate(self.admin)
 
         url = reverse('batch-detail', args=[self.batch.pk])
         resp = self.client.patch(url, {'country': 'India'}, format='json')
@@ -135,7 +202,272 @@ class BagTests(BaseSetup):
         url = reverse('bag-list')
         resp = self.client.get(url)
         self.assertEqual(resp.status_code, status.HTTP_200_OK)
-        self.assertTrue(len(resp.data) >= 1)
+        self.assertTrue(len(resp.data['results']) >= 1)
+
+
+class BagBulkTests(BaseSetup):
+    def rows(self, n):
+        return [{**self.bag_payload(self.batch.pk), 'qr_code': f'QR-B{i}'} for i in range(n)]
+
+    def test_bulk_create_json(self):
+        rows = self.rows(5)
+        rows[0]['status'] = 'completed'
+        resp = self.client.post(reverse('bag-bulk'), rows, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED, resp.data)
+        self.assertEqual(resp.data['created'], 5)
+        self.assertEqual(Bag.objects.count(), 5)
+        self.assertIsNotNone(Bag.objects.get(pk=resp.data['results'][0]['bag_id']).completed_at)
+        self.batch.refresh_from_db()
+        self.assertEqual((self.batch.bag_count, self.batch.completed_bag_count), (5, 1))
+
+    def test_bulk_create_ndjson_validates_in_one_pass(self):
+        body = '\n'.join(json.dumps(row) for row in self.rows(20))
+        self.client.force_authenticate(self.user)
+        # Including one change log INSERT for the bags and one for their batch
+        with self.assertNumQueries(8):
+            resp = self.client.post(reverse('bag-bulk'), body, content_type='application/x-ndjson')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED, resp.data)
+        self.assertEqual(Bag.objects.count(), 20)
+
+    def test_atomic_mode_rejects_everything(self):
+        rows = self.rows(3)
+        rows[1]['batch'] = 999999
+        resp = self.client.post(reverse('bag-bulk'), rows, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(resp.data['rejected'], [1])
+        self.assertEqual(Bag.objects.count(), 0)
+
+    def test_partial_mode_keeps_valid_rows(self):
+        rows = self.rows(3)
+        del rows[2]['internal_lot_number']
+        resp = self.client.post(reverse('bag-bulk') + '?mode=partial', rows, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(resp.data['created'], 2)
+        self.assertEqual(resp.data['rejected'], [2])
+        self.assertIn('internal_lot_number', resp.data['results'][2]['errors'])
+        self.assertEqual(Bag.objects.count(), 2)
+
+
+class QRLookupTests(BaseSetup):
+    def setUp(self):
+        super().setUp()
+        lookup_cache().clear()
+        self.bag = Bag.objects.create(
+            batch=self.batch,
+            internal_lot_number='ILN-Q',
+            state='new',
+            qr_code='QR-Q1',
+            external_lot_number='ELN-Q',
+            external_update_date=timezone.now(),
+        )
+        self.client.force_authenticate(self.user)
+
+    def url(self, code):
+        return reverse('bag-by-qr', kwargs={'code': code})
+
+    def test_lookup_returns_bag_and_batch_summary(self):
+        resp = self.client.get(self.url('QR-Q1'))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['bag_id'], self.bag.pk)
+        self.assertEqual(resp.data['batch_summary']['batch'], self.batch.batch)
+
+    def test_unknown_code_is_404(self):
+        resp = self.client.get(self.url('QR-UNKNOWN'))
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_hits_are_served_from_cache_and_invalidated_on_write(self):
+        self.bag.qr_code = 'QR-Q2'
+        self.bag.save()
+        self.client.get(self.url('QR-Q2'))
+        with self.assertNumQueries(0):
+            resp = self.client.get(self.url('QR-Q2'))
+        self.assertEqual(resp.data['bag_id'], self.bag.pk)
+
+        self.bag.state = 'filled'
+        self.bag.save()
+        self.assertEqual(self.client.get(self.url('QR-Q2')).data['state'], 'filled')
+
+        self.bag.qr_code = 'QR-Q3'
+        self.bag.save()
+        self.assertEqual(self.client.get(self.url('QR-Q2')).status_code, status.HTTP_404_NOT_FOUND)
+
+        self.batch.country = 'India'
+        self.batch.save()
+        self.assertEqual(self.client.get(self.url('QR-Q3')).data['batch_summary']['country'], 'India')
+
+    def test_bulk_rejects_taken_and_repeated_codes(self):
+        rows = [
+            {**self.bag_payload(self.batch.pk), 'qr_code': 'QR-Q1'},
+            {**self.bag_payload(self.batch.pk), 'qr_code': 'QR-NEW'},
+            {**self.bag_payload(self.batch.pk), 'qr_code': 'QR-NEW'},
+        ]
+        resp = self.client.post(reverse('bag-bulk') + '?mode=partial', rows, format='json')
+        self.assertEqual(resp.data['rejected'], [0, 2])
+
+
+class BagCounterTests(BaseSetup):
+    def make_bag(self, batch, **extra):
+        return Bag.objects.create(
+            batch=batch,
+            internal_lot_number='ILN-C',
+            state='new',
+            qr_code=f'QR-C{Bag.objects.count()}',
+            external_lot_number='ELN-C',
+            external_update_date=timezone.now(),
+            **extra
+        )
+
+    def counters(self, batch):
+        batch.refresh_from_db()
+        return (batch.bag_count, batch.draft_bag_count, batch.working_bag_count, batch.completed_bag_count)
+
+    def test_counters_follow_create_move_status_and_delete(self):
+        other = Batch.objects.create(
+            user=self.user, country='India', production_type='Organic',
+            production_date=timezone.now(), cluster_group='Cluster B', quantity=1, uoms='kg',
+        )
+        bag = self.make_bag(self.batch)
+        self.make_bag(self.batch, status='working')
+        self.assertEqual(self.counters(self.batch), (2, 1, 1, 0))
+
+        bag.status = 'completed'
+        bag.save()
+        self.assertEqual(self.counters(self.batch), (2, 0, 1, 1))
+
+        bag.batch = other
+        bag.save()
+        self.assertEqual(self.counters(self.batch), (1, 0, 1, 0))
+        self.assertEqual(self.counters(other), (1, 0, 0, 1))
+
+        bag.delete()
+        Bag.objects.filter(batch=self.batch).delete()
+        self.assertEqual(self.counters(self.batch), (0, 0, 0, 0))
+        self.assertEqual(self.counters(other), (0, 0, 0, 0))
+
+    def test_batch_delete_handles_its_bags_in_bulk(self):
+        def delete_queries(bags):
+            batch = Batch.objects.create(
+                user=self.user, country='Nepal', production_type='Organic',
+                production_date=timezone.now(), cluster_group='Cluster A', quantity=1, uoms='kg',
+            )
+            made = [self.make_bag(batch, status='completed') for _ in range(bags)]
+            self.assertEqual(self.client.get(reverse('bag-by-qr', args=[made[0].qr_code])).status_code,
+                             status.HTTP_200_OK)
+            with CaptureQueriesContext(connection) as ctx:
+                batch.delete()
+            # The cached lookup and the day's completions went with the bags
+            self.assertEqual(self.client.get(reverse('bag-by-qr', args=[made[0].qr_code])).status_code,
+                             status.HTTP_404_NOT_FOUND)
+            self.assertEqual(sum(BagDailyRollup.objects.values_list('completed_count', flat=True)), 0)
+            logged = ChangeLogEntry.objects.filter(model='bag', action='delete', object_id__in=[b.pk for b in made])
+            self.assertEqual(logged.count(), bags)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(delete_queries(1), delete_queries(5))
+
+    def test_batch_list_does_not_count_per_row(self):
+        self.make_bag(self.batch)
+        url = reverse('batch-list')
+        self.client.force_authenticate(self.user)
+        resp = self.client.get(url)
+        self.assertEqual(resp.data['results'][0]['bag_counts'], 1)
+        # The page is all the ETag needs
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+    def test_rebuild_command_repairs_drift(self):
+        self.make_bag(self.batch)
+        Batch.objects.filter(pk=self.batch.pk).update(bag_count=7)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_bag_counters', '--verify', stdout=StringIO())
+        call_command('rebuild_bag_counters', stdout=StringIO())
+        self.assertEqual(self.counters(self.batch), (1, 1, 0, 0))
+        call_command('rebuild_bag_counters', '--verify', stdout=StringIO())
+
+
+class TransitionTests(BaseSetup):
+    def setUp(self):
+        super().setUp()
+        lookup_cache().clear()
+        self.bags = [
+            Bag.objects.create(
+                batch=self.batch, internal_lot_number='ILN-T', state='new', qr_code=f'QR-T{n}',
+                external_lot_number='ELN-T', external_update_date=timezone.now(), status=bag_status,
+            )
+            for n, bag_status in enumerate(['draft', 'working', 'completed'])
+        ]
+        self.client.force_authenticate(self.user)
+
+    def assertBookkeepingInSync(self):
+        call_command('rebuild_bag_counters', '--verify', stdout=StringIO())
+        call_command('rebuild_rollups', '--verify', stdout=StringIO())
+
+    def test_complete_batch_cascades_to_bags(self):
+        cached = self.client.get(reverse('bag-by-qr', args=['QR-T0'])).data
+        self.assertEqual((cached['status'], cached['batch_summary']['status']), ('draft', 'draft'))
+
+        url = reverse('batch-complete', args=[self.batch.pk])
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.post(url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data, {'batches': 1, 'bags': 2})
+        # One UPDATE for the batch and one for its bags, however many there are
+        updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "api_bag"')]
+        self.assertEqual(len(updates), 1)
+
+        self.batch.refresh_from_db()
+        self.assertEqual(self.batch.status, 'completed')
+        self.assertIsNotNone(self.batch.completed_at)
+        self.assertEqual(self.batch.completed_bag_count, 3)
+        self.assertFalse(Bag.objects.filter(completed_at__isnull=True).exists())
+        self.assertBookkeepingInSync()
+        resp = self.client.get(reverse('bag-by-qr', args=['QR-T0']))
+        self.assertEqual((resp.data['status'], resp.data['batch_summary']['status']), ('completed', 'completed'))
+
+        # Completed batches are locked for non-staff users
+        self.assertEqual(self.client.post(url).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.client.post(url).data, {'batches': 0, 'bags': 0})
+
+    def test_lookups_dropped_again_on_commit(self):
+        self.client.get(reverse('bag-by-qr', args=['QR-T0']))
+        with self.captureOnCommitCallbacks() as callbacks:
+            resp = self.client.post(reverse('batch-complete', args=[self.batch.pk]))
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            # A concurrent read before the commit re-caches the old row
+            lookup_cache().set(_qr_key('QR-T0'), {'status': 'draft'})
+        for callback in callbacks:
+            callback()
+        self.assertIsNone(lookup_cache().get(_qr_key('QR-T0')))
+
+    def test_transition_bags(self):
+        url = reverse('bag-transition')
+        draft, working, done = self.bags
+        resp = self.client.post(url, {'ids': [draft.pk, working.pk], 'status': 'working'}, format='json')
+        self.assertEqual(resp.data, {'bags': 1})
+        self.batch.refresh_from_db()
+        self.assertEqual((self.batch.draft_bag_count, self.batch.working_bag_count), (0, 2))
+
+        resp = self.client.post(url, {'ids': [draft.pk, working.pk], 'status': 'completed'}, format='json')
+        self.assertEqual(resp.data, {'bags': 2})
+        self.assertBookkeepingInSync()
+
+    def test_transition_enforces_completed_lock(self):
+        url = reverse('bag-transition')
+        draft, working, done = self.bags
+        resp = self.client.post(url, {'ids': [draft.pk, done.pk], 'status': 'working'}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(Bag.objects.filter(status='working').count(), 1)
+
+        resp = self.client.post(url, {'ids': [draft.pk, 999999], 'status': 'working'}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        resp = self.client.post(url, {'ids': [draft.pk], 'status': 'archived'}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(self.admin)
+        resp = self.client.post(url, {'ids': [draft.pk, done.pk], 'status': 'working'}, format='json')
+        self.assertEqual(resp.data, {'bags': 2})
+        self.assertBookkeepingInSync()
 
 
 class FormTests(BaseSetup):
@@ -166,6 +498,140 @@ class FormTests(BaseSetup):
         resp = self.client.get(url)
         self.assertEqual(resp.status_code, status.HTTP_200_OK)
 
+    def make_form(self, count):
+        form = Form.objects.create(name='Big', association_type='standalone')
+        FormField.objects.bulk_create(
+            FormField(form=form, name=f'f{i}', field_type='text') for i in range(count)
+        )
+        return form, list(form.fields.order_by('pk'))
+
+    def test_nested_update_applies_diff_in_bulk(self):
+        form, fields = self.make_form(100)
+        payload = {
+            'name': 'Big v2',
+            'association_type': 'standalone',
+            'fields': [
+                # 40 unchanged, 50 renamed, 1 new; fields[:10] are dropped
+                *({'form_field_id': f.pk, 'name': f.name, 'field_type': 'text'} for f in fields[10:50]),
+                *({'form_field_id': f.pk, 'name': f'{f.name}-x', 'field_type': 'text'} for f in fields[50:]),
+                {'name': 'grade', 'field_type': 'select', 'validation_rules': {'choices': ['A', 'B']}},
+            ],
+        }
+        self.client.force_authenticate(self.user)
+        # form, fields, UPDATE form, DELETE, bulk UPDATE, INSERT, response fields + savepoints, one
+        # change log INSERT for the form and one for its fields (upserts and deletes together)
+        with self.assertNumQueries(11):
+            resp = self.client.put(reverse('form-detail', args=[form.pk]), payload, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+        names = set(form.fields.values_list('name', flat=True))
+        self.assertEqual(len(names), 91)
+        self.assertNotIn('f9', names)
+        self.assertEqual(ChangeLogEntry.objects.filter(model='formfield', action='delete').count(), 10)
+        self.assertIn('f99-x', names)
+        self.assertIn('grade', get_validator(form).rules)
+
+    def test_nested_update_keeps_fields_sent_by_the_frontend(self):
+        form, fields = self.make_form(3)
+        url = reverse('form-detail', args=[form.pk])
+        editable = self.client.get(url).data
+        # The payload FormDetails.jsx builds: the form as read, fields keyed by id
+        payload = {
+            **editable,
+            'fields': [
+                {
+                    'id': f['form_field_id'], 'name': f['name'], 'description': f['description'] or '',
+                    'field_type': f['field_type'], 'required': not f['required'],
+                    'validation_rules': f['validation_rules'] or {},
+                }
+                for f in editable['fields'][1:]
+            ],
+        }
+        resp = self.client.put(url, payload, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+        self.assertEqual([f['form_field_id'] for f in resp.data['fields']], [f.pk for f in fields[1:]])
+        self.assertEqual(list(form.fields.order_by('pk').values_list('pk', 'required')),
+                         [(fields[1].pk, True), (fields[2].pk, True)])
+        self.assertTrue(ChangeLogEntry.objects.filter(model='formfield', object_id=fields[0].pk,
+                                                      action='delete').exists())
+
+    def test_form_delete_logs_its_fields_and_submissions_in_bulk(self):
+        form, fields = self.make_form(3)
+        submission = Submission.objects.create(form=form, data={})
+        ChangeLogEntry.objects.all().delete()
+        resp = self.client.delete(reverse('form-detail', args=[form.pk]))
+        self.assertEqual(resp.status_code, status.HTTP_204_NO_CONTENT)
+        logged = set(ChangeLogEntry.objects.values_list('model', 'object_id', 'action'))
+        self.assertEqual(logged, {
+            ('form', form.pk, 'delete'), ('submission', submission.pk, 'delete'),
+            *(('formfield', field.pk, 'delete') for field in fields),
+        })
+
+    def test_partial_nested_update_keeps_unsent_attributes(self):
+        form, fields = self.make_form(2)
+        url = reverse('form-detail', args=[form.pk])
+        resp = self.client.patch(url, {'fields': [{'id': fields[0].pk, 'required': True},
+                                                  {'id': fields[1].pk}]}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+        field = FormField.objects.get(pk=fields[0].pk)
+        self.assertEqual((field.name, field.field_type, field.required), (fields[0].name, fields[0].field_type, True))
+
+        # New fields still need a name and a type
+        resp = self.client.patch(url, {'fields': [{'id': fields[0].pk}, {'required': True}]}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(resp.data['fields'][1]), {'name', 'field_type'})
+        self.assertEqual(form.fields.count(), 2)
+
+    def test_nested_update_reports_errors_per_field_without_writing(self):
+        form, fields = self.make_form(3)
+        payload = {
+            'name': 'Big v2',
+            'association_type': 'standalone',
+            'fields': [
+                {'form_field_id': fields[0].pk, 'name': 'renamed', 'field_type': 'text'},
+                {'form_field_id': 999999, 'name': 'ghost', 'field_type': 'text'},
+                {'name': 'renamed', 'field_type': 'text'},
+            ],
+        }
+        resp = self.client.put(reverse('form-detail', args=[form.pk]), payload, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = resp.data['fields']
+        self.assertEqual(errors[0], {})
+        self.assertIn('form_field_id', errors[1])
+        self.assertIn('name', errors[2])
+        self.assertEqual(sorted(form.fields.values_list('name', flat=True)), ['f0', 'f1', 'f2'])
+        form.refresh_from_db()
+        self.assertEqual(form.name, 'Big')
+
+    def test_patch_without_fields_keeps_them(self):
+        form, _ = self.make_form(2)
+        resp = self.client.patch(reverse('form-detail', args=[form.pk]), {'name': 'Renamed'}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+        self.assertEqual(form.fields.count(), 2)
+
+    def test_form_detail_is_cached_until_a_field_changes(self):
+        url = reverse('form-detail', args=[self.batch_form.pk])
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get(url).data['fields'][0]['required'], True)
+        # Only the form's version is read
+        with self.assertNumQueries(1):
+            resp = self.client.get(url)
+        self.assertEqual(resp.data['name'], 'Batch Form')
+
+        self.batch_field.required = False
+        self.batch_field.save()
+        self.assertEqual(self.client.get(url).data['fields'][0]['required'], False)
+        self.assertFalse(get_validator(self.batch_form.pk).rules['name_field'].required)
+        self.assertEqual(self.client.get(reverse('form-detail', args=[9999])).status_code,
+                         status.HTTP_404_NOT_FOUND)
+
+    def test_form_list_reads_cached_payloads(self):
+        self.client.force_authenticate(self.user)
+        resp = self.client.get(reverse('form-list'))
+        self.assertEqual(resp.data['results'][0]['fields'][0]['name'], 'name_field')
+        # The page; nested fields come from the cache
+        with self.assertNumQueries(1):
+            self.client.get(reverse('form-list'))
+
 
 class SubmissionTests(BaseSetup):
     def test_create_submission_valid_for_batch_form(self):
@@ -237,13 +703,714 @@ class SubmissionTests(BaseSetup):
         resp = self.client.get(f"{url}?form={self.batch_form.form_id}&association_type=batch")
         self.assertEqual(resp.status_code, status.HTTP_200_OK)
         # Should only return the batch-associated submission
-        self.assertTrue(all(item['form'] == self.batch_form.form_id for item in resp.data))
+        self.assertTrue(all(item['form'] == self.batch_form.form_id for item in resp.data['results']))
 
         # Filter by bag association
         resp2 = self.client.get(f"{url}?association_type=bag")
         self.assertEqual(resp2.status_code, status.HTTP_200_OK)
-        self.assertTrue(len(resp2.data) >= 1)
-        self.assertTrue(all(item['form'] == bag_form.form_id for item in resp2.data))
+        self.assertTrue(len(resp2.data['results']) >= 1)
+        self.assertTrue(all(item['form'] == bag_form.form_id for item in resp2.data['results']))
+
+    def test_generic_key_filters_and_nested_route(self):
+        ct = ContentType.objects.get_for_model(Batch)
+        other = Batch.objects.create(
+            user=self.user, country='Nepal', production_type='Organic', production_date=timezone.now(),
+            cluster_group='Cluster A', quantity=1, uoms='kg',
+        )
+        mine = Submission.objects.create(form=self.batch_form, content_type=ct, object_id=self.batch.pk,
+                                         data={'name_field': 'valid'})
+        Submission.objects.create(form=self.batch_form, content_type=ct, object_id=other.pk,
+                                  data={'name_field': 'valid'})
+
+        resp = self.client.get(reverse('submission-list'), {'content_type': 'batch', 'object_id': self.batch.pk})
+        self.assertEqual([r['submission_id'] for r in resp.data['results']], [mine.pk])
+        self.assertEqual(resp.data['results'][0]['content_object'],
+                         {'type': 'batch', 'id': self.batch.pk, 'label': self.batch.batch, 'status': 'draft'})
+        self.assertTrue(resp.data['results'][0]['content_object_url'].endswith(f'/batches/{self.batch.pk}/'))
+
+        resp = self.client.get(reverse('batch-submissions', args=[self.batch.pk]))
+        self.assertEqual([r['submission_id'] for r in resp.data['results']], [mine.pk])
+        self.assertEqual(self.client.get(reverse('submission-list'), {'object_id': 'x'}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+    def test_list_resolves_content_objects_per_type(self):
+        bag_form = Form.objects.create(name='Bag Form', association_type='bag')
+        batch_ct = ContentType.objects.get_for_model(Batch)
+        bag_ct = ContentType.objects.get_for_model(Bag)
+        for i in range(5):
+            bag = Bag.objects.create(batch=self.batch, internal_lot_number=f'L{i}', state='new',
+                                     qr_code=f'QR-S{i}', external_lot_number='E', external_update_date=timezone.now())
+            Submission.objects.create(form=bag_form, content_type=bag_ct, object_id=bag.pk, data={})
+            Submission.objects.create(form=self.batch_form, content_type=batch_ct, object_id=self.batch.pk,
+                                      data={'name_field': 'valid'}, created_by=self.user)
+        self.client.force_authenticate(self.user)
+        # The page + one query per content type; the ETag comes from the page
+        with self.assertNumQueries(3):
+            resp = self.client.get(reverse('submission-list'))
+        self.assertEqual(len(resp.data['results']), 10)
+
+    def test_validators_follow_the_linked_object(self):
+        submission = Submission.objects.create(
+            form=self.batch_form, content_object=self.batch, data={'name_field': 'valid'},
+        )
+        for url in (reverse('submission-detail', args=[submission.pk]), reverse('submission-list')):
+            etag = self.client.get(url)['ETag']
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+            # The embedded summary shows the batch status
+            Batch.objects.filter(pk=self.batch.pk).update(status='working', updated_at=timezone.now())
+            resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            Batch.objects.filter(pk=self.batch.pk).update(status='draft', updated_at=timezone.now())
+
+
+class PaginationTests(BaseSetup):
+    def setUp(self):
+        super().setUp()
+        for i in range(4):
+            Bag.objects.create(
+                batch=self.batch,
+                internal_lot_number=f'ILN-P{i}',
+                state='new',
+                qr_code=f'QR-P{i}',
+                external_lot_number=f'ELN-P{i}',
+                external_update_date=timezone.now(),
+            )
+        # Force identical timestamps so the pk tie-breaker is exercised
+        Bag.objects.update(created_at=timezone.now())
+
+    def test_keyset_pages_walk_forward_and_back(self):
+        url = reverse('bag-list')
+        first = self.client.get(url, {'page_size': 3})
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(first.data['results']), 3)
+        self.assertIsNone(first.data['previous'])
+        self.assertNotIn('count', first.data)
+
+        second = self.client.get(first.data['next'])
+        self.assertEqual(len(second.data['results']), 1)
+        self.assertIsNone(second.data['next'])
+        ids = [b['bag_id'] for b in first.data['results'] + second.data['results']]
+        self.assertEqual(ids, sorted(Bag.objects.values_list('pk', flat=True)))
+
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(back.data['results'], first.data['results'])
+
+    def test_cursor_seeks_with_a_leading_index_bound(self):
+        url = reverse('bag-list')
+        first = self.client.get(url, {'page_size': 2})
+        for link, operator in ((first.data['next'], '>='), (self.client.get(first.data['next']).data['previous'], '<=')):
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get(link)
+            page = [q['sql'] for q in ctx.captured_queries if 'LIMIT' in q['sql'] and 'FROM "api_bag"' in q['sql']]
+            self.assertIn(f'"api_bag"."created_at" {operator}', page[-1])
+
+    def test_optional_counts(self):
+        url = reverse('bag-list')
+        resp = self.client.get(url, {'page_size': 1, 'count': 'exact'})
+        self.assertEqual(resp.data['count'], 4)
+        self.assertFalse(resp.data['count_is_estimate'])
+        resp = self.client.get(url, {'page_size': 1, 'count': 'estimate'})
+        self.assertTrue(resp.data['count_is_estimate'])
+
+    def test_invalid_cursor_returns_404(self):
+        resp = self.client.get(reverse('bag-list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ValidationEngineTests(BaseSetup):
+    def setUp(self):
+        super().setUp()
+        FormField.objects.create(
+            form=self.batch_form, name='grade', field_type='select',
+            validation_rules={'choices': ['A', 'B']}
+        )
+        FormField.objects.create(
+            form=self.batch_form, name='moisture', field_type='number',
+            validation_rules={'min_value': 0, 'max_value': 20}
+        )
+        FormField.objects.create(
+            form=self.batch_form, name='code', field_type='text',
+            validation_rules={'regex': r'^[A-Z]{3}$'}
+        )
+
+    def test_reports_all_field_errors_at_once(self):
+        errors = get_validator(self.batch_form).errors(
+            {'grade': 'C', 'moisture': 40, 'code': 'abc', 'extra': 1}
+        )
+        self.assertEqual(set(errors), {'name_field', 'grade', 'moisture', 'code', 'extra'})
+
+    def test_validator_is_compiled_once_and_invalidated_on_change(self):
+        first = get_validator(self.batch_form.pk)
+        # Only the form's version is read
+        with self.assertNumQueries(1):
+            self.assertIs(get_validator(self.batch_form.pk), first)
+        FormField.objects.filter(form=self.batch_form, name='grade').first().delete()
+        self.assertIsNot(get_validator(self.batch_form.pk), first)
+        self.assertNotIn('grade', get_validator(Form.objects.get(pk=self.batch_form.pk)).rules)
+
+    def test_writes_from_other_processes_are_seen(self):
+        first = get_validator(self.batch_form.pk)
+        # What another worker's write leaves behind: new rows and a later
+        # updated_at, but none of this process's signals or cache entries
+        FormField.objects.filter(form=self.batch_form, name='grade')._raw_delete('default')
+        Form.objects.filter(pk=self.batch_form.pk).update(updated_at=timezone.now())
+        self.assertIsNot(get_validator(self.batch_form.pk), first)
+        self.assertNotIn('grade', get_validator(self.batch_form.pk).rules)
+        self.assertNotIn('grade', [f['name'] for f in self.client.get(
+            reverse('form-detail', args=[self.batch_form.pk])).data['fields']])
+
+    def test_serializer_errors_are_keyed_by_field(self):
+        payload = {
+            **self.batch_payload(),
+            'form': self.batch_form.form_id,
+            'form_data': {'name_field': 'x', 'grade': 'Z'},
+        }
+        resp = self.client.post(reverse('batch-list'), payload, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(resp.data['form_data']), {'name_field', 'grade'})
+
+
+class FilterTests(BaseSetup):
+    def setUp(self):
+        super().setUp()
+        self.other = Batch.objects.create(
+            user=self.admin, country='India', production_type='Conventional',
+            production_date=timezone.now() - timezone.timedelta(days=10),
+            cluster_group='Cluster B', quantity=5, uoms='kg', status='working',
+        )
+
+    def ids(self, resp):
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+        return [row['batch_id'] for row in resp.data['results']]
+
+    def test_exact_and_multi_value_filters(self):
+        url = reverse('batch-list')
+        self.assertEqual(self.ids(self.client.get(url, {'country': 'India'})), [self.other.pk])
+        self.assertEqual(self.ids(self.client.get(url, {'user': self.user.pk})), [self.batch.pk])
+        self.assertEqual(
+            sorted(self.ids(self.client.get(url, {'status': 'draft,working'}))),
+            sorted([self.batch.pk, self.other.pk])
+        )
+        self.assertEqual(self.client.get(url, {'user': 'abc'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_columns_are_trigram_indexed(self):
+        indexes = import_module('api.migrations.0016_batch_search_trgm_indexes').TRGM_INDEXES
+        columns = {column for _, column in indexes}
+        self.assertEqual(columns, set(BatchViewSet.search_fields))
+        self.assertEqual(columns, set(admin.site._registry[Batch].search_fields))
+
+    def test_date_range_and_search(self):
+        url = reverse('batch-list')
+        since = (timezone.now() - timezone.timedelta(days=1)).date().isoformat()
+        self.assertEqual(self.ids(self.client.get(url, {'production_date_after': since})), [self.batch.pk])
+        self.assertEqual(self.ids(self.client.get(url, {'search': 'conven'})), [self.other.pk])
+
+    def test_ordering_pages_through_keyset(self):
+        url = reverse('batch-list')
+        resp = self.client.get(url, {'ordering': '-quantity', 'page_size': 1})
+        self.assertEqual(self.ids(resp), [self.batch.pk])
+        self.assertEqual(self.ids(self.client.get(resp.data['next'])), [self.other.pk])
+        self.assertEqual(self.client.get(url, {'ordering': 'form_data'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bag_filters(self):
+        Bag.objects.create(
+            batch=self.other, internal_lot_number='LOT-9', state='new', qr_code='QR-F1',
+            external_lot_number='E-9', external_update_date=timezone.now(),
+        )
+        resp = self.client.get(reverse('bag-list'), {'batch': self.other.pk, 'internal_lot_number': 'LOT-9'})
+        self.assertEqual(len(resp.data['results']), 1)
+        resp = self.client.get(reverse('bag-list'), {'batch': self.batch.pk})
+        self.assertEqual(resp.data['results'], [])
+
+
+class FormDataFilterTests(BaseSetup):
+    def setUp(self):
+        super().setUp()
+        self.form = Form.objects.create(name='Grading', association_type='standalone')
+        FormField.objects.create(form=self.form, name='grade', field_type='select',
+                                 validation_rules={'choices': ['A', 'B']})
+        FormField.objects.create(form=self.form, name='moisture', field_type='number')
+        self.dry = Submission.objects.create(form=self.form, data={'grade': 'A', 'moisture': 9.5})
+        self.wet = Submission.objects.create(form=self.form, data={'grade': 'A', 'moisture': 14})
+        Submission.objects.create(form=self.form, data={'grade': 'B', 'moisture': 8})
+
+    def ids(self, params):
+        resp = self.client.get(reverse('submission-list'), {'form': self.form.pk, **params})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+        return sorted(row['submission_id'] for row in resp.data['results'])
+
+    def test_exact_and_range_lookups(self):
+        self.assertEqual(self.ids({'data__grade': 'A', 'data__moisture__lt': '12'}), [self.dry.pk])
+        self.assertEqual(self.ids({'data__moisture__gte': '9.5', 'data__grade__in': 'A,B'}),
+                         sorted([self.dry.pk, self.wet.pk]))
+
+    def test_numeric_strings_are_stored_and_matched_as_numbers(self):
+        url = reverse('submission-list')
+        resp = self.client.post(url, {'form': self.form.pk, 'data': {'grade': 'B', 'moisture': '12'}}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED, resp.data)
+        self.assertEqual(Submission.objects.get(pk=resp.data['submission_id']).data['moisture'], 12)
+        self.assertEqual(self.ids({'data__moisture': '12.0'}), [resp.data['submission_id']])
+        self.assertEqual(self.ids({'data__moisture__in': '12,14'}), sorted([self.wet.pk, resp.data['submission_id']]))
+        resp = self.client.post(url, {'form': self.form.pk, 'data': {'moisture': 'NaN'}}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_filters_are_rejected(self):
+        url = reverse('submission-list')
+        for params in (
+            {'form': self.form.pk, 'data__colour': 'red'},
+            {'form': self.form.pk, 'data__grade__lt': 'B'},
+            {'form': self.form.pk, 'data__moisture': 'wet'},
+            {'data__grade': 'A'},
+        ):
+            self.assertEqual(self.client.get(url, params).status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_batch_form_data_filter(self):
+        resp = self.client.get(reverse('batch-list'), {'form': self.batch_form.pk, 'form_data__name_field': 'valid'})
+        self.assertEqual([row['batch_id'] for row in resp.data['results']], [self.batch.pk])
+
+    def test_index_command_dry_run(self):
+        out = StringIO()
+        call_command('create_json_indexes', '--dry-run', '--form', self.form.pk, stdout=out)
+        self.assertIn("((\"data\" -> 'moisture'))", out.getvalue())
+        self.assertNotIn("'grade'", out.getvalue())
+
+
+class ConditionalGetTests(BaseSetup):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def test_detail_returns_304_until_changed(self):
+        url = reverse('batch-detail', args=[self.batch.pk])
+        resp = self.client.get(url)
+        etag = resp['ETag']
+        self.assertIn('Last-Modified', resp)
+
+        with self.assertNumQueries(1):
+            resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Bag.objects.create(batch=self.batch, internal_lot_number='L', state='new', qr_code='QR-E1',
+                           external_lot_number='E', external_update_date=timezone.now())
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['bag_counts'], 1)
+
+    def test_list_etag_tracks_changes_and_query(self):
+        url = reverse('batch-list')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+                             status.HTTP_304_NOT_MODIFIED)
+        self.assertNotEqual(self.client.get(url, {'status': 'draft'})['ETag'], etag)
+
+        Batch.objects.filter(pk=self.batch.pk).delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_form_etag_changes_with_its_fields(self):
+        url = reverse('form-detail', args=[self.batch_form.pk])
+        etag = self.client.get(url)['ETag']
+        self.batch_field.required = False
+        self.batch_field.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+
+class FastJSONTests(APITestCase):
+    def payload(self):
+        return {
+            'when': timezone.datetime(2025, 1, 2, 3, 4, 5, 678000, tzinfo=timezone.get_fixed_timezone(0)),
+            'local': timezone.datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.get_fixed_timezone(330)),
+            'day': timezone.datetime(2025, 1, 2).date(),
+            'amount': Decimal('12.50'),
+            'label': gettext_lazy('Batch'),
+            'id': uuid.UUID('12345678123456781234567812345678'),
+            'text': 'line\u2028separator',
+            'nested': [{1: None, 'ok': True}],
+        }
+
+    def test_render_matches_standard_renderer(self):
+        data = self.payload()
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        with mock.patch('api.renderers.orjson', None):
+            self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_parser_round_trip_and_rejects_nan(self):
+        body = JSONRenderer().render(self.payload())
+        self.assertEqual(FastJSONParser().parse(BytesIO(body)), JSONParser().parse(BytesIO(body)))
+        for value in (b'NaN', b'Infinity', b'-Infinity'):
+            with self.assertRaises(ParseError):
+                FastJSONParser().parse(BytesIO(b'{"moisture": %s}' % value))
+            with mock.patch('api.parsers.orjson', None), self.assertRaises(ParseError):
+                FastJSONParser().parse(BytesIO(b'{"moisture": %s}' % value))
+        # Stricter than DRF, which reads an overflowing number as inf
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(BytesIO(b'{"moisture": 1e400}'))
+
+    def test_ndjson_parser_is_as_strict(self):
+        self.assertEqual(NDJSONParser().parse(BytesIO(b'{"a": 1}\n\n{"a": 2}\n')), [{'a': 1}, {'a': 2}])
+        self.assertEqual(NDJSONParser().parse(None), [])
+        for value in (b'NaN', b'Infinity', b'-Infinity'):
+            body = b'{"a": 1}\n{"moisture": %s}\n' % value
+            with self.assertRaisesRegex(ParseError, 'line 2'):
+                NDJSONParser().parse(BytesIO(body))
+            with mock.patch('api.parsers.orjson', None), self.assertRaisesRegex(ParseError, 'line 2'):
+                NDJSONParser().parse(BytesIO(body))
+
+    def test_non_finite_floats_render_as_null(self):
+        data = {'ratio': float('nan'), 'peak': float('inf')}
+        self.assertEqual(FastJSONRenderer().render(data), b'{"ratio":null,"peak":null}')
+        # DRF's strict renderer refuses them
+        with self.assertRaises(ValueError):
+            JSONRenderer().render(data)
+
+    def test_benchmark_command_reports_both_lists(self):
+        out = StringIO()
+        call_command('benchmark_json', '--rows', 5, '--repeat', 1, stdout=out)
+        self.assertIn('batches', out.getvalue())
+        self.assertIn('submissions', out.getvalue())
+
+
+class ReportTests(BaseSetup):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        other = Batch.objects.create(
+            user=self.user,
+            country='India',
+            production_type='Organic',
+            production_date=timezone.now(),
+            cluster_group='Cluster B',
+            quantity=50,
+            uoms='kg',
+            status='completed',
+        )
+        for i in range(3):
+            Bag.objects.create(
+                batch=other,
+                internal_lot_number=f'ILN-R{i}',
+                state='new',
+                qr_code=f'QR-R{i}',
+                external_lot_number=f'ELN-R{i}',
+                external_update_date=timezone.now(),
+            )
+        self.other = other
+
+    def test_summary_groups_in_database(self):
+        resp = self.client.get(reverse('report-list'))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            resp.data['batches-by-country'],
+            [
+                {'country': 'India', 'count': 1, 'quantity': 50},
+                {'country': 'Nepal', 'count': 1, 'quantity': 100},
+            ]
+        )
+        self.assertEqual(
+            resp.data['batches-by-production-type'],
+            [{'production_type': 'Organic', 'count': 2, 'quantity': 150}]
+        )
+        self.assertEqual(
+            resp.data['bags-per-batch'],
+            [{'batch': self.other.pk, 'batch_code': self.other.batch, 'count': 3}]
+        )
+
+    def test_filters_apply_to_batch_columns(self):
+        url = reverse('report-bags-per-batch')
+        resp = self.client.get(url, {'status': 'draft'})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data, [])
+
+        resp = self.client.get(reverse('report-batches-by-country'), {'cluster_group': 'Cluster A'})
+        self.assertEqual([row['country'] for row in resp.data], ['Nepal'])
+
+    def test_invalid_filters_rejected(self):
+        url = reverse('report-batches-by-country')
+        self.assertEqual(self.client.get(url, {'status': 'bogus'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            self.client.get(url, {'created_at_after': 'yesterday'}).status_code,
+            status.HTTP_400_BAD_REQUEST
+        )
+
+    def test_results_are_cached(self):
+        url = reverse('report-batches-by-status')
+        self.client.force_authenticate(self.user)
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            resp = self.client.get(url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+
+class RollupTests(BaseSetup):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.today = timezone.localdate()
+
+    def batch_rollups(self):
+        return set(
+            BatchDailyRollup.objects.filter(batch_count__gt=0)
+            .values_list('country', 'status', 'batch_count', 'quantity')
+        )
+
+    def completed_bags(self):
+        return dict(BagDailyRollup.objects.values_list('day', 'completed_count'))
+
+    def make_bag(self, i, **kwargs):
+        return Bag.objects.create(
+            batch=self.batch, internal_lot_number=f'ILN-U{i}', state='new', qr_code=f'QR-U{i}',
+            external_lot_number=f'ELN-U{i}', external_update_date=timezone.now(), **kwargs
+        )
+
+    def test_batch_changes_move_between_rollup_rows(self):
+        self.assertEqual(self.batch_rollups(), {('Nepal', 'draft', 1, 100)})
+
+        self.batch.quantity = 120
+        self.batch.save()
+        self.assertEqual(self.batch_rollups(), {('Nepal', 'draft', 1, 120)})
+
+        batch = Batch.objects.get(pk=self.batch.pk)
+        batch.status = 'completed'
+        batch.country = 'India'
+        batch.save()
+        self.assertEqual(self.batch_rollups(), {('India', 'completed', 1, 120)})
+
+        batch.delete()
+        self.assertEqual(self.batch_rollups(), set())
+
+    def test_batch_saved_without_loaded_state_reads_previous_values(self):
+        fresh = Batch.objects.only('pk').get(pk=self.batch.pk)
+        fresh.status = 'working'
+        fresh.save(update_fields=['status'])
+        self.assertEqual(self.batch_rollups(), {('Nepal', 'working', 1, 100)})
+
+    def test_bag_completion_counted_per_day(self):
+        bag = self.make_bag(1)
+        self.assertEqual(self.completed_bags(), {})
+
+        bag.status = 'completed'
+        bag.save()
+        self.assertEqual(self.completed_bags(), {self.today: 1})
+
+        # Already completed bags inserted in bulk count too
+        resp = self.client.post(
+            reverse('bag-bulk'),
+            [{**self.bag_payload(self.batch.pk), 'qr_code': 'QR-U2', 'status': 'completed'}],
+            format='json',
+        )
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED, resp.data)
+        self.assertEqual(self.completed_bags(), {self.today: 2})
+
+        bag.status = 'working'
+        bag.save()
+        Bag.objects.get(qr_code='QR-U2').delete()
+        self.assertEqual(self.completed_bags(), {self.today: 0})
+
+    def test_reports_read_rollups(self):
+        self.make_bag(1, status='completed')
+        resp = self.client.get(reverse('report-batches-daily'))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data, [{
+            'day': self.today, 'status': 'draft', 'cluster_group': 'Cluster A', 'country': 'Nepal',
+            'production_type': 'Organic', 'count': 1, 'quantity': 100,
+        }])
+        resp = self.client.get(reverse('report-bags-completed-daily'))
+        self.assertEqual(resp.data, [{'day': self.today, 'count': 1}])
+
+        # Rollup and fact table answers agree; created_at filters need the fact table
+        url = reverse('report-batches-by-country')
+        with CaptureQueriesContext(connection) as ctx:
+            by_rollup = self.client.get(url, {'production_date_after': str(self.today)})
+        self.assertFalse([q for q in ctx.captured_queries if '"api_batch"' in q['sql']])
+        by_scan = self.client.get(url, {'created_at_after': str(self.today)})
+        self.assertEqual(by_rollup.data, by_scan.data)
+        self.assertEqual(by_rollup.data, [{'country': 'Nepal', 'count': 1, 'quantity': 100}])
+
+        # With batch filters, completed bags come from the Bag table
+        resp = self.client.get(reverse('report-bags-completed-daily'), {'country': 'India'})
+        self.assertEqual(resp.data, [])
+
+    def test_rebuild_command_backfills_and_verifies(self):
+        self.make_bag(1, status='completed')
+        BatchDailyRollup.objects.all().delete()
+        BagDailyRollup.objects.update(completed_count=5)
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_rollups', '--verify', stdout=StringIO())
+
+        call_command('rebuild_rollups', stdout=StringIO())
+        self.assertEqual(self.batch_rollups(), {('Nepal', 'draft', 1, 100)})
+        self.assertEqual(self.completed_bags(), {self.today: 1})
+        call_command('rebuild_rollups', '--verify', stdout=StringIO())
+
+
+class RequestTimingTests(BaseSetup):
+    def timings(self, response):
+        metrics = {}
+        for metric in response['Server-Timing'].split(', '):
+            name, *params = metric.split(';')
+            metrics[name] = dict(p.split('=', 1) for p in params)
+        return metrics
+
+    def test_server_timing_header(self):
+        self.client.force_authenticate(self.user)
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse('batch-list'))
+        metrics = self.timings(resp)
+        self.assertEqual(set(metrics), {'total', 'db', 'serializer'})
+        self.assertEqual(metrics['db']['desc'], f'"{len(ctx.captured_queries)} queries"')
+        self.assertLessEqual(float(metrics['serializer']['dur']), float(metrics['total']['dur']))
+
+    def test_nested_serializers_timed_once(self):
+        timings = RequestTimings()
+        with timings.span('serializer'):
+            with timings.span('serializer'):
+                pass
+        self.assertEqual(list(timings.spans), ['serializer'])
+
+    @override_settings(SLOW_REQUEST_MS=0, SLOW_REQUEST_QUERIES=2)
+    def test_slow_requests_logged_with_slowest_queries(self):
+        with self.assertLogs('config.requests', 'WARNING') as logs:
+            resp = self.client.patch(reverse('batch-detail', args=[self.batch.pk]), {'quantity': 3}, format='json')
+        record = logs.records[0].request_timing
+        self.assertEqual(record['path'], reverse('batch-detail', args=[self.batch.pk]))
+        self.assertEqual(record['status'], resp.status_code)
+        self.assertGreater(record['query_count'], 2)
+        self.assertEqual(len(record['slowest_queries']), 2)
+        self.assertGreaterEqual(record['slowest_queries'][0]['ms'], record['slowest_queries'][1]['ms'])
+        self.assertIn('"total_ms"', logs.output[0])
+
+    @override_settings(SLOW_REQUEST_MS=60000)
+    def test_fast_requests_not_logged(self):
+        with self.assertNoLogs('config.requests', 'WARNING'):
+            self.client.get(reverse('batch-list'))
+
+
+class MetricsTests(BaseSetup):
+    def sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_requests_counted_per_action(self):
+        labels = {'action': 'batch-list', 'method': 'GET'}
+        before = self.sample('api_requests_total', status='200', **labels)
+        latency = self.sample('api_request_duration_seconds_count', **labels)
+        self.client.get(reverse('batch-list'))
+        self.client.get(reverse('batch-list'))
+        self.assertEqual(self.sample('api_requests_total', status='200', **labels), before + 2)
+        self.assertEqual(self.sample('api_request_duration_seconds_count', **labels), latency + 2)
+
+        resp = self.client.get('/metrics')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(resp['Content-Type'].startswith('text/plain'))
+        body = resp.content.decode()
+        self.assertIn('api_requests_total{action="batch-list",method="GET",status="200"}', body)
+        self.assertIn('api_db_queries_per_request_bucket{action="batch-list"', body)
+        self.assertIn('api_table_rows{table="api_batch"} 1.0', body)
+
+    def test_cache_hits_and_misses(self):
+        cache.clear()
+        hits, misses = (self.sample('api_cache_lookups_total', cache='reports', result=r) for r in ('hit', 'miss'))
+        url = reverse('report-batches-by-status')
+        self.client.get(url)
+        self.client.get(url)
+        self.assertEqual(self.sample('api_cache_lookups_total', cache='reports', result='miss'), misses + 1)
+        self.assertEqual(self.sample('api_cache_lookups_total', cache='reports', result='hit'), hits + 1)
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_token_required_when_configured(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        resp = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+    def test_multiprocess_directory_is_aggregated(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.dict('os.environ', {'PROMETHEUS_MULTIPROC_DIR': directory}):
+            resp = self.client.get('/metrics')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        # Only what the worker files hold, plus the row counts read at scrape time
+        self.assertNotIn('python_gc_objects_collected_total', resp.content.decode())
+        self.assertIn('api_table_rows{table="api_bag"} 0.0', resp.content.decode())
+
+
+class QueryBudgetTests(APITestCase):
+    """Every action in benchmarks.ENDPOINTS stays within its query budget on seeded data."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin', password='admin123', email='admin@example.com')
+        self.client.force_authenticate(self.admin)
+        self.counts = Seeder(seed=1).seed(
+            batches=12, bags_per_batch=4, forms=4, fields_per_form=6, submissions=80, users=[self.admin]
+        )
+        self.sample = sample_objects()
+
+    def test_actions_within_budget(self):
+        for endpoint in ENDPOINTS:
+            with self.subTest(endpoint.name):
+                result = measure(self.client, endpoint, self.sample, page_size=10)
+                self.assertEqual(result.status, endpoint.status)
+                self.assertLessEqual(result.queries, budget_for(endpoint, self.sample))
+
+    def test_list_queries_constant_in_page_size(self):
+        for endpoint in ENDPOINTS:
+            if not endpoint.paginated:
+                continue
+            with self.subTest(endpoint.name):
+                small = measure(self.client, endpoint, self.sample, page_size=2)
+                large = measure(self.client, endpoint, self.sample, page_size=50)
+                self.assertEqual(small.queries, large.queries)
+
+    def test_seeded_data_is_consistent(self):
+        self.assertEqual(Batch.objects.count(), 12)
+        self.assertEqual(Submission.objects.count(), self.counts['submissions'])
+        # bulk-created rows still get their counters and rollups
+        call_command('rebuild_bag_counters', '--verify', stdout=StringIO())
+        call_command('rebuild_rollups', '--verify', stdout=StringIO())
+        for submission in Submission.objects.select_related('form')[:20]:
+            submission.full_clean()
+
+    def test_benchmark_command_reports_every_action(self):
+        out = StringIO()
+        call_command('benchmark_api', '--repeat', '1', '--page-size', '5', stdout=out)
+        for endpoint in ENDPOINTS:
+            self.assertIn(endpoint.name, out.getvalue())
+
+
+class ExportTests(BaseSetup):
+    def read(self, resp):
+        return b''.join(resp.streaming_content).decode('utf-8')
+
+    def test_csv_export_flattens_form_data(self):
+        resp = self.client.get(reverse('export', args=['batches', 'csv']))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp['Content-Type'], 'text/csv')
+        lines = self.read(resp).splitlines()
+        header = lines[0].split(',')
+        self.assertIn('form_data.name_field', header)
+        self.assertNotIn('form_data', header)
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[1].split(',')[header.index('form_data.name_field')], 'valid')
+
+    def test_ndjson_submission_export_filters_by_form(self):
+        ct = ContentType.objects.get_for_model(Batch)
+        Submission.objects.create(
+            form=self.batch_form, content_type=ct, object_id=self.batch.pk,
+            data={'name_field': 'answer'}, created_by=self.user
+        )
+        url = reverse('export', args=['submissions', 'ndjson'])
+        rows = [json.loads(line) for line in self.read(self.client.get(url, {'form': self.batch_form.pk})).splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['data.name_field'], 'answer')
+        empty = self.read(self.client.get(url, {'form': self.batch_form.pk + 1}))
+        self.assertEqual(empty, '')
+
+    def test_unknown_export_is_404(self):
+        resp = self.client.get(reverse('export', args=['users', 'csv']))
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_export_command(self):
+        out = StringIO()
+        call_command('export_data', 'batches', '--format', 'ndjson', '--country', 'Nepal', stdout=out)
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([row['batch_id'] for row in rows], [self.batch.pk])
 
 
 class UserInfoTests(BaseSetup):
@@ -255,10 +1422,383 @@ class UserInfoTests(BaseSetup):
         self.assertFalse(resp.data['is_staff'])
 
     def test_get_user_info_admin(self):
-        self.client.logout()
-        self.client.login(username='admin', password='admin123')
+        self.client.force_authenticate(self.admin)
         url = reverse('user_info')
         resp = self.client.get(url)
         self.assertEqual(resp.status_code, status.HTTP_200_OK)
         self.assertEqual(resp.data['username'], 'admin')
         self.assertTrue(resp.data['is_staff'])
+
+    def jwt_get(self, url):
+        self.client.logout()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        return self.client.get(url)
+
+    def test_jwt_user_is_cached_until_it_changes(self):
+        url = reverse('user_info')
+        with tempfile.TemporaryDirectory() as directory, override_settings(CACHES={
+            **settings.CACHES,
+            'users': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory},
+        }):
+            self.assertFalse(self.jwt_get(url).data['is_staff'])
+            with self.assertNumQueries(0):
+                resp = self.client.get(url)
+            self.assertEqual(resp.data['username'], 'tester')
+
+            self.user.is_staff = True
+            self.user.save()
+            self.assertTrue(self.client.get(url).data['is_staff'])
+
+            # Group changes from either side drop the cached user
+            group = Group.objects.create(name='reviewers')
+            self.user.groups.add(group)
+            with self.assertNumQueries(1):
+                self.client.get(url)
+            self.client.get(url)
+            group.user_set.clear()
+            with self.assertNumQueries(1):
+                self.client.get(url)
+
+            self.user.is_active = False
+            self.user.save()
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_jwt_user_not_cached_in_local_memory(self):
+        url = reverse('user_info')
+        with override_settings(CACHES={
+            **settings.CACHES, 'users': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        }):
+            self.jwt_get(url)
+            # Another worker could not drop this copy, so every request reads the user
+            with self.assertNumQueries(1):
+                self.client.get(url)
+
+
+class AsyncReadTests(BaseSetup):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        lookup_cache().clear()
+        self.bag = Bag.objects.create(
+            batch=self.batch, internal_lot_number='ILN-A', state='new', qr_code='QR-A1',
+            external_lot_number='ELN-A', external_update_date=timezone.now(),
+        )
+        Bag.objects.create(
+            batch=self.batch, internal_lot_number='ILN-B', state='new', qr_code='QR-A2',
+            external_lot_number='ILN-A', external_update_date=timezone.now(),
+        )
+        self.auth = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+
+    async def assertSameAsSync(self, sync_url, async_url):
+        resp = await self.async_client.get(async_url, headers=self.auth)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        expected = await sync_to_async(self.client.get)(sync_url)
+        # Same payload, but next/previous links stay on the async endpoints
+        self.assertEqual(json.loads(resp.content.decode().replace('/api/async/', '/api/')), expected.json())
+        return resp
+
+    async def test_detail_and_lists_match_sync_views(self):
+        await self.assertSameAsSync(
+            reverse('batch-detail', args=[self.batch.pk]), reverse('async-batch-detail', args=[self.batch.pk]),
+        )
+        await self.assertSameAsSync(reverse('bag-detail', args=[self.bag.pk]), reverse('async-bag-detail', args=[self.bag.pk]))
+        await self.assertSameAsSync(reverse('batch-list') + '?country=Nepal', reverse('async-batch-list') + '?country=Nepal')
+        resp = await self.assertSameAsSync(
+            reverse('bag-list') + '?page_size=1', reverse('async-bag-list') + '?page_size=1',
+        )
+        # The cursor continues the listing like the sync one
+        rest = await self.async_client.get(resp.json()['next'], headers=self.auth)
+        self.assertEqual(len(rest.json()['results']), 1)
+        self.assertNotEqual(rest.json()['results'][0]['bag_id'], resp.json()['results'][0]['bag_id'])
+
+    async def test_lookups_and_me_match_sync_views(self):
+        resp = await self.assertSameAsSync(
+            reverse('bag-by-qr', args=['QR-A1']), reverse('async-bag-by-qr', args=['QR-A1']),
+        )
+        self.assertEqual(resp.json()['batch_summary']['batch'], self.batch.batch)
+        resp = await self.assertSameAsSync(
+            reverse('bag-by-lot', args=['ILN-A']), reverse('async-bag-by-lot', args=['ILN-A']),
+        )
+        self.assertEqual(len(resp.json()['results']), 2)
+        resp = await self.assertSameAsSync(reverse('user_info'), reverse('async-user-info'))
+        self.assertEqual(resp.json()['username'], 'tester')
+
+    async def test_conditional_get(self):
+        for url in (reverse('async-batch-detail', args=[self.batch.pk]), reverse('async-bag-list')):
+            resp = await self.async_client.get(url, headers=self.auth)
+            again = await self.async_client.get(url, headers={**self.auth, 'If-None-Match': resp['ETag']})
+            self.assertEqual(again.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_errors(self):
+        resp = await self.async_client.get(reverse('async-batch-detail', args=[self.batch.pk]))
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn('Bearer', resp['WWW-Authenticate'])
+        resp = await self.async_client.get(
+            reverse('async-batch-detail', args=[0]), headers=self.auth,
+        )
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+        resp = await self.async_client.get(reverse('async-bag-by-qr', args=['QR-NONE']), headers=self.auth)
+        self.assertEqual(resp.json(), {'detail': 'No bag with this QR code.'})
+        resp = await self.async_client.post(reverse('async-batch-list'), headers=self.auth)
+        self.assertEqual(resp.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0'], REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingTests(BaseSetup):
+    def setUp(self):
+        super().setUp()
+        # Pins need a shared cache
+        directory = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(CACHES={**settings.CACHES, 'users': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory,
+        }}))
+        self.factory = RequestFactory()
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.user)}'}
+        self.list_view = BatchViewSet.as_view({'get': 'list', 'post': 'create'})
+
+    def test_safe_api_requests_read_from_a_replica(self):
+        self.assertEqual(choose_replica(self.factory.get('/api/batches/', **self.auth), self.list_view), 'replica_0')
+        self.assertIsNone(choose_replica(self.factory.post('/api/batches/', **self.auth), self.list_view))
+        self.assertIsNone(choose_replica(self.factory.get('/admin/'), admin.site.index))
+        with override_settings(DATABASE_REPLICAS=[]):
+            self.assertIsNone(choose_replica(self.factory.get('/api/batches/', **self.auth), self.list_view))
+
+    def test_reads_stay_on_the_primary_without_a_shared_pin_cache(self):
+        for users in ({'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                      {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}):
+            with override_settings(CACHES={**settings.CACHES, 'users': users}):
+                self.assertIsNone(choose_replica(self.factory.get('/api/batches/', **self.auth), self.list_view))
+        with override_settings(REPLICA_PIN_CACHE='pins'):
+            self.assertIsNone(choose_replica(self.factory.get('/api/batches/', **self.auth), self.list_view))
+
+    def test_router_follows_the_request_route(self):
+        router = ReplicaRouter()
+        token = start_route()
+        try:
+            self.assertIsNone(router.db_for_read(Batch))
+            current_route().alias = 'replica_0'
+            # Inside a transaction on the primary (as in every TestCase) reads stay there
+            self.assertEqual(router.db_for_read(Batch), 'default')
+            with mock.patch.object(connection, 'in_atomic_block', False):
+                self.assertEqual(router.db_for_read(Batch), 'replica_0')
+            self.assertEqual(router.db_for_write(Batch), 'default')
+        finally:
+            end_route(token)
+        self.assertIsNone(router.db_for_read(Batch))
+
+    def test_streamed_exports_read_from_the_request_replica(self):
+        request = self.factory.get('/api/exports/batches.csv')
+        # No replica connection here: authenticate without reading the user
+        force_authenticate(request, self.user)
+        streamed = []
+        token = start_route()
+        try:
+            current_route().alias = 'replica_0'
+            with mock.patch.object(connection, 'in_atomic_block', False), \
+                    mock.patch('api.views.stream_export', lambda resource, queryset, fmt: streamed.append(queryset) or []):
+                ExportView.as_view()(request, resource='batches', fmt='csv')
+        finally:
+            end_route(token)
+        # Still bound once the route is gone and the response streams
+        self.assertEqual(streamed[0].db, 'replica_0')
+
+    def test_writes_pin_the_user_to_the_primary(self):
+        self.client.logout()
+        self.client.credentials(**self.auth)
+        resp = self.client.post(reverse('batch-list'), {'country': ''}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(is_pinned(self.user.pk))
+
+        resp = self.client.patch(reverse('batch-detail', args=[self.batch.pk]), {'quantity': 5}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(is_pinned(self.user.pk))
+        self.assertIsNone(choose_replica(self.factory.get('/api/batches/', **self.auth), self.list_view))
+
+        # Other users keep reading from the replica
+        other = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.admin)}'}
+        self.assertEqual(choose_replica(self.factory.get('/api/batches/', **other), self.list_view), 'replica_0')
+
+
+class AdminChangelistTests(BaseSetup):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.admin)
+        self.bag_form = Form.objects.create(name='Bag Form', association_type='bag')
+
+    def add_rows(self, n):
+        for _ in range(n):
+            batch = Batch.objects.create(
+                user=self.user, country='Nepal', production_type='Organic', production_date=timezone.now(),
+                cluster_group='Cluster A', quantity=1, uoms='kg',
+            )
+            bag = Bag.objects.create(
+                batch=batch, internal_lot_number='ILN-ADM', state='new', qr_code=f'QR-ADM-{batch.pk}',
+                external_lot_number='ELN-ADM', external_update_date=timezone.now(),
+            )
+            Submission.objects.create(form=self.batch_form, content_object=batch, data={'name_field': 'ok'})
+            Submission.objects.create(form=self.bag_form, content_object=bag, data={})
+
+    def changelist_queries(self, model):
+        url = reverse(f'admin:api_{model}_changelist')
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        self.add_rows(1)
+        before = {model: self.changelist_queries(model) for model in ('batch', 'bag', 'submission')}
+        self.add_rows(5)
+        after = {model: self.changelist_queries(model) for model in ('batch', 'bag', 'submission')}
+        self.assertEqual(before, after)
+
+    def test_filters_do_not_scan_for_distinct_values(self):
+        self.add_rows(1)
+        for model in ('batch', 'bag', 'submission'):
+            with CaptureQueriesContext(connection) as ctx:
+                resp = self.client.get(reverse(f'admin:api_{model}_changelist'))
+            self.assertFalse([q['sql'] for q in ctx.captured_queries if 'DISTINCT' in q['sql']], model)
+        filters = [spec.title for spec in resp.context['cl'].filter_specs]
+        self.assertIn('content type', filters)
+        resp = self.client.get(reverse('admin:api_batch_changelist'), {'q': 'Nepal'})
+        self.assertEqual(resp.context['cl'].result_count, Batch.objects.filter(country='Nepal').count())
+
+    def test_autocomplete_lookups(self):
+        resp = self.client.get(reverse('admin:autocomplete'), {
+            'app_label': 'api', 'model_name': 'bag', 'field_name': 'batch', 'term': self.batch.batch,
+        })
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['id'] for row in resp.json()['results']], [str(self.batch.pk)])
+
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class SyncTests(BaseSetup):
+    def sync(self, cursor=None, **params):
+        if cursor is not None:
+            params['cursor'] = cursor
+        resp = self.client.get(reverse('sync'), params)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return resp.json()
+
+    def test_first_sync_returns_current_rows(self):
+        body = self.sync()
+        changes = {(c['model'], c['id']): c for c in body['changes']}
+        self.assertFalse(body['has_more'])
+        self.assertEqual(changes[('batch', self.batch.pk)]['action'], 'upsert')
+        self.assertEqual(changes[('batch', self.batch.pk)]['data']['batch_id'], self.batch.pk)
+        self.assertEqual(changes[('form', self.batch_form.pk)]['data']['name'], 'Batch Form')
+        self.assertIn(('formfield', self.batch_field.pk), changes)
+        # Nothing new since
+        self.assertEqual(self.sync(body['cursor'])['changes'], [])
+
+    def test_updates_and_deletes_since_cursor(self):
+        cursor = self.sync()['cursor']
+        resp = self.client.patch(reverse('batch-detail', args=[self.batch.pk]), {'quantity': 7}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        bag = Bag.objects.create(
+            batch=self.batch, internal_lot_number='ILN-S', state='new', qr_code='QR-SYNC',
+            external_lot_number='ELN-S', external_update_date=timezone.now(),
+        )
+        bag_id = bag.pk
+        bag.delete()
+
+        body = self.sync(cursor)
+        changes = {(c['model'], c['id']): c for c in body['changes']}
+        self.assertEqual(changes[('batch', self.batch.pk)]['action'], 'upsert')
+        self.assertEqual(changes[('batch', self.batch.pk)]['data']['quantity'], 7)
+        self.assertEqual(changes[('bag', bag_id)]['action'], 'delete')
+        self.assertIsNone(changes[('bag', bag_id)]['data'])
+        # Each object once, in change order
+        self.assertEqual(len(changes), len(body['changes']))
+        ids = [c['change_id'] for c in body['changes']]
+        self.assertEqual(ids, sorted(ids))
+
+    def test_pages_follow_the_cursor(self):
+        for n in range(4):
+            Batch.objects.create(
+                user=self.user, country='Nepal', production_type='Organic', production_date=timezone.now(),
+                cluster_group='Cluster A', quantity=n, uoms='kg',
+            )
+        seen, cursor, pages = [], None, 0
+        while True:
+            body = self.sync(cursor, page_size=2)
+            self.assertLessEqual(len(body['changes']), 2)
+            seen += [c['change_id'] for c in body['changes']]
+            cursor, pages = body['cursor'], pages + 1
+            if not body['has_more']:
+                break
+        self.assertGreater(pages, 2)
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(seen[-1], ChangeLogEntry.objects.latest('pk').pk)
+
+    def test_queries_do_not_grow_with_tables(self):
+        def queries():
+            latest = ChangeLogEntry.objects.latest('pk')
+            cursor = encode_cursor(latest.pk, latest.changed_at)
+            self.client.patch(reverse('batch-detail', args=[self.batch.pk]), {'quantity': 1}, format='json')
+            with CaptureQueriesContext(connection) as ctx:
+                self.sync(cursor)
+            return len(ctx.captured_queries)
+
+        before = queries()
+        for n in range(10):
+            Batch.objects.create(
+                user=self.user, country='Nepal', production_type='Organic', production_date=timezone.now(),
+                cluster_group='Cluster A', quantity=n, uoms='kg',
+            )
+        self.assertEqual(queries(), before)
+
+    @override_settings(SYNC_SETTLE_SECONDS=60)
+    def test_cursor_waits_for_recent_changes_to_settle(self):
+        first = self.sync()
+        self.assertEqual(first['cursor'], encode_cursor(0))
+        # The unsettled entries come again
+        self.assertEqual(self.sync(first['cursor'])['changes'], first['changes'])
+        # Even from a full page, and without asking for more at once
+        page = self.sync(page_size=1)
+        self.assertEqual((page['cursor'], page['has_more']), (encode_cursor(0), False))
+
+    def test_expired_cursor_asks_for_a_full_sync(self):
+        latest = ChangeLogEntry.objects.latest('pk')
+        for cursor in (encode_cursor(latest.pk, latest.changed_at - timezone.timedelta(days=31)), encode_cursor(latest.pk)):
+            resp = self.client.get(reverse('sync'), {'cursor': cursor})
+            self.assertEqual(resp.status_code, status.HTTP_410_GONE)
+
+    def test_prune_keeps_the_latest_entry_of_live_objects(self):
+        bag = Bag.objects.create(
+            batch=self.batch, internal_lot_number='ILN-P', state='new', qr_code='QR-PRUNE',
+            external_lot_number='ELN-P', external_update_date=timezone.now(),
+        )
+        bag.delete()
+        self.batch.quantity = 5
+        self.batch.save()
+        ChangeLogEntry.objects.update(changed_at=timezone.now() - timezone.timedelta(days=40))
+        recent = ChangeLogEntry.objects.create(model='batch', object_id=self.batch.pk)
+
+        call_command('prune_change_log', stdout=StringIO())
+        entries = set(ChangeLogEntry.objects.values_list('model', 'object_id', 'action'))
+        # The deleted bag's upsert and old tombstone are both gone
+        self.assertFalse(ChangeLogEntry.objects.filter(model='bag').exists())
+        # The batch keeps only its newest entry; untouched rows keep theirs
+        self.assertEqual(list(ChangeLogEntry.objects.filter(model='batch').values_list('pk', flat=True)), [recent.pk])
+        self.assertIn(('form', self.batch_form.pk, 'upsert'), entries)
+        self.assertIn(('formfield', self.batch_field.pk, 'upsert'), entries)
+        synced = {(c['model'], c['id']) for c in self.sync()['changes']}
+        self.assertIn(('batch', self.batch.pk), synced)
+
+    def test_form_delete_logs_batches_it_detaches(self):
+        cursor = self.sync()['cursor']
+        form_id = self.batch_form.pk
+        self.batch_form.delete()
+        changes = {(c['model'], c['id']): c for c in self.sync(cursor)['changes']}
+        self.assertEqual(changes[('form', form_id)]['action'], 'delete')
+        self.assertIsNone(changes[('batch', self.batch.pk)]['data']['form'])
+
+    def test_invalid_cursor(self):
+        resp = self.client.get(reverse('sync'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_requires_authentication(self):
+        self.client.logout()
+        resp = self.client.get(reverse('sync'))
+        self.assertIn(resp.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
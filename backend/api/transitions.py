@@ -0,0 +1,78 @@
+"""
+Set-based status transitions for batches and bags.
+
+Batch.save() and Bag.save() change one row at a time and rely on signal
+handlers for the bookkeeping. These functions change many rows with a
+few UPDATEs instead, so they do that bookkeeping themselves: the batch
+bag counters, the daily rollups, the QR code / batch summary lookup
+caches and the change log read by /api/sync/.
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from .lookups import invalidate_bag, invalidate_batch
+from .models import Batch, Bag, ChangeLogEntry
+from .rollups import BATCH_STATE_FIELDS, bag_completion_day, record_bag_completions, record_batch_change
+
+UPDATE_CHUNK_SIZE = 5000
+
+
+def transition_bags(queryset, status, now=None):
+    """
+    Moves the bags in queryset that are not already in `status` to it,
+    stamping completed_at when it is 'completed' (as Bag.save() does).
+    Returns the number of bags changed.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        rows = list(
+            queryset.exclude(status=status).select_for_update()
+            .values('pk', 'batch_id', 'status', 'qr_code', 'completed_at')
+        )
+        if not rows:
+            return 0
+        updates = {'status': status, 'updated_at': now}
+        if status == 'completed':
+            updates['completed_at'] = now
+        ids = [row['pk'] for row in rows]
+        for start in range(0, len(ids), UPDATE_CHUNK_SIZE):
+            Bag.objects.filter(pk__in=ids[start:start + UPDATE_CHUNK_SIZE]).update(**updates)
+        ChangeLogEntry.record(Bag, ids)
+
+        counters = defaultdict(Counter)
+        completions = Counter()
+        for row in rows:
+            counters[row['batch_id']][row['status']] -= 1
+            counters[row['batch_id']][status] += 1
+            completions[bag_completion_day(row)] -= 1
+            completions[bag_completion_day({
+                'status': status, 'completed_at': updates.get('completed_at', row['completed_at']),
+            })] += 1
+        for batch_id, deltas in counters.items():
+            Batch.move_bag_counters(batch_id, deltas)
+        record_bag_completions(completions)
+    invalidate_bag(*(row['qr_code'] for row in rows))
+    return len(rows)
+
+
+def complete_batch(batch_id, now=None):
+    """
+    Completes a batch and every bag in it in one transaction. Returns the
+    rows changed as {'batches': 0 or 1, 'bags': n}; an already completed
+    batch only has its remaining bags completed.
+    """
+    now = now or timezone.now()
+    batches = 0
+    with transaction.atomic():
+        old = Batch.objects.select_for_update().filter(pk=batch_id).values(*BATCH_STATE_FIELDS).first()
+        if old is None:
+            raise Batch.DoesNotExist(batch_id)
+        if old['status'] != 'completed':
+            batches = Batch.objects.filter(pk=batch_id).update(status='completed', completed_at=now, updated_at=now)
+            record_batch_change(old, {**old, 'status': 'completed'})
+            ChangeLogEntry.record(Batch, [batch_id])
+        bags = transition_bags(Bag.objects.filter(batch_id=batch_id), 'completed', now)
+    invalidate_batch(batch_id)
+    return {'batches': batches, 'bags': bags}
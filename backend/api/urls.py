@@ -6,8 +6,12 @@ from .views import (
     FormViewSet,
     FormFieldViewSet,
     SubmissionViewSet,
+    ReportViewSet,
+    ExportView,
     UserInfoView,
+    SyncView,
 )
+from . import async_views
 
 router = DefaultRouter()
 router.register(r'batches', BatchViewSet, basename='batch')
@@ -15,8 +19,23 @@ router.register(r'bags', BagViewSet, basename='bag')
 router.register(r'forms', FormViewSet, basename='form')
 router.register(r'formfields', FormFieldViewSet, basename='formfield')
 router.register(r'submissions', SubmissionViewSet, basename='submission')
+router.register(r'reports', ReportViewSet, basename='report')
+
+# Async (ASGI) versions of the hot read endpoints, see async_views.py
+async_urlpatterns = [
+    path('batches/', async_views.BatchListView.as_view(), name='async-batch-list'),
+    path('batches/<int:pk>/', async_views.BatchDetailView.as_view(), name='async-batch-detail'),
+    path('bags/', async_views.BagListView.as_view(), name='async-bag-list'),
+    path('bags/<int:pk>/', async_views.BagDetailView.as_view(), name='async-bag-detail'),
+    path('bags/by-qr/<str:code>/', async_views.BagByQRView.as_view(), name='async-bag-by-qr'),
+    path('bags/by-lot/<str:lot>/', async_views.BagsByLotView.as_view(), name='async-bag-by-lot'),
+    path('me/', async_views.UserInfoView.as_view(), name='async-user-info'),
+]
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('exports/<slug:resource>.<slug:fmt>', ExportView.as_view(), name='export'),
     path('me/', UserInfoView.as_view(), name='user_info'),
+    path('sync/', SyncView.as_view(), name='sync'),
+    path('async/', include(async_urlpatterns)),
 ]
@@ -0,0 +1,216 @@
+import math
+import re
+from collections import namedtuple
+from datetime import datetime
+from functools import lru_cache
+
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator, validate_email
+
+from .form_cache import form_version, get_serialized_form
+
+CHOICE_TYPES = ('select', 'radio', 'checkbox')
+# The parts of a serialized FormField the validator needs
+FieldDefinition = namedtuple('FieldDefinition', 'name field_type required validation_rules')
+_validate_url = URLValidator()
+
+
+# ---------------------------------------------------------------------
+# TYPE COERCERS
+# ---------------------------------------------------------------------
+# Each coercer returns the typed value used by the range checks, or
+# raises ValueError/TypeError/ValidationError when the value is invalid.
+def _as_number(value):
+    if isinstance(value, bool):
+        raise TypeError(value)
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(value)
+    return number
+
+
+def json_number(value):
+    """
+    Returns a number field's value as the JSON number it is stored as,
+    an int when integral, so "12", 12.0 and 12 are all stored (and
+    filtered on) as 12.
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    number = _as_number(value)
+    return int(number) if number.is_integer() else number
+
+
+def _as_date(value):
+    return datetime.strptime(value, '%Y-%m-%d')
+
+
+def _as_boolean(value):
+    if not isinstance(value, bool):
+        raise TypeError(value)
+    return value
+
+
+def _as_text(value):
+    if not isinstance(value, str):
+        raise TypeError(value)
+    return value
+
+
+def _as_email(value):
+    validate_email(value)
+    return value
+
+
+def _as_url(value):
+    _validate_url(value)
+    return value
+
+
+COERCERS = {
+    'text': (_as_text, 'Must be text.'),
+    'number': (_as_number, 'Must be a number.'),
+    'date': (_as_date, 'Must be a valid date (YYYY-MM-DD).'),
+    'boolean': (_as_boolean, 'Must be a boolean.'),
+    'email': (_as_email, 'Must be a valid email address.'),
+    'url': (_as_url, 'Must be a valid URL.'),
+}
+
+
+# ---------------------------------------------------------------------
+# COMPILED FIELD RULES
+# ---------------------------------------------------------------------
+class FieldRule:
+    """One FormField with its validation_rules parsed up front."""
+
+    def __init__(self, name, field_type, required, rules):
+        rules = rules or {}
+        self.name = name
+        self.field_type = field_type
+        self.required = required
+        self.coerce, self.type_message = COERCERS.get(field_type, (None, None))
+        self.min_length = rules.get('min_length')
+        self.max_length = rules.get('max_length')
+        self.min_value = rules.get('min_value')
+        self.max_value = rules.get('max_value')
+        self.choices = None
+        self.choice_labels = None
+        if field_type in CHOICE_TYPES and rules.get('choices'):
+            self.choices = frozenset(str(c) for c in rules['choices'])
+            self.choice_labels = ', '.join(str(c) for c in rules['choices'])
+        self.pattern = None
+        self.pattern_error = None
+        if field_type == 'text' and rules.get('regex'):
+            try:
+                self.pattern = re.compile(rules['regex'])
+            except re.error:
+                self.pattern_error = 'Field has an invalid regex rule.'
+
+    def errors(self, value):
+        """Returns the list of error messages for a submitted value."""
+        if value is None:
+            return ['This field is required.'] if self.required else []
+
+        if self.coerce:
+            try:
+                typed = self.coerce(value)
+            except (TypeError, ValueError, ValidationError):
+                return [self.type_message]
+        else:
+            typed = value
+
+        errors = []
+        if self.field_type == 'text':
+            if self.min_length is not None and len(typed) < self.min_length:
+                errors.append(f'Must be at least {self.min_length} characters long.')
+            if self.max_length is not None and len(typed) > self.max_length:
+                errors.append(f'Exceeds maximum length of {self.max_length}.')
+            if self.pattern_error:
+                errors.append(self.pattern_error)
+            elif self.pattern and not self.pattern.match(typed):
+                errors.append('Does not match the required pattern.')
+        elif self.field_type == 'number':
+            if self.min_value is not None and typed < self.min_value:
+                errors.append(f'Must be at least {self.min_value}.')
+            if self.max_value is not None and typed > self.max_value:
+                errors.append(f'Cannot exceed {self.max_value}.')
+        elif self.choices is not None:
+            if self.field_type == 'checkbox':
+                selected = value if isinstance(value, list) else str(value).split(',')
+                selected = [str(v).strip() for v in selected if str(v).strip()]
+                invalid = [v for v in selected if v not in self.choices]
+                if invalid:
+                    errors.append(f"Invalid choices: {', '.join(invalid)}.")
+            elif not isinstance(value, (str, int, float)) or str(value) not in self.choices:
+                errors.append(f'Must be one of: {self.choice_labels}.')
+        return errors
+
+    def clean(self, value):
+        """Returns a valid value in its stored form: numbers as JSON numbers."""
+        if value is None or self.field_type != 'number':
+            return value
+        return json_number(value)
+
+
+class FormValidator:
+    """
+    A Form compiled into reusable field rules. validate() checks a
+    whole payload and reports every field error at once.
+    """
+
+    def __init__(self, form_id, fields):
+        self.form_id = form_id
+        self.rules = {
+            f.name: FieldRule(f.name, f.field_type, f.required, f.validation_rules)
+            for f in fields
+        }
+
+    def errors(self, data):
+        """Returns {field_name: [messages]} for the submitted data."""
+        if not isinstance(data, dict):
+            return {'__all__': ['Must be an object of field values.']}
+        errors = {name: ['Unexpected field.'] for name in data.keys() - self.rules.keys()}
+        for name, rule in self.rules.items():
+            messages = rule.errors(data.get(name))
+            if messages:
+                errors[name] = messages
+        return errors
+
+    def validate(self, data):
+        """Returns a copy of valid data with each value in its stored form."""
+        errors = self.errors(data)
+        if errors:
+            raise ValidationError(errors)
+        return {name: self.rules[name].clean(value) for name, value in data.items()}
+
+
+# ---------------------------------------------------------------------
+# PER-FORM CACHE
+# ---------------------------------------------------------------------
+# Compiled validators are kept per process and keyed by the form's
+# version, its updated_at as read from the database (see form_cache.py),
+# so a write in any process invalidates them. They are built from the
+# cached serialized form.
+@lru_cache(maxsize=256)
+def _compile(form_id, version):
+    data = get_serialized_form(form_id, version) if version else None
+    fields = (data or {}).get('fields', [])
+    return FormValidator(form_id, [
+        FieldDefinition(f['name'], f['field_type'], f['required'], f['validation_rules']) for f in fields
+    ])
+
+
+def get_validator(form):
+    """
+    Returns the compiled validator for a Form instance (as loaded) or id;
+    an id costs one query for the form's version.
+    """
+    return _compile(getattr(form, 'pk', form), form_version(form))
+
+
+def validate_form_data(form, data):
+    """
+    Validates data against a form and returns it normalized for storage;
+    raises ValidationError with a per-field dict.
+    """
+    return get_validator(form).validate(data)
@@ -1,10 +1,32 @@
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.contenttypes.prefetch import GenericPrefetch
+from django.db import router, transaction
+from django.db.models import Q
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import render
-from rest_framework import viewsets
+from django.utils.dateparse import parse_datetime
+from rest_framework import filters, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, BasePermission
 from rest_framework.views import APIView
 from .models import Batch, Bag, Form, FormField, Submission
-from .serializers import BatchSerializer, BagSerializer, FormSerializer, FormFieldSerializer, SubmissionSerializer
+from .serializers import (
+    BatchSerializer, BagSerializer, BagTransitionSerializer, FormSerializer, FormFieldSerializer, SubmissionSerializer,
+)
+from .conditional import ConditionalGetMixin, conditional_response, make_etag
+from .form_cache import form_version, get_serialized_form, get_serialized_forms
+from .filters import FieldFilterBackend
+from .json_filters import FormDataFilterBackend
+from .reports import REPORTS, get_report, report_filters
+from .bulk import ingest_bags
+from .exports import EXPORTS, EXPORT_FORMATS, export_queryset, stream_export
+from .parsers import FastJSONParser, NDJSONParser
+from .lookups import bag_by_qr
+from .transitions import complete_batch, transition_bags
+from .changes import changes_since
 
 
 class IsAdminOrNotCompleted(BasePermission):
@@ -16,44 +38,200 @@ class IsAdminOrNotCompleted(BasePermission):
         return obj.status != 'completed'
 
 
-class BatchViewSet(viewsets.ModelViewSet):
+def submission_queryset():
+    """
+    Submissions with everything the serializer reads loaded up front: the
+    generic content_object is resolved with one query per content type.
+    """
+    return Submission.objects.select_related('created_by').prefetch_related(
+        GenericPrefetch('content_object', [Batch.objects.all(), Bag.objects.all()])
+    )
+
+
+def bags_in_lot(lot):
+    return Bag.objects.filter(Q(internal_lot_number=lot) | Q(external_lot_number=lot))
+
+
+def user_info(user):
+    return {
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'is_staff': user.is_staff,
+        'date_joined': user.date_joined,
+        'last_login': user.last_login
+    }
+
+
+class ObjectSubmissionsMixin:
+    """Adds GET /<resource>/{id}/submissions/ listing the object's submissions."""
+
+    @action(detail=True, methods=['get'])
+    def submissions(self, request, pk=None):
+        obj = self.get_object()
+        queryset = submission_queryset().filter(
+            content_type=ContentType.objects.get_for_model(obj), object_id=obj.pk
+        )
+        page = self.paginate_queryset(queryset)
+        serializer = SubmissionSerializer(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
+
+
+class BatchViewSet(ConditionalGetMixin, ObjectSubmissionsMixin, viewsets.ModelViewSet):
     queryset = Batch.objects.all()
     serializer_class = BatchSerializer
     permission_classes = [IsAuthenticated, IsAdminOrNotCompleted]
+    filter_backends = [FieldFilterBackend, FormDataFilterBackend, filters.SearchFilter]
+    filter_fields = ('country', 'production_type', 'cluster_group', 'status', 'user', 'form', 'form_gate_sourced', 'uoms')
+    json_filter_field = 'form_data'
+    date_filter_fields = ('created_at', 'production_date', 'completed_at')
+    # Substring matches served by pg_trgm indexes (migration 0016)
+    search_fields = ('batch', 'country', 'production_type', 'cluster_group')
+    ordering_fields = ('created_at', 'production_date', 'quantity', 'batch_id')
 
     def perform_create(self, serializer):
-        instance = serializer.save(user=self.request.user)
-        instance.batch = f"BTCH-{instance.batch_id:04d}"
-        instance.save(update_fields=['batch'])
+        serializer.save(user=self.request.user)
+
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        """
+        Completes the batch and all of its bags in one transaction and
+        returns the rows changed. Completed batches are staff-only, as
+        for any other write.
+        """
+        batch = self.get_object()
+        return Response(complete_batch(batch.pk))
 
 
-class BagViewSet(viewsets.ModelViewSet):
+class BagViewSet(ConditionalGetMixin, ObjectSubmissionsMixin, viewsets.ModelViewSet):
     queryset = Bag.objects.all()
     serializer_class = BagSerializer
     permission_classes = [IsAuthenticated, IsAdminOrNotCompleted]
+    filter_backends = [FieldFilterBackend, FormDataFilterBackend, filters.SearchFilter]
+    filter_fields = ('batch', 'form', 'status', 'state', 'internal_lot_number', 'external_lot_number')
+    json_filter_field = 'form_data'
+    date_filter_fields = ('created_at', 'completed_at', 'external_update_date')
+    search_fields = ('internal_lot_number', 'external_lot_number', 'qr_code', 'state')
+    ordering_fields = ('created_at', 'external_update_date', 'bag_id')
 
+    @action(detail=False, methods=['get'], url_path=r'by-qr/(?P<code>[^/]+)')
+    def by_qr(self, request, code=None):
+        """Resolves a scanned QR code to its bag and batch summary."""
+        data = bag_by_qr(code, lambda bag: BagSerializer(bag, context={'request': request}).data)
+        if data is None:
+            return Response({'detail': 'No bag with this QR code.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(data)
 
-class FormViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['get'], url_path=r'by-lot/(?P<lot>[^/]+)')
+    def by_lot(self, request, lot=None):
+        """Bags whose internal or external lot number is `lot`, paginated like the list."""
+        page = self.paginate_queryset(bags_in_lot(lot))
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    @action(detail=False, methods=['post'])
+    def transition(self, request):
+        """
+        Moves the bags in `ids` to `status` in one transaction and returns
+        the number changed. Bags that are completed can only be changed
+        by staff; if any are listed, nothing is changed.
+        """
+        serializer = BagTransitionSerializer(
+            data=request.data, context={'max_rows': getattr(settings, 'BAG_BULK_MAX_ROWS', 10000)}
+        )
+        serializer.is_valid(raise_exception=True)
+        ids, new_status = serializer.validated_data['ids'], serializer.validated_data['status']
+        with transaction.atomic():
+            current = dict(Bag.objects.filter(pk__in=ids).select_for_update().values_list('pk', 'status'))
+            missing = [pk for pk in ids if pk not in current]
+            if missing:
+                raise ValidationError({'ids': [f'Unknown bag ids: {missing}']})
+            locked = [pk for pk in ids if current[pk] == 'completed']
+            if locked and not request.user.is_staff:
+                raise PermissionDenied(f'Completed bags can only be changed by staff: {locked}')
+            changed = transition_bags(Bag.objects.filter(pk__in=ids), new_status)
+        return Response({'bags': changed})
+
+    @action(detail=False, methods=['post'], url_path='bulk', parser_classes=[FastJSONParser, NDJSONParser])
+    def bulk(self, request):
+        """
+        Creates many bags from a JSON array or NDJSON body.
+        ?mode=partial inserts the valid rows and skips rejected ones;
+        the default mode inserts nothing unless every row is valid.
+        """
+        rows = request.data
+        if not isinstance(rows, list):
+            return Response({'detail': 'Expected a list of bags.'}, status=status.HTTP_400_BAD_REQUEST)
+        max_rows = getattr(settings, 'BAG_BULK_MAX_ROWS', 10000)
+        if len(rows) > max_rows:
+            return Response(
+                {'detail': f'At most {max_rows} bags can be created per request.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        partial = request.query_params.get('mode') == 'partial'
+        created, results = ingest_bags(
+            rows, self.get_serializer_context(), partial=partial,
+            chunk_size=getattr(settings, 'BAG_BULK_CHUNK_SIZE', 500)
+        )
+        rejected = [r['index'] for r in results if 'errors' in r]
+        if not created and rejected:
+            code = status.HTTP_400_BAD_REQUEST
+        elif rejected:
+            code = status.HTTP_207_MULTI_STATUS
+        else:
+            code = status.HTTP_201_CREATED
+        return Response({'created': created, 'rejected': rejected, 'results': results}, status=code)
+
+
+class FormViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    """Reads are served from the versioned form cache (see form_cache.py)."""
     queryset = Form.objects.all()
     serializer_class = FormSerializer
     permission_classes = [IsAuthenticated]
+    keyset_ordering = ('pk',)
+
+    def retrieve(self, request, pk=None):
+        data = get_serialized_form(int(pk)) if str(pk).isdigit() else None
+        if data is None:
+            raise Http404
+        updated_at = parse_datetime(data['updated_at'])
+        return conditional_response(
+            request, make_etag(Form._meta.label, data['form_id'], updated_at.timestamp()),
+            updated_at, lambda: Response(data)
+        )
+
+    def serialize_list(self, objects):
+        forms = get_serialized_forms(
+            [form.pk for form in objects], {form.pk: form_version(form) for form in objects},
+        )
+        return [forms[form.pk] for form in objects if form.pk in forms]
 
 
 class FormFieldViewSet(viewsets.ModelViewSet):
     queryset = FormField.objects.all()
     serializer_class = FormFieldSerializer
     permission_classes = [IsAuthenticated]
+    keyset_ordering = ('pk',)
 
 
-class SubmissionViewSet(viewsets.ModelViewSet):
+class SubmissionViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Submission.objects.all()
+    content_types = {'batch': Batch, 'bag': Bag}
     serializer_class = SubmissionSerializer
     permission_classes = [IsAuthenticated]
+    filter_backends = [FormDataFilterBackend]
+    json_filter_field = 'data'
 
     def get_queryset(self):
         qs = super().get_queryset()
+        if self.action == 'list':
+            qs = submission_queryset()
         form_id = self.request.query_params.get('form')
         association = self.request.query_params.get('association_type')
+        content_type = self.request.query_params.get('content_type')
+        object_id = self.request.query_params.get('object_id')
         if form_id:
             try:
                 qs = qs.filter(form__form_id=int(form_id))
@@ -61,21 +239,113 @@ class SubmissionViewSet(viewsets.ModelViewSet):
                 qs = qs.none()
         if association:
             qs = qs.filter(form__association_type=association)
+        if content_type:
+            if content_type in self.content_types:
+                content_type = ContentType.objects.get_for_model(self.content_types[content_type]).pk
+            elif not content_type.isdigit():
+                raise ValidationError({'content_type': 'Expected a content type id, "batch" or "bag".'})
+            qs = qs.filter(content_type_id=int(content_type))
+        if object_id:
+            if not object_id.isdigit():
+                raise ValidationError({'object_id': 'Expected an object id.'})
+            qs = qs.filter(object_id=int(object_id))
         return qs
 
+    # The content_object summary (label, status) is part of the representation
+    def linked_modified(self, instance):
+        return (getattr(instance.content_object, 'updated_at', None),)
+
+
+class ReportViewSet(viewsets.ViewSet):
+    """
+    Aggregated report rows computed with GROUP BY in the database.
+    Accepts status, cluster_group, country, production_type and
+    created_at/production_date _after/_before filters.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def list(self, request):
+        lookups = report_filters(request.query_params)
+        return Response({name: get_report(name, lookups) for name in REPORTS})
+
+    def _report(self, request, name):
+        lookups = report_filters(request.query_params)
+        return Response(get_report(name, lookups))
+
+    @action(detail=False, url_path='batches-by-country')
+    def batches_by_country(self, request):
+        return self._report(request, 'batches-by-country')
+
+    @action(detail=False, url_path='batches-by-production-type')
+    def batches_by_production_type(self, request):
+        return self._report(request, 'batches-by-production-type')
+
+    @action(detail=False, url_path='batches-by-cluster-group')
+    def batches_by_cluster_group(self, request):
+        return self._report(request, 'batches-by-cluster-group')
+
+    @action(detail=False, url_path='batches-by-status')
+    def batches_by_status(self, request):
+        return self._report(request, 'batches-by-status')
+
+    @action(detail=False, url_path='bags-per-batch')
+    def bags_per_batch(self, request):
+        return self._report(request, 'bags-per-batch')
+
+    @action(detail=False, url_path='batches-daily')
+    def batches_daily(self, request):
+        return self._report(request, 'batches-daily')
+
+    @action(detail=False, url_path='bags-completed-daily')
+    def bags_completed_daily(self, request):
+        return self._report(request, 'bags-completed-daily')
+
+
+class ExportView(APIView):
+    """
+    Streams batches, bags or submissions as CSV or NDJSON, flattening
+    form_data / data into one column per linked form field.
+    """
+    permission_classes = [IsAuthenticated]
+    content_types = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+    def get(self, request, resource, fmt):
+        if resource not in EXPORTS or fmt not in EXPORT_FORMATS:
+            raise Http404
+        queryset = export_queryset(resource, request.query_params)
+        # The rows are read while the response streams, after ReplicaMiddleware
+        # has closed the request's route, so bind them to its database now
+        queryset = queryset.using(router.db_for_read(queryset.model))
+        response = StreamingHttpResponse(
+            stream_export(resource, queryset, fmt),
+            content_type=self.content_types[fmt]
+        )
+        response['Content-Disposition'] = f'attachment; filename="{resource}.{fmt}"'
+        return response
+
 
 class UserInfoView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        user = request.user
-        return Response({
-            'id': user.id,
-            'username': user.username,
-            'email': user.email,
-            'first_name': user.first_name,
-            'last_name': user.last_name,
-            'is_staff': user.is_staff,
-            'date_joined': user.date_joined,
-            'last_login': user.last_login
-        })
+        return Response(user_info(request.user))
+
+
+class SyncView(APIView):
+    """
+    GET /api/sync/?cursor=...: batches, bags, forms, form fields and
+    submissions created, updated or deleted since the cursor (see
+    changes.py). Start without a cursor and pass each response's cursor
+    to the next call; repeat at once while has_more is true.
+    """
+    permission_classes = [IsAuthenticated]
+    page_size = 200
+    max_page_size = 1000
+
+    def get(self, request):
+        try:
+            size = int(request.query_params.get('page_size', self.page_size))
+        except ValueError:
+            size = self.page_size
+        size = max(1, min(size, self.max_page_size))
+        return Response(changes_since(request.query_params.get('cursor'), size, {'request': request}))
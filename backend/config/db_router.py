@@ -0,0 +1,144 @@
+"""
+Read-replica routing.
+
+With DB_REPLICA_URLS set, GET/HEAD/OPTIONS requests to the api views and
+reports read from one of the replicas (DATABASE_REPLICAS), picked once
+per request so a list's count and page come from the same server.
+Everything else reads and writes the primary ("default"):
+
+- unsafe requests, the admin and management commands;
+- queries inside a transaction on the primary, which must see its own writes;
+- for REPLICA_PIN_SECONDS after a user's successful write, all of that
+  user's requests, so they read their own writes despite replication lag.
+
+Pins live in the REPLICA_PIN_CACHE alias (by default "users"), which must
+be a shared backend (file or Redis) for a pin to reach the other workers.
+Without one nobody can be pinned, so every request reads the primary.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReadRoute:
+    """Where the current request reads from; alias None means the primary."""
+
+    def __init__(self):
+        self.alias = None
+
+
+_route = ContextVar('read_route', default=None)
+
+
+def _pin_key(user_id):
+    return f'db-pin:{user_id}'
+
+
+def pin_cache():
+    """
+    The shared cache pins are kept in, or None. Local memory is never
+    used: a pin would only reach the worker that served the write.
+    """
+    alias = getattr(settings, 'REPLICA_PIN_CACHE', 'users')
+    if alias not in settings.CACHES:
+        return None
+    pins = caches[alias]
+    if isinstance(pins, (DummyCache, LocMemCache)):
+        return None
+    return pins
+
+
+def pin_to_primary(user_id):
+    """Sends the user's reads to the primary for REPLICA_PIN_SECONDS."""
+    pins = pin_cache()
+    if pins is not None:
+        pins.set(_pin_key(user_id), True, getattr(settings, 'REPLICA_PIN_SECONDS', 5))
+
+
+def is_pinned(user_id):
+    pins = pin_cache()
+    return user_id is not None and pins is not None and pins.get(_pin_key(user_id)) is not None
+
+
+def request_user_id(request):
+    """
+    The requesting user's id from the JWT or the session, without
+    loading the user. Invalid tokens give None (the view rejects them).
+    """
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header is not None else None
+    if raw_token is not None:
+        try:
+            return authentication.get_validated_token(raw_token).get(api_settings.USER_ID_CLAIM)
+        except (InvalidToken, TokenError):
+            return None
+    session = getattr(request, 'session', None)
+    if session is not None and settings.SESSION_COOKIE_NAME in request.COOKIES:
+        return session.get(SESSION_KEY)
+    return None
+
+
+def serves_from_replica(view_func):
+    """Only the api app's views (viewsets, reports, exports, async views) read from replicas."""
+    view = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None) or view_func
+    return view.__module__.startswith('api.')
+
+
+def choose_replica(request, view_func):
+    """The replica alias for this request, or None for the primary."""
+    replicas = getattr(settings, 'DATABASE_REPLICAS', ())
+    if not replicas or request.method not in SAFE_METHODS or not serves_from_replica(view_func):
+        return None
+    # Without a shared pin store a writer could not be kept on the primary
+    if pin_cache() is None:
+        return None
+    if is_pinned(request_user_id(request)):
+        return None
+    return random.choice(replicas)
+
+
+def start_route():
+    """Opens the current request's ReadRoute; returns a token for end_route()."""
+    return _route.set(ReadRoute())
+
+
+def end_route(token):
+    _route.reset(token)
+
+
+def current_route():
+    return _route.get()
+
+
+class ReplicaRouter:
+    """Sends reads to the replica chosen for the request (see ReplicaMiddleware)."""
+
+    def db_for_read(self, model, **hints):
+        route = current_route()
+        if route is None or route.alias is None:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return route.alias
+
+    def db_for_write(self, model, **hints):
+        # Even for objects read from a replica
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *getattr(settings, 'DATABASE_REPLICAS', ())}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
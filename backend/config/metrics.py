@@ -0,0 +1,99 @@
+"""
+Prometheus metrics for the API, served at /metrics.
+
+Request, SQL and cache metrics are recorded per process. When the
+PROMETHEUS_MULTIPROC_DIR environment variable points at a shared, empty
+directory (set before the workers start), every gunicorn/uvicorn worker
+writes its values there and /metrics aggregates all of them, whichever
+worker answers the scrape.
+"""
+import os
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+
+REQUESTS = Counter(
+    'api_requests_total', 'Requests by URL name (e.g. batch-list), method and status code.',
+    ['action', 'method', 'status'],
+)
+LATENCY = Histogram(
+    'api_request_duration_seconds', 'Request latency by URL name and method.', ['action', 'method'],
+)
+QUERIES = Histogram(
+    'api_db_queries_per_request', 'SQL queries run per request.', ['action'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144),
+)
+QUERY_TIME = Histogram(
+    'api_db_query_duration_seconds', 'Total SQL time per request.', ['action'],
+)
+CACHE_LOOKUPS = Counter(
+    'api_cache_lookups_total', 'Cache lookups by cache and result (hit or miss).', ['cache', 'result'],
+)
+
+
+def action_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return (match.url_name or match.view_name) if match else 'unmatched'
+
+
+def observe_request(request, response, timings):
+    """Records one finished request (see config.middleware.RequestTimingMiddleware)."""
+    action = action_name(request)
+    REQUESTS.labels(action, request.method, str(response.status_code)).inc()
+    LATENCY.labels(action, request.method).observe(timings.total_ms / 1000)
+    QUERIES.labels(action).observe(timings.query_count)
+    QUERY_TIME.labels(action).observe(timings.query_ms / 1000)
+
+
+def record_cache(cache, hit):
+    """Counts one lookup in one of the API's caches."""
+    CACHE_LOOKUPS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def record_cache_many(cache, hits, misses):
+    if hits:
+        CACHE_LOOKUPS.labels(cache, 'hit').inc(hits)
+    if misses:
+        CACHE_LOOKUPS.labels(cache, 'miss').inc(misses)
+
+
+class TableRowsCollector:
+    """Current row counts of the main tables, read at scrape time."""
+
+    def collect(self):
+        from api.models import Bag, Batch, Form, FormField, Submission
+        from api.pagination import estimate_count
+
+        gauge = GaugeMetricFamily(
+            'api_table_rows', 'Rows per table (the planner estimate on PostgreSQL).', labels=['table'],
+        )
+        for model in (Batch, Bag, Form, FormField, Submission):
+            gauge.add_metric([model._meta.db_table], estimate_count(model.objects.all()))
+        yield gauge
+
+
+_tables = CollectorRegistry()
+_tables.register(TableRowsCollector())
+
+
+def metrics_view(request):
+    """
+    The metrics in the Prometheus text format. With METRICS_TOKEN set,
+    scrapes must send it as `Authorization: Bearer <token>`.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token and not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry) + generate_latest(_tables), content_type=CONTENT_TYPE_LATEST)
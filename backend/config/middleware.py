@@ -0,0 +1,217 @@
+import heapq
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from .db_router import SAFE_METHODS, choose_replica, current_route, end_route, pin_to_primary, start_route
+from .metrics import observe_request
+
+logger = logging.getLogger('config.requests')
+
+_current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """Time spent in SQL and in named spans (e.g. serializer) during one request."""
+
+    def __init__(self, keep_queries=5):
+        self.start = time.perf_counter()
+        self.query_count = 0
+        self.query_ms = 0.0
+        self.spans = {}
+        self._open = set()
+        self._keep = keep_queries
+        self._slowest = []
+
+    def execute(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            ms = (time.perf_counter() - start) * 1000
+            self.query_count += 1
+            self.query_ms += ms
+            if self._keep:
+                entry = (ms, self.query_count, sql)
+                if len(self._slowest) < self._keep:
+                    heapq.heappush(self._slowest, entry)
+                else:
+                    heapq.heappushpop(self._slowest, entry)
+
+    @contextmanager
+    def span(self, name):
+        # Nested spans of the same name (e.g. nested serializers) count once
+        if name in self._open:
+            yield
+            return
+        self._open.add(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._open.discard(name)
+            self.spans[name] = self.spans.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+    @property
+    def total_ms(self):
+        return (time.perf_counter() - self.start) * 1000
+
+    def slowest_queries(self):
+        return [{'ms': round(ms, 2), 'sql': sql} for ms, _, sql in sorted(self._slowest, reverse=True)]
+
+
+def _execute(execute, sql, params, many, context):
+    # Async views run their queries in a worker thread with the request's
+    # context, so this finds the request even when connections are shared.
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    return timings.execute(execute, sql, params, many, context)
+
+
+def install_query_timer(connection, **kwargs):
+    """Adds the (permanent) query timer to a connection once."""
+    if _execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute)
+
+
+connection_created.connect(install_query_timer)
+
+
+@contextmanager
+def timed(name):
+    """Adds the enclosed time to the current request's `name` span, if any."""
+    timings = _current.get()
+    if timings is None:
+        yield
+    else:
+        with timings.span(name):
+            yield
+
+
+class RequestTimingMiddleware:
+    """
+    Measures each request's total time, SQL query count and time, and
+    serializer time (see api.serializers.TimedModelSerializer), and
+    reports them in a Server-Timing header. Requests slower than
+    SLOW_REQUEST_MS are logged to the "config.requests" logger as one
+    JSON record including the SLOW_REQUEST_QUERIES slowest statements.
+
+    Streaming response bodies are produced after the middleware returns,
+    so their time is not included.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings, token = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings, token = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings)
+
+    def start(self):
+        for connection in connections.all(initialized_only=True):
+            install_query_timer(connection)
+        timings = RequestTimings(getattr(settings, 'SLOW_REQUEST_QUERIES', 5))
+        return timings, _current.set(timings)
+
+    def finish(self, request, response, timings):
+        total_ms = timings.total_ms
+        metrics = [
+            f'total;dur={total_ms:.1f}',
+            f'db;dur={timings.query_ms:.1f};desc="{timings.query_count} queries"',
+            *(f'{name};dur={ms:.1f}' for name, ms in timings.spans.items()),
+        ]
+        response['Server-Timing'] = ', '.join(metrics)
+        observe_request(request, response, timings)
+
+        threshold = getattr(settings, 'SLOW_REQUEST_MS', None)
+        if threshold is not None and total_ms >= threshold:
+            record = {
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'total_ms': round(total_ms, 2),
+                'query_count': timings.query_count,
+                'query_ms': round(timings.query_ms, 2),
+                **{f'{name}_ms': round(ms, 2) for name, ms in timings.spans.items()},
+                'slowest_queries': timings.slowest_queries(),
+            }
+            logger.warning('slow request %s', json.dumps(record), extra={'request_timing': record})
+        return response
+
+
+class ReplicaMiddleware:
+    """
+    Picks the database the request reads from (see config.db_router) and,
+    after a successful write, pins the user to the primary for
+    REPLICA_PIN_SECONDS. Without DATABASE_REPLICAS everything stays on the
+    primary. Goes after AuthenticationMiddleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = start_route()
+        try:
+            response = self.get_response(request)
+        finally:
+            end_route(token)
+        self.record_write(request, response)
+        return response
+
+    async def __acall__(self, request):
+        token = start_route()
+        try:
+            response = await self.get_response(request)
+        finally:
+            end_route(token)
+        await sync_to_async(self.record_write)(request, response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        route = current_route()
+        if route is not None:
+            route.alias = choose_replica(request, view_func)
+
+    def record_write(self, request, response):
+        if request.method in SAFE_METHODS or response.status_code >= 400:
+            return
+        if not getattr(settings, 'DATABASE_REPLICAS', ()):
+            return
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            pin_to_primary(user.pk)
@@ -48,12 +48,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its total covers every other middleware
+    'config.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'config.middleware.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -86,6 +89,90 @@ DATABASES = {
     'default': dj_database_url.parse(os.getenv('DB_URL'))
 }
 
+# Optional read replicas: comma-separated database URLs. Safe-method requests
+# to the API read from one of them, except for a user who wrote within the
+# last REPLICA_PIN_SECONDS (see config/db_router.py). Tests use the primary.
+DB_REPLICA_URLS = [url.strip() for url in os.getenv('DB_REPLICA_URLS', '').split(',') if url.strip()]
+DATABASE_REPLICAS = [f'replica_{index}' for index in range(len(DB_REPLICA_URLS))]
+DATABASES.update({
+    alias: {**dj_database_url.parse(url), 'TEST': {'MIRROR': 'default'}}
+    for alias, url in zip(DATABASE_REPLICAS, DB_REPLICA_URLS)
+})
+
+DATABASE_ROUTERS = ['config.db_router.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', '5'))
+# The cache alias pins are kept in; replicas are only read from when it is
+# a shared backend (see config/db_router.py).
+REPLICA_PIN_CACHE = os.getenv('REPLICA_PIN_CACHE', 'users')
+
+
+# Caches
+# The "lookups" cache backs QR-code scans with a short TTL. A write drops its
+# entries from the worker that made it; with the default 'locmem' the other
+# workers keep serving theirs for up to LOOKUP_CACHE_TIMEOUT seconds, so
+# LOOKUP_CACHE_BACKEND=file|redis shares the entries and their invalidation.
+LOOKUP_CACHES = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'lookups',
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('LOOKUP_CACHE_MAX_ENTRIES', '10000'))},
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('LOOKUP_CACHE_LOCATION', str(BASE_DIR / '.cache' / 'lookups')),
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('LOOKUP_CACHE_MAX_ENTRIES', '10000'))},
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('LOOKUP_CACHE_LOCATION', 'redis://127.0.0.1:6379'),
+        'KEY_PREFIX': 'lookups',
+    },
+}
+
+# The "forms" cache holds serialized forms keyed by their updated_at (see
+# api/form_cache.py), so every backend sees writes from other processes;
+# FORM_CACHE_BACKEND=file only saves each worker from building its own copies.
+FORM_CACHES = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'forms',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('FORM_CACHE_LOCATION', str(BASE_DIR / '.cache' / 'forms')),
+    },
+}
+
+# JWT-authenticated users must be invalidated in every worker, so they are
+# only cached in a shared backend; 'none' reads the user row per request.
+USER_CACHES = {
+    'none': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('USER_CACHE_LOCATION', str(BASE_DIR / '.cache' / 'users')),
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('USER_CACHE_LOCATION', 'redis://127.0.0.1:6379'),
+    },
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'lookups': {
+        **LOOKUP_CACHES[os.getenv('LOOKUP_CACHE_BACKEND', 'locmem')],
+        'TIMEOUT': int(os.getenv('LOOKUP_CACHE_TIMEOUT', '30')),
+    },
+    'forms': FORM_CACHES[os.getenv('FORM_CACHE_BACKEND', 'locmem')],
+    'users': USER_CACHES[os.getenv('USER_CACHE_BACKEND', 'none')],
+}
+
+FORM_CACHE_TIMEOUT = int(os.getenv('FORM_CACHE_TIMEOUT', '3600'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -135,8 +222,62 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ],
+    # orjson-backed JSON when installed, the standard library otherwise
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
+}
+
+# Seconds that aggregated /api/reports/ results are served from the cache.
+REPORTS_CACHE_TIMEOUT = int(os.getenv('REPORTS_CACHE_TIMEOUT', '60'))
+
+# Limits for POST /api/bags/bulk/.
+BAG_BULK_MAX_ROWS = int(os.getenv('BAG_BULK_MAX_ROWS', '10000'))
+BAG_BULK_CHUNK_SIZE = int(os.getenv('BAG_BULK_CHUNK_SIZE', '500'))
+
+# Seconds a JWT-authenticated user is served from the "users" cache. Saving
+# or deleting the user, or changing its groups or permissions, drops the
+# cached copy; the timeout bounds staleness if an invalidation is lost.
+USER_CACHE_TIMEOUT = int(os.getenv('USER_CACHE_TIMEOUT', '60'))
+
+# Requests at or above SLOW_REQUEST_MS are logged to "config.requests" with
+# their SLOW_REQUEST_QUERIES slowest SQL statements. Every response carries
+# a Server-Timing header (total, db, serializer).
+SLOW_REQUEST_MS = float(os.getenv('SLOW_REQUEST_MS', '500'))
+SLOW_REQUEST_QUERIES = int(os.getenv('SLOW_REQUEST_QUERIES', '5'))
+
+# /api/sync/ cursors stay before change log entries younger than this, so
+# entries committed out of id order by concurrent writers are not skipped.
+# Must exceed the longest write transaction (e.g. a bulk bag upload).
+SYNC_SETTLE_SECONDS = float(os.getenv('SYNC_SETTLE_SECONDS', '30'))
+
+# prune_change_log drops superseded change log entries and tombstones older
+# than this; /api/sync/ cursors older than it get 410 (resync from scratch).
+SYNC_RETENTION_DAYS = int(os.getenv('SYNC_RETENTION_DAYS', '30'))
+
+# When set, GET /metrics requires "Authorization: Bearer <METRICS_TOKEN>".
+# Set PROMETHEUS_MULTIPROC_DIR to aggregate metrics across worker processes.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN') or None
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'config.requests': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+    },
 }
 
 SIMPLE_JWT = {
@@ -1,11 +1,11 @@
 
 import { useCallback } from 'react';
-import { useAxios } from './index';
+import { useAxios, fetchAllPages } from './index';
 
 export const useBagAPI = () => {
 const request = useAxios();
 
-const getBags = useCallback(async () => request({ method: 'GET', url: '/bags/' }), [request]);
+const getBags = useCallback(async (params = {}) => fetchAllPages(request, { method: 'GET', url: '/bags/', params }), [request]);
 const getBag = useCallback(async (id) => request({ method: 'GET', url: `/bags/${id}/` }), [request]);
 const createBag = useCallback(async (data) => request({ method: 'POST', url: '/bags/', data }), [request]);
 const updateBag = useCallback(async (id, data) => request({ method: 'PUT', url: `/bags/${id}/`, data }), [request]);
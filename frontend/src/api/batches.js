@@ -1,12 +1,12 @@
 
 import { useCallback } from 'react';
-import { useAxios } from './index';
+import { useAxios, fetchAllPages } from './index';
 
 export const useBatchAPI = () => {
 const request = useAxios();
 
-const getBatches = useCallback(async () => {
-return await request({ method: 'GET', url: '/batches/' });
+const getBatches = useCallback(async (params = {}) => {
+return await fetchAllPages(request, { method: 'GET', url: '/batches/', params });
 }, [request]);
 
 const getBatch = useCallback(async (id) => {
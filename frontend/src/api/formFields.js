@@ -1,10 +1,10 @@
 
-import { useAxios } from './index';
+import { useAxios, fetchAllPages } from './index';
 
 export const useFormFieldAPI = () => {
 const request = useAxios();
 
-const getFormFields = async () => request({ method: 'GET', url: '/formfields/' });
+const getFormFields = async () => fetchAllPages(request, { method: 'GET', url: '/formfields/' });
 const getFormField = async (id) => request({ method: 'GET', url: `/formfields/${id}/` });
 const createFormField = async (data) => request({ method: 'POST', url: '/formfields/', data });
 const updateFormField = async (id, data) => request({ method: 'PUT', url: `/formfields/${id}/`, data });
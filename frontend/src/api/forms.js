@@ -1,11 +1,11 @@
 
 import { useCallback } from 'react';
-import { useAxios } from './index';
+import { useAxios, fetchAllPages } from './index';
 
 export const useFormAPI = () => {
 const request = useAxios();
 
-const getForms = useCallback(async () => request({ method: 'GET', url: '/forms/' }), [request]);
+const getForms = useCallback(async () => fetchAllPages(request, { method: 'GET', url: '/forms/' }), [request]);
 const getForm = useCallback(async (id) => request({ method: 'GET', url: `/forms/${id}/` }), [request]);
 const createForm = useCallback(async (data) => request({ method: 'POST', url: '/forms/', data }), [request]);
 const updateForm = useCallback(async (id, data) => request({ method: 'PUT', url: `/forms/${id}/`, data }), [request]);
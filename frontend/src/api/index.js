@@ -52,3 +52,15 @@ export const useAxios = () => {
 
   return request;
 };
+
+// List endpoints are cursor-paginated; follow `next` links to collect every row.
+export const fetchAllPages = async (request, config) => {
+  let page = await request(config);
+  if (!page || !Array.isArray(page.results)) return page;
+  const results = [...page.results];
+  while (page.next) {
+    page = await request({ method: 'GET', url: page.next });
+    results.push(...page.results);
+  }
+  return results;
+};
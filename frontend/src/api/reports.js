@@ -0,0 +1,11 @@
+import { useCallback } from 'react';
+import { useAxios } from './index';
+
+export const useReportAPI = () => {
+const request = useAxios();
+
+const getReports = useCallback(async (params = {}) => request({ method: 'GET', url: '/reports/', params }), [request]);
+const getReport = useCallback(async (name, params = {}) => request({ method: 'GET', url: `/reports/${name}/`, params }), [request]);
+
+return { getReports, getReport };
+};
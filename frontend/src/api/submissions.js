@@ -1,12 +1,12 @@
 
 import { useCallback } from 'react';
-import { useAxios } from './index';
+import { useAxios, fetchAllPages } from './index';
 
 export const useSubmissionAPI = () => {
   const request = useAxios();
 
   const getSubmissions = useCallback(
-    async (params = {}) => request({ method: 'GET', url: '/submissions/', params }),
+    async (params = {}) => fetchAllPages(request, { method: 'GET', url: '/submissions/', params }),
     [request]
   );
   const getSubmission = useCallback(
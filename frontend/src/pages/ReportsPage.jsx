@@ -1,25 +1,19 @@
 import React, { useState, useEffect } from 'react';
-import { useBatchAPI } from '../api/batches';
-import { useBagAPI } from '../api/bags';
+import { useReportAPI } from '../api/reports';
 import { useAuth } from '../context/AuthContext';
 import '../styles/ReportsPage.css';
 
 function ReportsPage() {
-  const [batchData, setBatchData] = useState([]);
-  const [bagData, setBagData] = useState([]);
+  const [reports, setReports] = useState({});
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
-  const { getBatches } = useBatchAPI();
-  const { getBags } = useBagAPI();
+  const { getReports } = useReportAPI();
   const { loading: authLoading } = useAuth();
 
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const batches = await getBatches();
-        const bags = await getBags();
-        setBatchData(batches);
-        setBagData(bags);
+        setReports(await getReports());
       } catch (e) {
         setError(e);
       } finally {
@@ -40,21 +34,9 @@ function ReportsPage() {
     return <p>Error: {error.message}</p>;
   }
 
- 
-  const batchesByCountry = batchData.reduce((acc, batch) => {
-    acc[batch.country] = (acc[batch.country] || 0) + 1;
-    return acc;
-  }, {});
-
-  const batchesByProductionType = batchData.reduce((acc, batch) => {
-    acc[batch.production_type] = (acc[batch.production_type] || 0) + 1;
-    return acc;
-  }, {});
-
-  const bagsPerBatch = bagData.reduce((acc, bag) => {
-    acc[bag.batch] = (acc[bag.batch] || 0) + 1;
-    return acc;
-  }, {});
+  const batchesByCountry = reports['batches-by-country'] || [];
+  const batchesByProductionType = reports['batches-by-production-type'] || [];
+  const bagsPerBatch = reports['bags-per-batch'] || [];
 
   return (
     <div className="reports-page-container">
@@ -63,7 +45,7 @@ function ReportsPage() {
       <div className="report-section">
         <h2>Batches by Country</h2>
         <div className="chart-placeholder">
-          {Object.entries(batchesByCountry).map(([country, count]) => (
+          {batchesByCountry.map(({ country, count }) => (
             <p key={country}>{country}: {count}</p>
           ))}
         </div>
@@ -72,7 +54,7 @@ function ReportsPage() {
       <div className="report-section">
         <h2>Batches by Production Type</h2>
         <div className="chart-placeholder">
-          {Object.entries(batchesByProductionType).map(([type, count]) => (
+          {batchesByProductionType.map(({ production_type: type, count }) => (
             <p key={type}>{type}: {count}</p>
           ))}
         </div>
@@ -81,7 +63,7 @@ function ReportsPage() {
       <div className="report-section">
         <h2>Bags per Batch</h2>
         <div className="chart-placeholder">
-          {Object.entries(bagsPerBatch).map(([batchId, count]) => (
+          {bagsPerBatch.map(({ batch: batchId, count }) => (
             <p key={batchId}>Batch {batchId}: {count} bags</p>
           ))}
         </div>